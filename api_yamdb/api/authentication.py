@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_versions
+
+USER_KEY = 'api:user:{pk}:{version}'
+# Поля для проверки прав и страницы профиля, без пароля и кода подтверждения.
+CACHED_USER_FIELDS = (
+    'id',
+    'username',
+    'email',
+    'first_name',
+    'last_name',
+    'bio',
+    'role',
+    'is_staff',
+    'is_superuser',
+    'is_active',
+)
+
+
+def user_scope(pk):
+    return f'user:{pk}'
+
+
+def user_key(pk):
+    version, = get_versions((user_scope(pk),))
+    return USER_KEY.format(pk=pk, version=version)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация с пользователем из кэша вместо запроса к БД.
+
+    Ключ содержит версию пользователя, которая меняется при каждом
+    сохранении или удалении пользователя. Остальные поля модели отложены
+    и загружаются из БД при обращении.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+        key = user_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values(*CACHED_USER_FIELDS).first()
+            if values is None:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found'
+                )
+            cache.set(key, values, settings.AUTH_USER_CACHE_TIMEOUT)
+        if not values['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        # from_db ждет значения в порядке полей модели.
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in values
+        ]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            field_names,
+            [values[name] for name in field_names]
+        )
@@ -0,0 +1,239 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .replicas import reading_replica
+
+VERSION_KEY = 'api:version:{scope}'
+MODIFIED_KEY = 'api:modified:{scope}'
+RESPONSE_KEY = 'api:response:{versions}:{uri}'
+STATS_KEY = 'api:cache:{event}'
+CACHE_EVENTS = ('hit', 'miss')
+
+
+def initial_version():
+    # Версия от текущего времени не повторяет старые после вытеснения ключа.
+    return int(time.time() * 1000)
+
+
+def get_versions(scopes):
+    """Текущие версии ресурсов, создаются при первом обращении."""
+    keys = [VERSION_KEY.format(scope=scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_modified(scopes):
+    """Время последнего изменения любого из ресурсов."""
+    modified = cache.get_many(
+        [MODIFIED_KEY.format(scope=scope) for scope in scopes]
+    )
+    return max(modified.values(), default=None)
+
+
+def get_markers(scopes):
+    """Версии ресурсов и время последнего изменения любого из них."""
+    return get_versions(scopes), get_modified(scopes)
+
+
+def replica_may_lag(modified):
+    """Реплика могла еще не получить изменение, сделанное в modified.
+
+    Такой ответ не кэшируется и не получает валидаторов: иначе устаревшие
+    данные закрепились бы под новой версией ресурсов.
+    """
+    return (
+        modified is not None
+        and time.time() - modified < settings.REPLICA_LAG_SECONDS
+    )
+
+
+def last_modified_seconds(modified):
+    """Last-Modified в целых секундах, округленный вверх.
+
+    Пока не закончилась секунда последнего изменения, в нее может попасть
+    еще одно изменение с тем же значением. Поэтому до ее конца валидатор
+    не выдается и не проверяется, и клиенту остается ETag.
+    """
+    if modified is None:
+        return None
+    seconds = math.ceil(modified)
+    if time.time() < seconds:
+        return None
+    return seconds
+
+
+def bump_version(*scopes):
+    """Смена версий ресурсов: закэшированные ответы перестают читаться."""
+    for scope in scopes:
+        key = VERSION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_version(), None)
+    cache.set_many(
+        {MODIFIED_KEY.format(scope=scope): time.time() for scope in scopes},
+        None
+    )
+
+
+class PendingBump:
+    """Смена версий, отложенная до фиксации: одна на транзакцию."""
+
+    def __init__(self):
+        self.scopes = set()
+
+    def __call__(self):
+        bump_version(*sorted(self.scopes))
+
+
+def bump_version_on_commit(*scopes):
+    """Смена версий ресурсов после фиксации текущей транзакции.
+
+    Смена до фиксации позволила бы параллельному запросу прочитать старые
+    строки и закэшировать их под новой версией. Области всех вызовов
+    в транзакции копятся в одном обработчике, и каждая версия меняется
+    один раз. Вне транзакции версии меняются сразу.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        bump_version(*scopes)
+        return
+    # Обработчик из отката точки сохранения Django уже убрал из списка.
+    pending = next((
+        callback for _, callback in connection.run_on_commit
+        if isinstance(callback, PendingBump)
+    ), None)
+    if pending is None:
+        pending = PendingBump()
+        transaction.on_commit(pending)
+    pending.scopes.update(scopes)
+
+
+def reviews_scope(title_id):
+    # Из адреса id приходит строкой, возможно с ведущими нулями.
+    return f'reviews:{int(title_id)}'
+
+
+def comments_scope(review_id):
+    return f'comments:{int(review_id)}'
+
+
+def count_event(event):
+    key = STATS_KEY.format(event=event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def cache_stats():
+    """Счетчики попаданий и промахов кэша ответов."""
+    stats = cache.get_many(
+        [STATS_KEY.format(event=event) for event in CACHE_EVENTS]
+    )
+    return {
+        event: stats.get(STATS_KEY.format(event=event), 0)
+        for event in CACHE_EVENTS
+    }
+
+
+def response_key(scopes, request):
+    versions = '.'.join(str(version) for version in get_versions(scopes))
+    uri = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return RESPONSE_KEY.format(versions=versions, uri=uri)
+
+
+class CachedListMixin:
+    """Кэширование ответов list с версиями ресурсов в ключе.
+
+    Ключ включает полный адрес запроса, то есть параметры фильтрации
+    и пагинации. Изменение любого ресурса из cache_scopes меняет его версию.
+    """
+
+    cache_scopes = ()
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        key = response_key(self.cache_scopes, request)
+        data = cache.get(key)
+        if data is not None:
+            count_event('hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        count_event('miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not (
+            reading_replica()
+            and replica_may_lag(get_modified(self.cache_scopes))
+        ):
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class CachedReadMixin(CachedListMixin):
+    """Кэширование ответов list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalReadMixin:
+    """ETag и Last-Modified для list и retrieve по версиям ресурсов.
+
+    Валидаторы строятся из версий condition_scopes без сериализации,
+    поэтому совпавший If-None-Match получает 304 без обращения к БД.
+    """
+
+    def get_condition_scopes(self):
+        return self.cache_scopes
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions, modified = get_markers(self.get_condition_scopes())
+        etag = quote_etag(hashlib.md5(
+            f'{versions}:{request.build_absolute_uri()}:'
+            f'{request.accepted_media_type}'.encode()
+        ).hexdigest())
+        last_modified = last_modified_seconds(modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200 or (
+                reading_replica() and replica_may_lag(modified)
+            ):
+                return response
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Счетчики попаданий и промахов кэша ответов API.'
+
+    def handle(self, *args, **options):
+        """Исполнение логики работы команды."""
+        stats = cache_stats()
+        total = sum(stats.values())
+        ratio = stats['hit'] / total if total else 0
+        self.stdout.write(
+            f'hits: {stats["hit"]}, misses: {stats["miss"]}, '
+            f'hit ratio: {ratio:.1%}'
+        )
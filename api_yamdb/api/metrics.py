@@ -0,0 +1,243 @@
+import bisect
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.db import connections
+
+# Верхние границы корзин гистограмм, +Inf добавляется при выводе.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+UNMATCHED_ROUTE = 'unmatched'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Гистограмма Prometheus: счетчики по корзинам, сумма и количество."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+    def samples(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield f'{name}_bucket', labels + (('le', bound),), total
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+def process_labels():
+    """Метка процесса для рядов, которые каждый воркер считает сам.
+
+    Запросы Prometheus попадают в случайный воркер gunicorn: без метки
+    ряды разных процессов чередовались бы и выглядели как сбросы
+    счетчиков. Сумма по всем воркерам — sum without (pid).
+    """
+    return (('pid', os.getpid()),)
+
+
+class Registry:
+    """Метрики запросов процесса.
+
+    Метки — процесс, имя маршрута, метод и статус, поэтому количество
+    рядов ограничено числом воркеров и маршрутов, а не адресов.
+    """
+
+    histograms = {
+        'api_request_duration_seconds': (
+            'Request processing time.', LATENCY_BUCKETS
+        ),
+        'api_db_queries': ('SQL queries per request.', QUERY_BUCKETS),
+        'api_db_duration_seconds': (
+            'SQL execution time per request.', LATENCY_BUCKETS
+        ),
+        'api_response_size_bytes': ('Response body size.', SIZE_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.requests = defaultdict(int)
+            self.series = {
+                name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+                for name, (_, buckets) in self.histograms.items()
+            }
+
+    def observe(self, route, method, status, duration, tracker, size):
+        labels = (('route', route), ('method', method))
+        values = {
+            'api_request_duration_seconds': duration,
+            'api_db_queries': tracker.count,
+            'api_db_duration_seconds': tracker.duration,
+            'api_response_size_bytes': size,
+        }
+        with self.lock:
+            self.requests[labels + (('status', status),)] += 1
+            for name, value in values.items():
+                if value is not None:
+                    self.series[name][labels].observe(value)
+
+    def render(self, extra=()):
+        """Вывод метрик в текстовом формате Prometheus."""
+        lines = [
+            '# HELP api_requests_total Requests by route, method and status.',
+            '# TYPE api_requests_total counter',
+        ]
+        process = process_labels()
+        with self.lock:
+            lines.extend(
+                format_sample('api_requests_total', process + labels, value)
+                for labels, value in sorted(self.requests.items())
+            )
+            for name, (description, _) in self.histograms.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(self.series[name].items()):
+                    lines.extend(
+                        format_sample(*sample)
+                        for sample in histogram.samples(
+                            name, process + labels
+                        )
+                    )
+        for name, kind, description, samples in extra:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if kind == 'histogram':
+                    lines.extend(
+                        format_sample(*sample)
+                        for sample in value.samples(name, labels)
+                    )
+                else:
+                    lines.append(format_sample(name, labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+def format_sample(name, labels, value):
+    if not labels:
+        return f'{name} {value}'
+    label_text = ','.join(f'{key}="{label}"' for key, label in labels)
+    return f'{name}{{{label_text}}} {value}'
+
+
+def pool_metrics():
+    """Метрики пулов соединений db_pool этого процесса."""
+    # db_pool.pool сам импортирует гистограммы из этого модуля.
+    from db_pool.pool import pool_stats
+
+    process = process_labels()
+    pools = [(process + labels, stats) for labels, stats in pool_stats()]
+    return (
+        (
+            'api_db_pool_connections',
+            'gauge',
+            'Pooled database connections by state.',
+            [(labels + (('state', state),), stats[state])
+             for labels, stats in pools for state in ('in_use', 'idle')]
+        ),
+        (
+            'api_db_pool_size',
+            'gauge',
+            'Maximum connections per pool.',
+            [(labels, stats['size']) for labels, stats in pools]
+        ),
+        (
+            'api_db_pool_waiting',
+            'gauge',
+            'Requests waiting for a pooled connection.',
+            [(labels, stats['waiting']) for labels, stats in pools]
+        ),
+        (
+            'api_db_pool_events_total',
+            'counter',
+            'Pool connects, checkouts, discards and timeouts.',
+            [(labels + (('event', event),), count)
+             for labels, stats in pools
+             for event, count in sorted(stats['events'].items())]
+        ),
+        (
+            'api_db_pool_checkout_seconds',
+            'histogram',
+            'Time to check out a pooled connection.',
+            [(labels, stats['checkout_seconds']) for labels, stats in pools]
+        ),
+    )
+
+
+class QueryTracker:
+    """Обертка execute_wrapper: число и время SQL-запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def route_name(request):
+    """Имя маршрута из urls.py вместо адреса: titles-list, reviews-detail."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.url_name or UNMATCHED_ROUTE
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """Сбор времени ответа, SQL-запросов и размера ответа по маршрутам."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tracker = QueryTracker()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracker))
+            response = self.get_response(request)
+        registry.observe(
+            route_name(request),
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            tracker,
+            response_size(response)
+        )
+        return response
@@ -0,0 +1,54 @@
+from rest_framework import pagination
+
+
+class OptionalCursorPagination(pagination.CursorPagination):
+    """Курсорная пагинация по запросу клиента, иначе постраничная.
+
+    Курсорный режим включается параметром ?pagination=cursor или наличием
+    ?cursor=: страница выбирается без COUNT(*) условием на первое поле
+    ordering, поэтому дальние страницы стоят столько же, сколько первая.
+    Остальные поля ordering только упорядочивают строки: строки с тем же
+    значением первого поля DRF пропускает смещением внутри курсора.
+    """
+
+    mode_query_param = 'pagination'
+    mode = 'cursor'
+
+    def __init__(self):
+        self.page_number_pagination = pagination.PageNumberPagination()
+        self.cursor_mode = False
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.mode
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        return self.page_number_pagination.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return super().get_paginated_response(data)
+        return self.page_number_pagination.get_paginated_response(data)
+
+
+class UserOpinionPagination(OptionalCursorPagination):
+    """Пагинация отзывов и комментариев: от новых к старым.
+
+    Курсор ищет по pub_date, id задает порядок отзывов с одинаковой датой,
+    которые пропускаются смещением.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+
+class UserPagination(OptionalCursorPagination):
+    """Пагинация пользователей по уникальному username."""
+
+    ordering = ('username',)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -21,3 +22,8 @@ class IsAdminOrModeratorOrAuthorOrReadOnly(permissions.BasePermission):
 class IsReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.method in permissions.SAFE_METHODS
+
+
+class IsLocalAddress(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
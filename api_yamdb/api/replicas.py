@@ -0,0 +1,65 @@
+"""Чтение с реплик БД для безопасных запросов к API.
+
+Реплика выбирается на весь запрос в ReplicaReadMixin и хранится
+в локальных данных потока, роутер направляет на нее чтение. Запись,
+чтение в транзакции и запросы пользователя в течение REPLICA_LAG_SECONDS
+после его собственной записи идут в основную БД: так пользователь видит
+только что созданный отзыв, даже если реплика отстает.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_KEY = 'api:primary:{pk}'
+
+state = threading.local()
+
+
+def read_from_replica():
+    """Чтение текущего запроса с одной из реплик, если они настроены."""
+    if settings.REPLICA_DATABASES:
+        state.replica = random.choice(settings.REPLICA_DATABASES)
+
+
+def read_from_primary():
+    state.replica = None
+
+
+def reading_replica():
+    return getattr(state, 'replica', None) is not None
+
+
+def pin_to_primary(user):
+    """Чтение пользователя из основной БД, пока реплики догоняют запись."""
+    cache.set(
+        PRIMARY_KEY.format(pk=user.pk), True, settings.REPLICA_LAG_SECONDS
+    )
+
+
+def pinned_to_primary(user):
+    return (
+        user.is_authenticated
+        and cache.get(PRIMARY_KEY.format(pk=user.pk), False)
+    )
+
+
+class ReplicaRouter:
+    """Чтение с реплики запроса, запись и миграции — в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(state, 'replica', None)
+        if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все БД проекта — копии основной: реплики содержат те же строки.
+        if {obj1._state.db, obj2._state.db} <= set(settings.DATABASES):
+            return True
+        return None
@@ -1,11 +1,33 @@
-from django.shortcuts import get_object_or_404
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
 
 from api_yamdb.settings import MAX_LEN_CODE, MAX_LEN_EMAIL, MAX_LEN_USERNAME
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    SCORE_FIELDS,
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    LeaderboardEntry,
+    Review,
+    Title,
+    User
+)
+from reviews.leaderboards import rebuild_titles_entries
+from reviews.ratings import histogram_stats
 from reviews.validators import validate_username, validate_year
 
 UNIQUE_REVIEW_MSG = 'Можно писать только 1 отзыв.'
+BULK_MAX_ITEMS_MSG = 'Не больше {max_items} объектов в одном запросе.'
+BULK_DUPLICATE_MSG = 'Значение {value} повторяется в запросе.'
+BULK_EXISTS_MSG = 'Объект со slug {value} уже существует.'
+BULK_NOT_FOUND_MSG = 'Объект {value} не найден.'
+BULK_ID_MSG = 'Поле id допустимо только в режиме upsert.'
 
 
 class UsernameValidationMixin:
@@ -73,6 +95,7 @@ class TitleSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
     rating = serializers.IntegerField(read_only=True)
+    weighted_rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
@@ -81,6 +104,7 @@ class TitleSerializer(serializers.ModelSerializer):
             'name',
             'year',
             'rating',
+            'weighted_rating',
             'description',
             'genre',
             'category'
@@ -88,6 +112,31 @@ class TitleSerializer(serializers.ModelSerializer):
         read_only = '__all__'
 
 
+class TitleScoresSerializer(serializers.BaseSerializer):
+    """Сериализатор для распределения оценок произведения."""
+
+    def to_representation(self, title):
+        histogram = {
+            score: getattr(title, field_name)
+            for score, field_name in SCORE_FIELDS.items()
+        }
+        return {
+            'id': title.pk,
+            **histogram_stats(histogram),
+            'scores': histogram,
+        }
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Сериализатор для места произведения в рейтинге."""
+
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('rating', 'score_count', 'title')
+
+
 class TitleSaveSerializer(serializers.ModelSerializer):
     """Сериализатор для SAVE запросов."""
 
@@ -109,6 +158,198 @@ class TitleSaveSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'description', 'genre', 'category')
 
 
+def add_error(errors, index, field, message, **kwargs):
+    errors[index].setdefault(field, []).append(message.format(**kwargs))
+
+
+def check_duplicates(items, field, errors):
+    positions = defaultdict(list)
+    for index, item in enumerate(items):
+        if field in item:
+            positions[item[field]].append(index)
+    for value, indexes in positions.items():
+        for index in indexes[1:]:
+            add_error(errors, index, field, BULK_DUPLICATE_MSG, value=value)
+
+
+def slug_pks(model, slugs):
+    """Словарь slug -> pk для всех slug одним запросом."""
+    return dict(
+        model.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+    )
+
+
+def bulk_create_with_pks(model, objs):
+    """bulk_create, заполняющий pk и там, где БД их не возвращает (SQLite).
+
+    Вызывается в транзакции: SQLite держит блокировку записи до ее конца,
+    поэтому последние len(objs) строк таблицы созданы этим вызовом.
+    """
+    model.objects.bulk_create(objs)
+    if objs and objs[0].pk is None:
+        pks = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(objs)]
+        for obj, pk in zip(objs, reversed(pks)):
+            obj.pk = pk
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Массив объектов для <ресурс>/bulk/.
+
+    Связанные объекты ищутся одним запросом на модель для всего массива.
+    Ошибки возвращаются списком по одному словарю на объект. В режиме
+    upsert (context['upsert']) существующие объекты обновляются.
+    """
+
+    def to_internal_value(self, data):
+        max_items = settings.BULK_MAX_ITEMS
+        if isinstance(data, list) and len(data) > max_items:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    BULK_MAX_ITEMS_MSG.format(max_items=max_items)
+                ]
+            })
+        items = super().to_internal_value(data)
+        errors = [{} for _ in items]
+        self.check_items(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def check_items(self, items, errors):
+        raise NotImplementedError
+
+
+class SlugBulkListSerializer(BulkListSerializer):
+    """Категории и жанры: upsert по slug."""
+
+    def check_items(self, items, errors):
+        check_duplicates(items, 'slug', errors)
+        self.existing = slug_pks(
+            self.child.Meta.model, [item['slug'] for item in items]
+        )
+        if self.context.get('upsert'):
+            return
+        for index, item in enumerate(items):
+            if item['slug'] in self.existing:
+                add_error(
+                    errors, index, 'slug', BULK_EXISTS_MSG, value=item['slug']
+                )
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = [
+            model(pk=self.existing.get(item['slug']), **item)
+            for item in validated_data
+        ]
+        model.objects.bulk_update(
+            [obj for obj in objs if obj.pk is not None], ('name',)
+        )
+        model.objects.bulk_create([obj for obj in objs if obj.pk is None])
+        return validated_data
+
+
+class CategoryBulkSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Category
+        fields = ('name', 'slug')
+        # Уникальность slug проверяется одним запросом на весь массив.
+        extra_kwargs = {'slug': {'validators': []}}
+        list_serializer_class = SlugBulkListSerializer
+
+
+class GenreBulkSerializer(CategoryBulkSerializer):
+
+    class Meta(CategoryBulkSerializer.Meta):
+        model = Genre
+
+
+class TitleBulkListSerializer(BulkListSerializer):
+    """Произведения: upsert по id, жанры и категории по slug."""
+
+    def check_items(self, items, errors):
+        upsert = self.context.get('upsert')
+        self.genres = slug_pks(
+            Genre, {slug for item in items for slug in item['genre']}
+        )
+        self.categories = slug_pks(
+            Category, {item['category'] for item in items}
+        )
+        ids = [item['id'] for item in items if 'id' in item]
+        existing = set()
+        if upsert and ids:
+            existing = set(
+                Title.objects.filter(pk__in=ids).values_list('pk', flat=True)
+            )
+        check_duplicates(items, 'id', errors)
+        for index, item in enumerate(items):
+            if 'id' in item and not upsert:
+                add_error(errors, index, 'id', BULK_ID_MSG)
+            elif 'id' in item and item['id'] not in existing:
+                add_error(
+                    errors, index, 'id', BULK_NOT_FOUND_MSG, value=item['id']
+                )
+            for slug in item['genre']:
+                if slug not in self.genres:
+                    add_error(
+                        errors, index, 'genre', BULK_NOT_FOUND_MSG, value=slug
+                    )
+            if item['category'] not in self.categories:
+                add_error(
+                    errors, index, 'category', BULK_NOT_FOUND_MSG,
+                    value=item['category']
+                )
+
+    def create(self, validated_data):
+        titles = [
+            Title(
+                pk=item.get('id'),
+                name=item['name'],
+                year=item['year'],
+                description=item.get('description'),
+                category_id=self.categories[item['category']]
+            )
+            for item in validated_data
+        ]
+        updated = [title.pk for title in titles if title.pk is not None]
+        Title.objects.bulk_update(
+            [title for title in titles if title.pk is not None],
+            ('name', 'year', 'description', 'category')
+        )
+        bulk_create_with_pks(
+            Title, [title for title in titles if title.pk is None]
+        )
+        GenreTitle.objects.filter(title_id__in=updated).delete()
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title_id=title.pk, genre_id=self.genres[slug])
+            for title, item in zip(titles, validated_data)
+            for slug in set(item['genre'])
+        )
+        if updated:
+            rebuild_titles_entries(updated)
+        for title, item in zip(titles, validated_data):
+            item['id'] = title.pk
+        return validated_data
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Произведение в массиве: жанры и категория по slug, id для upsert."""
+
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    def validate_year(self, value):
+        return validate_year(value)
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = TitleBulkListSerializer
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -125,17 +366,23 @@ class ReviewSerializer(serializers.ModelSerializer):
             'pub_date',
         )
 
-    def validate(self, data):
-        if self.context['request'].method == 'POST':
+    def create(self, validated_data):
+        # Повторный отзыв отсекает UniqueConstraint, без гонки проверки.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            # Причина ошибки проверяется только на этом редком пути:
+            # ее могло вызвать и удаление произведения параллельно.
+            title = validated_data['title']
             if Review.objects.filter(
-                title=get_object_or_404(
-                    Title,
-                    pk=self.context.get('view').kwargs.get('title_id')
-                ),
-                author=self.context['request'].user
+                title=title, author=validated_data['author']
             ).exists():
-                raise serializers.ValidationError(UNIQUE_REVIEW_MSG)
-        return data
+                raise serializers.ValidationError(
+                    {api_settings.NON_FIELD_ERRORS_KEY: [UNIQUE_REVIEW_MSG]}
+                )
+            if not Title.objects.filter(pk=title.pk).exists():
+                raise NotFound()
+            raise
 
 
 class CommentSerializer(serializers.ModelSerializer):
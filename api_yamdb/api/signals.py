@@ -0,0 +1,108 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save
+)
+from django.dispatch import receiver
+
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    LeaderboardEntry,
+    Review,
+    Title,
+    User
+)
+from reviews.signals import rows_changed
+from .authentication import user_scope
+from .cache import (
+    bump_version_on_commit,
+    comments_scope,
+    reviews_scope
+)
+
+# Ресурсы, закэшированные ответы которых зависят от модели.
+CACHE_DEPENDENCIES = {
+    Category: ('categories', 'titles'),
+    Genre: ('genres', 'titles'),
+    Title: ('titles',),
+    GenreTitle: ('titles',),
+    Review: ('titles',),
+    Comment: (),
+}
+# Списки отзывов и комментариев, от которых зависят ETag ответов.
+INSTANCE_DEPENDENCIES = {
+    Title: lambda title: (reviews_scope(title.pk),),
+    Review: lambda review: (
+        reviews_scope(review.title_id), comments_scope(review.pk)
+    ),
+    Comment: lambda comment: (comments_scope(comment.review_id),),
+}
+# Имена авторов выводятся в отзывах и комментариях.
+AUTHORS_SCOPE = 'authors'
+# Ресурсы, зависящие от моделей, которые пишутся массово в обход save().
+# Отдельные произведения и отзывы не известны, поэтому списки отзывов
+# и комментариев сбрасываются версией авторов, общей для всех списков.
+ROWS_CHANGED_DEPENDENCIES = {
+    **CACHE_DEPENDENCIES,
+    Review: ('titles', AUTHORS_SCOPE),
+    Comment: (AUTHORS_SCOPE,),
+    User: (AUTHORS_SCOPE,),
+    LeaderboardEntry: ('titles',),
+}
+
+
+def bump_dependent_versions(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        bump_version_on_commit(
+            *CACHE_DEPENDENCIES[sender],
+            *INSTANCE_DEPENDENCIES.get(sender, lambda instance: ())(instance)
+        )
+
+
+for model in CACHE_DEPENDENCIES:
+    post_save.connect(bump_dependent_versions, sender=model)
+    # Без обработчиков удаления комментарии каскада удаляются одним
+    # запросом, не загружаясь. Их списки сбрасывают удаление отзыва или
+    # автора и CommentViewSet.perform_destroy.
+    if model is not Comment:
+        post_delete.connect(bump_dependent_versions, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_genres_version(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version_on_commit('titles')
+
+
+@receiver(rows_changed)
+def bump_rows_changed_versions(sender, **kwargs):
+    """Смена версий после массовой записи, не вызывающей post_save."""
+    bump_version_on_commit(*ROWS_CHANGED_DEPENDENCIES[sender])
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    # Без обращения к отложенному полю, которое загрузило бы его из БД.
+    instance.loaded_username = instance.__dict__.get('username')
+
+
+@receiver((post_save, post_delete), sender=User)
+def bump_user_version(sender, signal, instance, **kwargs):
+    """Сброс пользователя в кэше аутентификации при любом изменении.
+
+    Удаление автора убирает и его комментарии, а переименование меняет
+    подпись: в обоих случаях сбрасываются все списки.
+    """
+    if kwargs.get('raw'):
+        return
+    bump_version_on_commit(user_scope(instance.pk))
+    if signal is post_delete or (
+        kwargs.get('created') is False
+        and instance.username != instance.loaded_username
+    ):
+        bump_version_on_commit(AUTHORS_SCOPE)
+    instance.loaded_username = instance.username
@@ -0,0 +1,212 @@
+"""Ограничение частоты запросов скользящим окном из двух счетчиков.
+
+Для каждого ключа (IP, имя пользователя, емейл) хранятся счетчики
+текущего и предыдущего окна длиной в период частоты. Число запросов
+за последний период оценивается как счетчик текущего окна плюс доля
+предыдущего, еще попадающая в период. Проверка — одно чтение двух
+ключей и одно увеличение счетчика в общем кэше, без обращений к БД:
+DRF проверяет частоту до кода представления.
+"""
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+KEY = 'throttle:{scope}:{ident}'
+# Сколько ключей держит счетчик процесса до удаления устаревших.
+LOCAL_MAX_KEYS = 10000
+
+
+class Counters:
+    """Счетчики окон в общем кэше, при его недоступности — в памяти процесса.
+
+    Клиент memcached не сообщает об ошибках: get_many возвращает пустой
+    словарь, add — False, а incr — ошибку отсутствия ключа. Поэтому
+    недоступность определяется по неудачной записи, и до следующей
+    удачной записи счетчики читаются из памяти процесса. Они не общие
+    для воркеров, но ограничивают частоту, пока кэш недоступен.
+    """
+
+    def __init__(self):
+        self.local = {}
+        self.lock = threading.Lock()
+        self.use_local = False
+
+    def get_many(self, keys):
+        if self.use_local:
+            return self.get_many_local(keys)
+        try:
+            return cache.get_many(keys)
+        except Exception:
+            return self.get_many_local(keys)
+
+    def incr(self, key, timeout):
+        try:
+            if self.incr_shared(key, timeout):
+                self.use_local = False
+                return
+        except Exception:
+            pass
+        self.use_local = True
+        self.incr_local(key, timeout)
+
+    def incr_shared(self, key, timeout):
+        """Увеличение счетчика в кэше; False, если кэш не принял запись."""
+        try:
+            cache.incr(key)
+            return True
+        except ValueError:
+            pass
+        # Первый запрос окна; add не перезапишет параллельный.
+        if cache.add(key, 1, timeout):
+            return True
+        try:
+            cache.incr(key)
+        except ValueError:
+            return False
+        return True
+
+    def get_many_local(self, keys):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                key: self.local[key][0] for key in keys
+                if key in self.local and self.local[key][1] > now
+            }
+
+    def incr_local(self, key, timeout):
+        now = time.monotonic()
+        with self.lock:
+            count, expires = self.local.get(key, (0, 0))
+            if expires <= now:
+                count, expires = 0, now + timeout
+            self.local[key] = (count + 1, expires)
+            if len(self.local) > LOCAL_MAX_KEYS:
+                self.local = {
+                    key: value for key, value in self.local.items()
+                    if value[1] > now
+                }
+                # Остальные вытесняются от старых к новым до половины
+                # предела, чтобы очистка не повторялась на каждом запросе.
+                for key in list(self.local)[
+                    :len(self.local) - LOCAL_MAX_KEYS // 2
+                ]:
+                    del self.local[key]
+
+
+counters = Counters()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Частота из DEFAULT_THROTTLE_RATES[scope] по скользящему окну.
+
+    Без частоты для scope или без ключа запроса ограничения нет.
+    Отклоненные запросы не увеличивают счетчик.
+    """
+
+    def get_rate(self):
+        return self.THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        # Ключи memcached не допускают пробелов и длиннее 250 символов.
+        return KEY.format(
+            scope=self.scope, ident=hashlib.md5(ident.encode()).hexdigest()
+        )
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        window, self.offset = divmod(self.timer(), self.duration)
+        current = f'{self.key}:{int(window)}'
+        previous = f'{self.key}:{int(window) - 1}'
+        counts = counters.get_many((current, previous))
+        self.current = counts.get(current, 0)
+        self.previous = counts.get(previous, 0)
+        if (
+            self.previous * (1 - self.offset / self.duration) + self.current
+            >= self.num_requests
+        ):
+            return self.throttle_failure()
+        counters.incr(current, 2 * self.duration)
+        return True
+
+    def wait(self):
+        """Секунды, через которые оценка опустится ниже предела."""
+        remaining = self.duration - self.offset
+        if self.current >= self.num_requests:
+            return remaining
+        # Доля предыдущего окна убывает линейно до его выхода из периода.
+        wait = self.duration * (
+            1 - (self.num_requests - 1 - self.current) / self.previous
+        ) - self.offset
+        return min(max(wait, 0), remaining)
+
+
+class IPThrottle(SlidingWindowThrottle):
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class DataThrottle(SlidingWindowThrottle):
+    """Ключ — поле field тела запроса, без учета регистра."""
+
+    field = None
+
+    def get_ident_value(self, request):
+        data = request.data
+        value = data.get(self.field) if hasattr(data, 'get') else None
+        if not isinstance(value, str):
+            return None
+        return value.strip().lower()
+
+
+class SignUpIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+
+
+class SignUpUsernameThrottle(DataThrottle):
+    scope = 'signup_username'
+    field = 'username'
+
+
+class SignUpEmailThrottle(DataThrottle):
+    scope = 'signup_email'
+    field = 'email'
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(DataThrottle):
+    scope = 'token_username'
+    field = 'username'
+
+
+class WriteThrottle(SlidingWindowThrottle):
+    """Записи пользователя; чтение не ограничивается."""
+
+    scope = 'write'
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
+
+    def get_ident_value(self, request):
+        if request.user.is_authenticated:
+            return str(request.user.pk)
+        return self.get_ident(request)
@@ -6,8 +6,11 @@ from .views import (
     CommentViewSet,
     CustomUserViewSet,
     GenreViewSet,
+    LeaderboardViewSet,
     ReviewViewSet,
     TitleViewSet,
+    export,
+    metrics,
     signup,
     token
 )
@@ -27,6 +30,11 @@ router_v1.register(
     basename='comments'
 )
 router_v1.register('users', CustomUserViewSet, basename='users')
+router_v1.register(
+    'leaderboards',
+    LeaderboardViewSet,
+    basename='leaderboards'
+)
 
 auth_patterns = [
     path('signup/', signup, name='signup'),
@@ -35,5 +43,7 @@ auth_patterns = [
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
-    path('v1/auth/', include(auth_patterns))
+    path('v1/auth/', include(auth_patterns)),
+    path('v1/metrics/', metrics, name='metrics'),
+    path('v1/export/<slug:resource>/', export, name='export')
 ]
@@ -0,0 +1,134 @@
+"""Сериализаторы чтения из словарей .values() без полей ModelSerializer.
+
+Ответ каждого сериализатора должен совпадать побайтно с ответом
+соответствующего ModelSerializer, это проверяет
+tests/test_values_serializers.py.
+"""
+from collections import defaultdict
+from operator import itemgetter
+
+from rest_framework import serializers
+
+from reviews.models import GenreTitle
+
+datetime_field = serializers.DateTimeField()
+
+
+class ValuesSerializer(serializers.BaseSerializer):
+    """Ответ по плану полей: (ключ, колонка или функция строки, приведение).
+
+    Приведение повторяет to_representation поля DRF и не вызывается для
+    None, как и в Serializer.to_representation.
+    """
+
+    columns = ()
+    plan = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.getters = tuple(
+            (
+                key,
+                itemgetter(source) if isinstance(source, str) else source,
+                convert
+            )
+            for key, source, convert in cls.plan
+        )
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.prefetch_related(None).values(*cls.columns)
+
+    def to_representation(self, row):
+        data = {}
+        for key, getter, convert in self.getters:
+            value = getter(row)
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[key] = value
+        return data
+
+
+def attach_genres(rows):
+    """Жанры произведений одним запросом, в порядке prefetch_related."""
+    genres = defaultdict(list)
+    for title_id, name, slug in GenreTitle.objects.filter(
+        title_id__in=[row['id'] for row in rows]
+    ).order_by('genre__name').values_list(
+        'title_id', 'genre__name', 'genre__slug'
+    ):
+        genres[title_id].append({'name': name, 'slug': slug})
+    for row in rows:
+        row['genre'] = genres[row['id']]
+
+
+def category(row):
+    if row['category__slug'] is None:
+        return None
+    return {'name': row['category__name'], 'slug': row['category__slug']}
+
+
+class TitleValuesListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        rows = list(data)
+        attach_genres(rows)
+        return [self.child.to_representation(row) for row in rows]
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """Чтение произведений, как TitleSerializer."""
+
+    columns = (
+        'id',
+        'name',
+        'year',
+        'rating',
+        'weighted_rating',
+        'description',
+        'category__name',
+        'category__slug',
+    )
+    plan = (
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('year', 'year', None),
+        ('rating', 'rating', int),
+        ('weighted_rating', 'weighted_rating', float),
+        ('description', 'description', None),
+        ('genre', 'genre', None),
+        ('category', category, None),
+    )
+
+    class Meta:
+        list_serializer_class = TitleValuesListSerializer
+
+    def to_representation(self, row):
+        if 'genre' not in row:
+            attach_genres([row])
+        return super().to_representation(row)
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    """Чтение отзывов, как ReviewSerializer."""
+
+    columns = ('id', 'text', 'author__username', 'score', 'pub_date')
+    plan = (
+        ('id', 'id', None),
+        ('text', 'text', None),
+        ('author', 'author__username', None),
+        ('score', 'score', None),
+        ('pub_date', 'pub_date', datetime_field.to_representation),
+    )
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Чтение комментариев, как CommentSerializer."""
+
+    columns = ('id', 'text', 'author__username', 'pub_date')
+    plan = (
+        ('id', 'id', None),
+        ('text', 'text', None),
+        ('author', 'author__username', None),
+        ('pub_date', 'pub_date', datetime_field.to_representation),
+    )
@@ -1,12 +1,22 @@
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, pagination, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    throttle_classes
+)
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (
+    SAFE_METHODS,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly
 )
@@ -14,31 +24,174 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
 
 from api_yamdb.settings import FROM_EMAIL, MAX_LEN_CODE
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.export import CONTENT_TYPES, ExportError, export_lines
+from reviews.models import (
+    PENDING,
+    SCORE_FIELDS,
+    Category,
+    Comment,
+    Genre,
+    LeaderboardEntry,
+    OutgoingEmail,
+    Review,
+    Title,
+    User
+)
+from .cache import (
+    CachedListMixin,
+    CachedReadMixin,
+    ConditionalReadMixin,
+    bump_version_on_commit,
+    cache_stats,
+    comments_scope,
+    reviews_scope
+)
 from .filters import TitleFilter
+from .metrics import CONTENT_TYPE, pool_metrics, registry
+from .pagination import UserOpinionPagination, UserPagination
 from .permissions import (
     IsAdmin,
     IsAdminOrModeratorOrAuthorOrReadOnly,
+    IsLocalAddress,
     IsReadOnly
 )
+from .replicas import (
+    pin_to_primary,
+    pinned_to_primary,
+    read_from_primary,
+    read_from_replica
+)
 from .serializers import (
+    CategoryBulkSerializer,
     CategorySerializer,
     CommentSerializer,
+    GenreBulkSerializer,
     GenreSerializer,
+    LeaderboardEntrySerializer,
     ReviewSerializer,
     SignUpSerializer,
+    TitleBulkSerializer,
     TitleSaveSerializer,
+    TitleScoresSerializer,
     TitleSerializer,
     TokenSerializer,
     UserProfileSerializer,
     UserSerializer
 )
+from .signals import AUTHORS_SCOPE, CACHE_DEPENDENCIES
+from .throttling import (
+    SignUpEmailThrottle,
+    SignUpIPThrottle,
+    SignUpUsernameThrottle,
+    TokenIPThrottle,
+    TokenUsernameThrottle,
+    WriteThrottle
+)
+from .values_serializers import (
+    CommentValuesSerializer,
+    ReviewValuesSerializer,
+    TitleValuesSerializer
+)
 
+CONFIRMATION_SUBJECT = 'Yambd: код подтверждения'
+BULK_CONFLICT_MSG = 'Данные изменились во время записи, повторите запрос.'
+LEADERBOARD_LIMIT_MSG = 'Укажите число от 1 до {max_size}.'
+LEADERBOARD_SCOPE_MSG = 'Укажите либо категорию, либо жанр.'
 UNIQUE_USERNAME_EMAIL_MSG = (
     'Пользователь с именем {username} или емейлом {email} уже существует.'
 )
 
 
+class BulkWriteMixin:
+    """POST <ресурс>/bulk/: запись массива объектов администратором.
+
+    С ?upsert=true существующие объекты обновляются, остальные создаются.
+    Массовая запись не вызывает сигналы модели, поэтому версии кэша
+    меняются здесь.
+    """
+
+    bulk_serializer_class = None
+
+    @action(
+        methods=['post'],
+        detail=False,
+        url_path='bulk',
+        permission_classes=(IsAdmin,)
+    )
+    def bulk(self, request):
+        serializer = self.bulk_serializer_class(
+            data=request.data,
+            many=True,
+            context={
+                **self.get_serializer_context(),
+                'upsert': request.query_params.get(
+                    'upsert', ''
+                ).lower() in ('1', 'true'),
+            }
+        )
+        try:
+            with transaction.atomic():
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError(BULK_CONFLICT_MSG)
+        bump_version_on_commit(*CACHE_DEPENDENCIES[self.queryset.model])
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ValuesReadMixin:
+    """Чтение list и retrieve через .values() и values_serializer_class.
+
+    Ответ совпадает с ответом serializer_class, но не создает модели
+    и поля ModelSerializer. Отключается настройкой FAST_READ_SERIALIZERS.
+    """
+
+    values_serializer_class = None
+
+    def use_values(self):
+        return (
+            settings.FAST_READ_SERIALIZERS
+            and self.action in ('list', 'retrieve')
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if not self.use_values():
+            return super().get_serializer(*args, **kwargs)
+        kwargs.setdefault('context', self.get_serializer_context())
+        return self.values_serializer_class(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.use_values():
+            return self.values_serializer_class.values(queryset)
+        return queryset
+
+
+class ReplicaReadMixin:
+    """Чтение безопасных запросов с реплики БД, см. api/replicas.py.
+
+    После успешной записи пользователь читает из основной БД
+    REPLICA_LAG_SECONDS, пока изменение доходит до реплик.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS
+                and not pinned_to_primary(request.user)):
+            read_from_replica()
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            read_from_primary()
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400
+                and self.request.user.is_authenticated):
+            pin_to_primary(self.request.user)
+        return response
+
+
 class CategoryAndGenreViewSet(mixins.CreateModelMixin,
                               mixins.ListModelMixin,
                               mixins.DestroyModelMixin,
@@ -52,37 +205,42 @@ class CategoryAndGenreViewSet(mixins.CreateModelMixin,
 
 
 @api_view(['POST'])
+@throttle_classes(
+    (SignUpIPThrottle, SignUpUsernameThrottle, SignUpEmailThrottle)
+)
 def signup(request):
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     username = serializer.validated_data['username']
     email = serializer.validated_data['email']
     try:
-        user, success = User.objects.get_or_create(
-            username=username,
-            email=email
-        )
+        with transaction.atomic():
+            user, success = User.objects.get_or_create(
+                username=username,
+                email=email
+            )
+            user.confirmation_code = get_random_string(
+                length=MAX_LEN_CODE,
+                allowed_chars='0123456789'
+            )
+            user.save()
+            # Письмо отправляет команда send_emails, а не запрос регистрации.
+            OutgoingEmail.objects.create(
+                subject=CONFIRMATION_SUBJECT,
+                body=user.confirmation_code,
+                from_email=FROM_EMAIL,
+                recipient=email
+            )
     except IntegrityError:
         return Response(
             UNIQUE_USERNAME_EMAIL_MSG.format(username=username, email=email),
             status=status.HTTP_400_BAD_REQUEST
         )
-    user.confirmation_code = get_random_string(
-        length=MAX_LEN_CODE,
-        allowed_chars='0123456789'
-    )
-    user.save()
-    send_mail(
-        'Yambd: код подтверждения',
-        user.confirmation_code,
-        [FROM_EMAIL],
-        (email,),
-        fail_silently=False
-    )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
+@throttle_classes((TokenIPThrottle, TokenUsernameThrottle))
 def token(request):
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -100,10 +258,61 @@ def token(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes((IsAdmin | IsLocalAddress,))
+def metrics(request):
+    """Метрики маршрутов, кэша и очереди писем для Prometheus."""
+    extra = (
+        (
+            'api_cache_events_total',
+            'counter',
+            'Response cache hits and misses.',
+            [((('event', event),), count)
+             for event, count in cache_stats().items()]
+        ),
+        (
+            'api_outgoing_email_queue',
+            'gauge',
+            'Pending outgoing emails.',
+            [((), OutgoingEmail.objects.filter(status=PENDING).count())]
+        ),
+        *pool_metrics(),
+    )
+    return HttpResponse(registry.render(extra), content_type=CONTENT_TYPE)
+
+
+@api_view(['GET'])
+@permission_classes((IsAdmin,))
+def export(request, resource):
+    """Потоковая выгрузка titles, reviews или comments для аналитики.
+
+    Параметры: output_format (ndjson или csv), since (дата отзыва или
+    комментария) и category (slug категории произведения).
+    """
+    params = request.query_params
+    output_format = params.get('output_format', 'ndjson')
+    try:
+        lines = export_lines(
+            resource,
+            output_format,
+            since=params.get('since'),
+            category=params.get('category')
+        )
+    except ExportError as error:
+        raise ValidationError(str(error))
+    response = StreamingHttpResponse(
+        lines, content_type=CONTENT_TYPES[output_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{resource}.{output_format}"'
+    )
+    return response
+
+
 class CustomUserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = UserPagination
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
     lookup_field = 'username'
@@ -131,21 +340,40 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(CategoryAndGenreViewSet):
+class CategoryViewSet(ReplicaReadMixin,
+                      BulkWriteMixin,
+                      CachedListMixin,
+                      CategoryAndGenreViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_serializer_class = CategoryBulkSerializer
+    cache_scopes = ('categories',)
 
 
-class GenreViewSet(CategoryAndGenreViewSet):
+class GenreViewSet(ReplicaReadMixin,
+                   BulkWriteMixin,
+                   CachedListMixin,
+                   CategoryAndGenreViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = GenreBulkSerializer
+    cache_scopes = ('genres',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ReplicaReadMixin,
+                   BulkWriteMixin,
+                   ConditionalReadMixin,
+                   CachedReadMixin,
+                   ValuesReadMixin,
+                   viewsets.ModelViewSet):
     serializer_class = TitleSaveSerializer
+    bulk_serializer_class = TitleBulkSerializer
+    values_serializer_class = TitleValuesSerializer
+    cache_scopes = ('titles',)
     field_names = 'name'
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by(field_names)
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by(field_names)
     permission_classes = (IsAdmin | IsReadOnly,)
     filterset_class = TitleFilter
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
@@ -154,38 +382,146 @@ class TitleViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleSerializer
+        if self.action == 'scores':
+            return TitleScoresSerializer
         return TitleSaveSerializer
 
+    @action(methods=['get'], detail=True, url_path='scores')
+    def scores(self, request, pk=None):
+        """Распределение оценок 1-10 из счетчиков произведения."""
+        return self.conditional_response(
+            partial(self.get_cached_response, self.retrieve_scores),
+            request,
+            pk=pk
+        )
+
+    def retrieve_scores(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.only('id', *SCORE_FIELDS.values()), pk=pk
+        )
+        return Response(self.get_serializer(title).data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class LeaderboardViewSet(ReplicaReadMixin,
+                         CachedListMixin,
+                         mixins.ListModelMixin,
+                         viewsets.GenericViewSet):
+    """Лучшие произведения: общий рейтинг, ?category=<slug> или ?genre=.
+
+    Рейтинги рассчитаны заранее, первые ?limit= мест читаются по индексу.
+    """
+
+    serializer_class = LeaderboardEntrySerializer
+    pagination_class = None
+    cache_scopes = ('titles',)
+
+    def get_limit(self):
+        max_size = settings.LEADERBOARD_MAX_SIZE
+        try:
+            limit = int(self.request.query_params.get(
+                'limit', settings.LEADERBOARD_SIZE
+            ))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= max_size:
+            raise ValidationError(
+                {'limit': [LEADERBOARD_LIMIT_MSG.format(max_size=max_size)]}
+            )
+        return limit
+
+    def get_scope(self):
+        category = self.request.query_params.get('category')
+        genre = self.request.query_params.get('genre')
+        if category and genre:
+            raise ValidationError(LEADERBOARD_SCOPE_MSG)
+        if category:
+            return {'category__slug': category, 'genre': None}
+        if genre:
+            return {'category': None, 'genre__slug': genre}
+        return {'category': None, 'genre': None}
+
+    def get_queryset(self):
+        return LeaderboardEntry.objects.filter(
+            **self.get_scope()
+        ).select_related(
+            'title__category'
+        ).prefetch_related('title__genre')[:self.get_limit()]
+
+
+class ReviewViewSet(ReplicaReadMixin,
+                    ConditionalReadMixin,
+                    ValuesReadMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
+    pagination_class = UserOpinionPagination
     permission_classes = (
         IsAdminOrModeratorOrAuthorOrReadOnly,
         IsAuthenticatedOrReadOnly,
     )
+    throttle_classes = (WriteThrottle,)
 
-    def get_title(self):
+    def get_condition_scopes(self):
+        return (reviews_scope(self.kwargs.get('title_id')), AUTHORS_SCOPE)
+
+    @cached_property
+    def title(self):
         return get_object_or_404(Title, id=self.kwargs.get('title_id'))
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.title)
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.title.reviews.select_related('author')
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin,
+                     ConditionalReadMixin,
+                     ValuesReadMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
+    pagination_class = UserOpinionPagination
     permission_classes = (
         IsAdminOrModeratorOrAuthorOrReadOnly,
         IsAuthenticatedOrReadOnly,
     )
+    throttle_classes = (WriteThrottle,)
+
+    def get_condition_scopes(self):
+        return (comments_scope(self.kwargs.get('review_id')), AUTHORS_SCOPE)
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+    def get_review_lookup(self):
+        return {
+            'pk': self.kwargs.get('review_id'),
+            'title_id': self.kwargs.get('title_id'),
+        }
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        # Пара произведение/отзыв проверяется соединением в том же запросе.
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).select_related('author').only(
+            'id', 'text', 'pub_date', 'review_id', 'author__username'
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # Пустая страница: отзыва нет или у него нет комментариев.
+        if not page and not Review.objects.filter(
+            **self.get_review_lookup()
+        ).exists():
+            raise Http404
+        return page
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        review = get_object_or_404(
+            Review.objects.only('id'), **self.get_review_lookup()
+        )
+        serializer.save(author=self.request.user, review=review)
+
+    def perform_destroy(self, instance):
+        # У комментариев нет post_delete, см. api.signals.
+        instance.delete()
+        bump_version_on_commit(comments_scope(instance.review_id))
@@ -22,14 +22,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
-    'reviews',
-    'api',
+    'reviews.apps.ReviewsConfig',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,10 +72,74 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'django.db.backends.postgresql'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'django.db.backends.postgresql'),
         'HOST': os.getenv('DB_HOST', 'django.db.backends.postgresql'),
-        'PORT': os.getenv('DB_PORT', 'django.db.backends.postgresql')
+        'PORT': os.getenv('DB_PORT', 'django.db.backends.postgresql'),
+        # Используется при DB_ENGINE=db_pool, см. db_pool/pool.py.
+        'POOL': {
+            'SIZE': int(os.getenv('DB_POOL_SIZE', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            'MAX_IDLE': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+            'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+            'HEALTH_CHECK_INTERVAL': float(
+                os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 10)
+            ),
+        },
+    }
+}
+
+# Реплики для чтения: DB_REPLICA_HOSTS=replica1,replica2:5433, остальные
+# параметры подключения как у основной БД.
+for number, address in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной БД.
+REPLICA_LAG_SECONDS = int(os.getenv('DB_REPLICA_LAG_SECONDS', 5))
+
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 60 * 60))
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+# Чтение произведений, отзывов и комментариев через .values().
+FAST_READ_SERIALIZERS = True
+# Максимум объектов в одном запросе <ресурс>/bulk/.
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 1000))
+
+
+# Leaderboards
+
+LEADERBOARD_MIN_REVIEWS = int(os.getenv('LEADERBOARD_MIN_REVIEWS', 5))
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+
+WEIGHTED_RATING_PRIOR_WEIGHT = float(
+    os.getenv('WEIGHTED_RATING_PRIOR_WEIGHT', 10)
+)
+
+
+# Metrics
+
+METRICS_ALLOWED_IPS = os.getenv(
+    'METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+).split(',')
+
 
 # Password validation
 
@@ -120,13 +186,24 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # Адрес клиента — из X-Forwarded-For, который выставляет nginx.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+    # Частоты для api.throttling, пустое значение отключает ограничение.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': os.getenv('THROTTLE_SIGNUP_IP', '20/hour') or None,
+        'signup_username': os.getenv('THROTTLE_SIGNUP_USERNAME', '5/hour') or None,
+        'signup_email': os.getenv('THROTTLE_SIGNUP_EMAIL', '5/hour') or None,
+        'token_ip': os.getenv('THROTTLE_TOKEN_IP', '60/min') or None,
+        'token_username': os.getenv('THROTTLE_TOKEN_USERNAME', '10/min') or None,
+        'write': os.getenv('THROTTLE_WRITE', '60/min') or None,
+    },
 }
 
 SIMPLE_JWT = {
@@ -0,0 +1,4 @@
+"""PostgreSQL с пулом соединений: DATABASES['default']['ENGINE'] = 'db_pool'.
+
+Настройки пула — DATABASES['default']['POOL'], см. db_pool.pool.
+"""
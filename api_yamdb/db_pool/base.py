@@ -0,0 +1,37 @@
+from django.db.backends.postgresql import base
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Соединения берутся из пула процесса и возвращаются в него.
+
+    Django закрывает соединение в конце запроса (CONN_MAX_AGE = 0),
+    вместо закрытия оно возвращается в пул открытым.
+    """
+
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias,
+            conn_params,
+            self.settings_dict.get('POOL', {}),
+            lambda: base.Database.connect(**conn_params)
+        )
+        connection = self.pool.acquire()
+        # Как в postgresql.base: уровень изоляции из OPTIONS или из БД.
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
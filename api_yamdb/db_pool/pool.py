@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+from psycopg2 import Error, OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from api.metrics import LATENCY_BUCKETS, Histogram
+
+SIZE = 10
+TIMEOUT = 5
+MAX_IDLE = 300
+MAX_LIFETIME = 1800
+HEALTH_CHECK_INTERVAL = 10
+TIMEOUT_MSG = 'Нет свободных соединений в пуле за {timeout} с.'
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """Пул соединений процесса: не больше size открытых соединений.
+
+    Если все соединения заняты, запрос ждет освобождения до timeout.
+    При выдаче соединение проверяется: закрытые, с незавершенной
+    транзакцией, старше max_lifetime или простаивавшие дольше max_idle
+    закрываются. Соединение, простаивавшее дольше health_check_interval,
+    дополнительно проверяется запросом SELECT 1.
+    """
+
+    def __init__(self, connect, size=SIZE, timeout=TIMEOUT,
+                 max_idle=MAX_IDLE, max_lifetime=MAX_LIFETIME,
+                 health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.condition = threading.Condition()
+        # Свободные соединения со временем возврата, последнее — справа.
+        self.idle = deque()
+        self.created = {}
+        self.in_use = 0
+        self.waiting = 0
+        self.events = defaultdict(int)
+        self.checkout_seconds = Histogram(LATENCY_BUCKETS)
+
+    def acquire(self):
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection, released = self.reserve(deadline)
+            if connection is None:
+                try:
+                    connection = self.open()
+                except Exception:
+                    self.discard(None)
+                    raise
+                break
+            if self.usable(connection, released):
+                break
+            self.discard(connection)
+        with self.condition:
+            self.events['checkout'] += 1
+            self.checkout_seconds.observe(time.perf_counter() - started)
+        return connection
+
+    def reserve(self, deadline):
+        """Свободное соединение или (None, None), если можно открыть новое."""
+        with self.condition:
+            self.waiting += 1
+            try:
+                while not self.idle and self.in_use >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.events['timeout'] += 1
+                        raise PoolTimeout(
+                            TIMEOUT_MSG.format(timeout=self.timeout)
+                        )
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_use += 1
+            if self.idle:
+                return self.idle.pop()
+            return None, None
+
+    def open(self):
+        connection = self.connect()
+        with self.condition:
+            self.created[id(connection)] = time.monotonic()
+            self.events['connect'] += 1
+        return connection
+
+    def expired(self, connection, released, now):
+        return (
+            now - released > self.max_idle
+            or now - self.created[id(connection)] > self.max_lifetime
+        )
+
+    def usable(self, connection, released):
+        now = time.monotonic()
+        if (connection.closed
+                or connection.get_transaction_status()
+                != TRANSACTION_STATUS_IDLE
+                or self.expired(connection, released, now)):
+            return False
+        if now - released <= self.health_check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Error:
+            return False
+        return True
+
+    def release(self, connection):
+        """Возврат соединения: транзакция откатывается, сломанное закрыто."""
+        if (not connection.closed
+                and connection.get_transaction_status()
+                != TRANSACTION_STATUS_IDLE):
+            try:
+                connection.rollback()
+            except Error:
+                pass
+        now = time.monotonic()
+        if (connection.closed
+                or connection.get_transaction_status()
+                != TRANSACTION_STATUS_IDLE
+                or now - self.created[id(connection)] > self.max_lifetime):
+            self.discard(connection)
+            return
+        stale = []
+        with self.condition:
+            self.in_use -= 1
+            self.idle.append((connection, now))
+            # Слева — соединения, дольше всех ждавшие выдачи.
+            while self.idle and now - self.idle[0][1] > self.max_idle:
+                stale.append(self.idle.popleft()[0])
+                self.forget(stale[-1])
+            self.condition.notify()
+        for stale_connection in stale:
+            self.close(stale_connection)
+
+    def discard(self, connection):
+        """Освобождение места соединения, которое больше не используется."""
+        with self.condition:
+            self.in_use -= 1
+            if connection is not None:
+                self.forget(connection)
+            self.condition.notify()
+        if connection is not None:
+            self.close(connection)
+
+    def forget(self, connection):
+        self.created.pop(id(connection), None)
+        self.events['discard'] += 1
+
+    def close(self, connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def close_all(self):
+        with self.condition:
+            idle, self.idle = self.idle, deque()
+            for connection, _ in idle:
+                self.forget(connection)
+        for connection, _ in idle:
+            self.close(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'waiting': self.waiting,
+                'events': dict(self.events),
+                'checkout_seconds': self.checkout_seconds.copy(),
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options, connect):
+    """Пул процесса для набора параметров подключения.
+
+    Параметры входят в ключ, поэтому тестовая БД получает отдельный пул.
+    """
+    key = (alias, tuple(sorted(conn_params.items())))
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(
+                connect,
+                size=options.get('SIZE', SIZE),
+                timeout=options.get('TIMEOUT', TIMEOUT),
+                max_idle=options.get('MAX_IDLE', MAX_IDLE),
+                max_lifetime=options.get('MAX_LIFETIME', MAX_LIFETIME),
+                health_check_interval=options.get(
+                    'HEALTH_CHECK_INTERVAL', HEALTH_CHECK_INTERVAL
+                )
+            )
+        return pools[key]
+
+
+def pool_stats():
+    """Состояние пулов процесса: метки (псевдоним, имя БД) и статистика."""
+    with pools_lock:
+        items = list(pools.items())
+    return [
+        (
+            (('alias', alias), ('database', dict(params).get('database'))),
+            pool.stats()
+        )
+        for (alias, params), pool in items
+    ]
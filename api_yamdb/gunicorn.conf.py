@@ -0,0 +1,17 @@
+"""Настройки gunicorn: потоковые воркеры для конкурентных запросов.
+
+Воркер gthread держит соединения клиентов в селекторе и отдает потоку
+только готовый к обработке запрос, поэтому ожидание БД или медленный
+клиент занимает один поток, а не весь процесс. У каждого потока свое
+соединение с БД: DB_POOL_SIZE должен быть не меньше GUNICORN_THREADS.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+# Соединения от nginx переиспользуются между запросами.
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 30))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
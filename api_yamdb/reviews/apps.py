@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from . import signals
+        post_migrate.connect(signals.restore_search_index, sender=self)
+        connection_created.connect(signals.add_search_functions)
@@ -0,0 +1,110 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import GenreTitle, LeaderboardEntry, Title
+
+BATCH_SIZE = 1000
+
+
+def title_entries(title_id, category_id, genre_ids, rating, score_count):
+    """Записи произведения: общий рейтинг, категория и каждый жанр."""
+    scopes = [{}]
+    if category_id is not None:
+        scopes.append({'category_id': category_id})
+    scopes.extend({'genre_id': genre_id} for genre_id in genre_ids)
+    return [
+        LeaderboardEntry(
+            title_id=title_id,
+            rating=rating,
+            score_count=score_count,
+            **scope
+        )
+        for scope in scopes
+    ]
+
+
+def eligible_titles():
+    return Title.objects.filter(
+        score_count__gte=settings.LEADERBOARD_MIN_REVIEWS,
+        rating__isnull=False
+    )
+
+
+def rebuild_title_entries(title_id):
+    """Пересоздание записей произведения после смены категории или жанров."""
+    LeaderboardEntry.objects.filter(title_id=title_id).delete()
+    title = eligible_titles().filter(pk=title_id).order_by().values(
+        'category_id', 'rating', 'score_count'
+    ).first()
+    if title is None:
+        return
+    LeaderboardEntry.objects.bulk_create(title_entries(
+        title_id,
+        genre_ids=GenreTitle.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True),
+        **title
+    ))
+
+
+def rebuild_titles_entries(title_ids):
+    """Пересоздание записей группы произведений после массовой записи."""
+    LeaderboardEntry.objects.filter(title_id__in=title_ids).delete()
+    LeaderboardEntry.objects.bulk_create(
+        all_entries(eligible_titles().filter(pk__in=title_ids))
+    )
+
+
+def update_title_entries(title_id):
+    """Перенос нового рейтинга произведения в его записи.
+
+    Обычно это один UPDATE. Записи создаются, когда произведение набирает
+    LEADERBOARD_MIN_REVIEWS оценок, и удаляются, когда теряет их.
+    """
+    title = Title.objects.filter(pk=title_id).order_by().values(
+        'rating', 'score_count'
+    ).first()
+    if title is None:
+        return
+    entries = LeaderboardEntry.objects.filter(title_id=title_id)
+    if (title['rating'] is None
+            or title['score_count'] < settings.LEADERBOARD_MIN_REVIEWS):
+        entries.delete()
+    elif not entries.update(**title):
+        rebuild_title_entries(title_id)
+
+
+def all_entries(titles=None):
+    if titles is None:
+        titles = eligible_titles()
+    for title_id, category_id, rating, score_count in titles.values_list(
+        'id', 'category_id', 'rating', 'score_count'
+    ).iterator():
+        yield from title_entries(
+            title_id, category_id, (), rating, score_count
+        )
+    for title_id, genre_id, rating, score_count in GenreTitle.objects.filter(
+        title__in=titles
+    ).values_list(
+        'title_id', 'genre_id', 'title__rating', 'title__score_count'
+    ).iterator():
+        yield LeaderboardEntry(
+            title_id=title_id,
+            genre_id=genre_id,
+            rating=rating,
+            score_count=score_count
+        )
+
+
+def rebuild_leaderboards(batch_size=BATCH_SIZE):
+    """Полный пересчет рейтингов по сохраненным оценкам произведений."""
+    created = 0
+    entries = all_entries()
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        for batch in iter(lambda: list(islice(entries, batch_size)), []):
+            LeaderboardEntry.objects.bulk_create(batch)
+            created += len(batch)
+    return created
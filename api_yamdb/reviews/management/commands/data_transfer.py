@@ -1,123 +1,316 @@
 import csv
+import multiprocessing
 import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from itertools import islice
 
 from django.apps import apps
-from django.core.management.base import BaseCommand
-
-from reviews.models import Category, Genre, Review, Title, User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, connections, transaction
 
+from reviews.leaderboards import rebuild_leaderboards
+from reviews.models import LeaderboardEntry, Title
+from reviews.ratings import recount_ratings
+from reviews.signals import rows_changed
 
+# Файлы .csv в порядке загрузки: модель и переименование колонок в *_id.
 BASE_DICT = {
-    'users': ['User', 'reviews', 'filepath'],
-    'genre': ['Genre', 'reviews', 'filepath'],
-    'titles': ['Title', 'reviews', 'filepath'],
-    'comments': ['Comment', 'reviews', 'filepath'],
-    'review': ['Review', 'reviews', 'filepath'],
-    'category': ['Category', 'reviews', 'filepath'],
-    'genre_title': ['Title', 'reviews', 'filepath']
+    'users': ['User', {}],
+    'category': ['Category', {}],
+    'genre': ['Genre', {}],
+    'titles': ['Title', {'category': 'category_id'}],
+    'review': ['Review', {'author': 'author_id'}],
+    'comments': ['Comment', {'author': 'author_id'}],
+    'genre_title': ['GenreTitle', {}],
 }
+APP_NAME = 'reviews'
+BATCH_SIZE = 1000
 
 
-class Command(BaseCommand):
+def read_rows(file_path, columns):
+    """Построчное чтение .csv в словари с именами атрибутов модели."""
+    with open(file_path, 'r', encoding='utf-8', newline='') as csv_file:
+        reader = csv.reader(csv_file, delimiter=',', quotechar='"')
+        header = [columns.get(name, name) for name in next(reader)]
+        for row in reader:
+            yield dict(zip(header, row))
 
-    def get_files(self, path):
-        """Получение списка файлов для импорта."""
-        files = []
 
-        for addresses, dirs, file_names in os.walk(path):
-            for file_name in file_names:
-                if file_name.endswith('.csv'):
-                    file_path = os.path.join(addresses, file_name)
-                    files.append(file_path)
+def batches(rows, batch_size):
+    """Разбиение потока строк на пачки фиксированного размера."""
+    rows = iter(rows)
+    return iter(lambda: list(islice(rows, batch_size)), [])
 
-        return files
 
-    def transfer(self, base_item):
-        """Перенос данных из файла .csv в модель."""
-        model_name = BASE_DICT[base_item][0]
-        app_name = BASE_DICT[base_item][1]
-        file_path = BASE_DICT[base_item][2]
+def new_rows(model, batch):
+    """Строки пачки с id, которых еще нет в таблице.
 
-        model = apps.get_model(app_name, model_name)
+    Повторная загрузка тех же файлов пропускает уже загруженные строки.
+    """
+    if 'id' not in batch[0]:
+        return batch
+    to_python = model._meta.pk.to_python
+    existing = set(model.objects.filter(
+        pk__in=[row['id'] for row in batch]
+    ).values_list('pk', flat=True))
+    return [row for row in batch if to_python(row['id']) not in existing]
 
-        with open(file_path, 'r', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file, delimiter=',', quotechar='"')
 
-            header = next(reader)
+def bulk_load(model, rows, batch_size):
+    """Загрузка строк через bulk_create пачками."""
+    count = 0
+    for batch in batches(rows, batch_size):
+        batch = new_rows(model, batch)
+        # Django сам делит пачку по ограничениям БД на число параметров.
+        model.objects.bulk_create([model(**row) for row in batch])
+        count += len(batch)
+    return count
 
-            for element in reader:
-                object_dict = {key: value for key, value in zip(
-                    header, element
-                )}
 
-                if model_name == 'Title':
-                    category = Category.objects.get(
-                        pk=object_dict['category']
-                    )
-                    object_dict['category'] = category
-
-                if model_name == 'Review':
-                    title = Title.objects.get(pk=object_dict['title_id'])
-                    object_dict['title'] = title
-                    author = User.objects.get(pk=object_dict['author'])
-                    object_dict['author'] = author
-                    object_dict['score'] = int(object_dict['score'])
-
-                if model_name == 'Comment':
-                    author = User.objects.get(pk=object_dict['author'])
-                    object_dict['author'] = author
-                    review = Review.objects.get(pk=object_dict['review_id'])
-                    object_dict['review'] = review
-
-                try:
-                    model.objects.create(**object_dict)
-
-                except ValueError:
-                    self.stdout.write(
-                        self.style.ERROR('Error while transferring data')
-                    )
+def copy_values(fields, obj):
+    """Значения объекта в виде, в котором их сохранил бы bulk_create."""
+    values = []
+    for field in fields:
+        value = field.get_db_prep_save(field.pre_save(obj, True), connection)
+        values.append(r'\N' if value is None else value)
+    return values
 
-    def through_table_process(self, base_item):
-        """Настройка работы промежуточной таблицы GenreTitles."""
-        file_path = BASE_DICT[base_item][2]
 
-        with open(file_path, 'r', encoding='utf-8') as csv_file:
+def copy_load(model, rows, batch_size):
+    """Загрузка строк в PostgreSQL через COPY FROM STDIN пачками."""
+    quote = connection.ops.quote_name
+    count = 0
+    with connection.cursor() as cursor:
+        for batch in batches(rows, batch_size):
+            batch = new_rows(model, batch)
+            if not batch:
+                continue
+            fields = [
+                field for field in model._meta.concrete_fields
+                if not field.primary_key or field.attname in batch[0]
+            ]
+            buffer = StringIO()
+            writer = csv.writer(buffer)
+            for row in batch:
+                writer.writerow(copy_values(fields, model(**row)))
+            buffer.seek(0)
+            cursor.copy_expert(
+                'COPY {table} ({columns}) FROM STDIN '
+                "WITH (FORMAT csv, NULL '\\N')".format(
+                    table=quote(model._meta.db_table),
+                    columns=', '.join(quote(field.column) for field in fields)
+                ),
+                buffer
+            )
+            count += len(batch)
+    return count
 
-            reader = csv.reader(csv_file, delimiter=',', quotechar='"')
-            header = next(reader)
 
-            for row in reader:
-                try:
-                    object_dict = {key: value for key, value in zip(
-                        header, row
-                    )}
+def get_model(base_item):
+    if base_item not in BASE_DICT:
+        raise CommandError(f'Unknown table: {base_item}')
+    return apps.get_model(APP_NAME, BASE_DICT[base_item][0])
+
+
+def foreign_key_graph(base_items):
+    """Таблицы, на которые ссылаются внешние ключи каждой из таблиц."""
+    tables = {get_model(base_item): base_item for base_item in base_items}
+    return {
+        base_item: {
+            tables[field.related_model]
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in tables
+            and field.related_model is not model
+        }
+        for model, base_item in tables.items()
+    }
+
+
+def dependency_levels(graph):
+    """Уровни графа внешних ключей: таблицы уровня не зависят друг от друга.
+
+    Таблицы, которых нет в графе, считаются уже загруженными.
+    """
+    dependencies = {
+        base_item: set(parents) & graph.keys()
+        for base_item, parents in graph.items()
+    }
+    levels = []
+    loaded = set()
+    while dependencies:
+        level = [
+            base_item for base_item, parents in dependencies.items()
+            if parents <= loaded
+        ]
+        if not level:
+            raise CommandError(
+                f'Cyclic dependencies between tables: {sorted(dependencies)}'
+            )
+        levels.append(level)
+        loaded.update(level)
+        for base_item in level:
+            del dependencies[base_item]
+    return levels
+
+
+def load_table(base_item, file_path, batch_size, use_copy, in_worker=False):
+    """Загрузка одной таблицы, в том числе в отдельном процессе."""
+    columns = BASE_DICT[base_item][1]
+    load = copy_load if use_copy else bulk_load
+    started = time.monotonic()
+    try:
+        with transaction.atomic():
+            count = load(
+                get_model(base_item),
+                read_rows(file_path, columns),
+                batch_size
+            )
+    finally:
+        if in_worker:
+            connection.close()
+    return count, time.monotonic() - started
 
-                    title = Title.objects.get(pk=object_dict['title_id'])
-                    genre, created = Genre.objects.get_or_create(
-                        pk=object_dict['genre_id']
-                    )
 
-                    if genre and genre not in title.genre.all():
-                        title.genre.add(genre)
-                        title.save()
+def reset_sequences(models):
+    """Сдвиг последовательностей id после вставки строк с явными id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
 
-                except ValueError:
-                    self.stdout.write(
-                        self.style.ERROR('Error while creating connection')
+
+def peak_memory_mb(who=resource.RUSAGE_SELF):
+    """Пиковое потребление памяти в мегабайтах.
+
+    Для RUSAGE_CHILDREN — пик самого большого завершенного дочернего
+    процесса: воркеры загрузки завершаются вместе с пулом.
+    """
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Загрузка демонстрационных данных из файлов .csv.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.getcwd(),
+            help='Каталог, в котором искать файлы .csv.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк в одной вставке.'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Использовать COPY FROM STDIN (только PostgreSQL).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов для параллельной загрузки таблиц.'
+        )
+
+    def get_files(self, path):
+        """Получение списка файлов для импорта."""
+        files = {}
+
+        for addresses, dirs, file_names in os.walk(path):
+            for file_name in file_names:
+                if file_name.endswith('.csv'):
+                    file_path = os.path.join(addresses, file_name)
+                    files[file_name.split('.', 1)[0]] = file_path
+
+        return files
+
+    def transfer(self, levels, files, options):
+        """Перенос данных из файлов .csv в модели по уровням зависимостей."""
+        arguments = (options['batch_size'], options['copy'])
+        if options['workers'] == 1:
+            return {
+                base_item: load_table(base_item, files[base_item], *arguments)
+                for level in levels
+                for base_item in level
+            }
+        # Дочерние процессы открывают собственные соединения с БД.
+        connections.close_all()
+        results = {}
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('fork')
+        ) as executor:
+            for level in levels:
+                futures = {
+                    base_item: executor.submit(
+                        load_table, base_item, files[base_item], *arguments,
+                        in_worker=True
                     )
+                    for base_item in level
+                }
+                results.update(
+                    (base_item, future.result())
+                    for base_item, future in futures.items()
+                )
+        return results
+
+    def report(self, name, count, seconds):
+        """Вывод скорости загрузки."""
+        self.stdout.write(
+            f'{name}: {count} rows in {seconds:.2f} s '
+            f'({count / max(seconds, 1e-6):.0f} rows/s)'
+        )
 
     def handle(self, *args, **options):
         """Исполнение логики работы команды."""
-        files = self.get_files(os.getcwd())
-        for file_path in files:
-            file_name = os.path.basename(file_path).split('.', 1)[0]
-            if file_name in BASE_DICT:
-                BASE_DICT[file_name][2] = file_path
-
-        self.transfer('users')
-        self.transfer('category')
-        self.transfer('genre')
-        self.transfer('titles')
-        self.transfer('review')
-        self.transfer('comments')
-        self.through_table_process('genre_title')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('COPY FROM STDIN is available for PostgreSQL.')
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite allows a single writer, loading sequentially'
+            ))
+            options['workers'] = 1
+        files = self.get_files(options['path'])
+        for base_item in BASE_DICT:
+            if base_item not in files:
+                self.stdout.write(
+                    self.style.WARNING(f'File {base_item}.csv not found')
+                )
+        levels = dependency_levels(foreign_key_graph(
+            base_item for base_item in BASE_DICT if base_item in files
+        ))
+        started = time.monotonic()
+        try:
+            results = self.transfer(levels, files, options)
+        except (DatabaseError, TypeError, ValueError) as error:
+            raise CommandError(f'Error while transferring data: {error}')
+        for base_item, (count, seconds) in results.items():
+            self.report(base_item, count, seconds)
+        reset_sequences([get_model(base_item) for base_item in results])
+        recount_ratings()
+        rebuild_leaderboards()
+        for model in {
+            *(get_model(base_item) for base_item in results),
+            Title,
+            LeaderboardEntry,
+        }:
+            rows_changed.send(sender=model)
+        self.report(
+            'total',
+            sum(count for count, _ in results.values()),
+            time.monotonic() - started
+        )
+        peak = f'Peak memory: {peak_memory_mb():.1f} MB'
+        if options['workers'] > 1:
+            peak += (
+                ', largest worker: '
+                f'{peak_memory_mb(resource.RUSAGE_CHILDREN):.1f} MB'
+            )
+        self.stdout.write(self.style.SUCCESS(peak))
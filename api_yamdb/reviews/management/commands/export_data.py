@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.export import (
+    CHUNK_SIZE,
+    CONTENT_TYPES,
+    EXPORTS,
+    ExportError,
+    export_lines
+)
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка произведений, отзывов или комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=list(EXPORTS))
+        parser.add_argument(
+            '--output-format',
+            choices=list(CONTENT_TYPES),
+            default='ndjson'
+        )
+        parser.add_argument(
+            '--since',
+            help='Отзывы и комментарии начиная с даты ГГГГ-ММ-ДД[TЧЧ:ММ].'
+        )
+        parser.add_argument('--category', help='Slug категории произведений.')
+        parser.add_argument(
+            '--file',
+            help='Файл для выгрузки, по умолчанию стандартный вывод.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за раз.'
+        )
+
+    def handle(self, *args, **options):
+        """Исполнение логики работы команды."""
+        try:
+            lines = export_lines(
+                options['resource'],
+                options['output_format'],
+                since=options['since'],
+                category=options['category'],
+                chunk_size=options['chunk_size']
+            )
+        except ExportError as error:
+            raise CommandError(error)
+        if options['file'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(
+            options['file'], 'w', encoding='utf-8', newline=''
+        ) as export_file:
+            export_file.writelines(lines)
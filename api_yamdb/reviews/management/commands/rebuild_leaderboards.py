@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews.leaderboards import BATCH_SIZE, rebuild_leaderboards
+from reviews.models import LeaderboardEntry
+from reviews.signals import rows_changed
+
+
+class Command(BaseCommand):
+    help = 'Полный пересчет рейтингов произведений по категориям и жанрам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество записей в одной вставке.'
+        )
+
+    def handle(self, *args, **options):
+        """Исполнение логики работы команды."""
+        created = rebuild_leaderboards(options['batch_size'])
+        rows_changed.send(sender=LeaderboardEntry)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в рейтингах: {created}.'
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.leaderboards import rebuild_title_entries
+from reviews.models import Title
+from reviews.ratings import find_mismatched_titles, recount_ratings
+from reviews.signals import rows_changed
+
+MISMATCH_MSG = 'Счетчики оценок расходятся с отзывами у {count} произведений.'
+
+
+class Command(BaseCommand):
+    help = 'Пересчет и проверка рейтингов и гистограмм оценок произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счетчики, не изменяя их.'
+        )
+
+    def handle(self, *args, **options):
+        """Исполнение логики работы команды."""
+        if options['check']:
+            mismatched = len(find_mismatched_titles())
+            if mismatched:
+                raise CommandError(MISMATCH_MSG.format(count=mismatched))
+            self.stdout.write(self.style.SUCCESS('Счетчики оценок верны.'))
+            return
+        with transaction.atomic():
+            fixed = recount_ratings()
+            # Места в рейтингах строятся по исправленным счетчикам.
+            for title_id in fixed:
+                rebuild_title_entries(title_id)
+            rows_changed.send(sender=Title)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено расхождений: {len(fixed)}.'
+        ))
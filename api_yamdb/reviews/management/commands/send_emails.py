@@ -0,0 +1,162 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import FAILED, PENDING, SENT, OutgoingEmail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30
+POLL_INTERVAL = 5
+UPDATE_FIELDS = ('status', 'attempts', 'next_attempt', 'sent', 'last_error')
+# На сколько секунд захваченные письма скрываются от других отправителей.
+LEASE_SECONDS = 600
+
+
+def record_failure(email, error, max_attempts, backoff):
+    """Ошибка попытки: повтор с экспоненциальной задержкой или отказ."""
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = FAILED
+    else:
+        email.next_attempt = timezone.now() + timedelta(
+            seconds=backoff * 2 ** (email.attempts - 1)
+        )
+
+
+def send_email(connection, email, max_attempts, backoff):
+    """Отправка одного письма через открытое соединение с ретраями."""
+    started = time.monotonic()
+    email.attempts += 1
+    try:
+        connection.send_messages([EmailMessage(
+            email.subject,
+            email.body,
+            email.from_email,
+            (email.recipient,)
+        )])
+    except Exception as error:
+        record_failure(email, error, max_attempts, backoff)
+    else:
+        email.status = SENT
+        email.sent = timezone.now()
+    return time.monotonic() - started
+
+
+def claim_batch(batch_size):
+    """Захват пачки готовых писем короткой транзакцией.
+
+    Письма откладываются на LEASE_SECONDS: другие отправители их не
+    возьмут, а после падения процесса они вернутся в очередь. Блокировки
+    строк не держатся во время обмена с SMTP.
+    """
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                status=PENDING,
+                next_attempt__lte=timezone.now()
+            )[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt=timezone.now() + timedelta(
+            seconds=LEASE_SECONDS
+        ))
+    return emails
+
+
+def send_batch(batch_size, max_attempts, backoff):
+    """Отправка пачки готовых к отправке писем по одному соединению."""
+    emails = claim_batch(batch_size)
+    if not emails:
+        return [], []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        # SMTP недоступен: попытка засчитывается всей пачке.
+        for email in emails:
+            email.attempts += 1
+            record_failure(email, error, max_attempts, backoff)
+        durations = []
+    else:
+        try:
+            durations = [
+                send_email(connection, email, max_attempts, backoff)
+                for email in emails
+            ]
+        finally:
+            connection.close()
+    OutgoingEmail.objects.bulk_update(emails, UPDATE_FIELDS)
+    return emails, durations
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди исходящих писем.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество писем, отправляемых по одному соединению.'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='Количество попыток до пометки письма как неотправленного.'
+        )
+        parser.add_argument(
+            '--backoff',
+            type=int,
+            default=BACKOFF_SECONDS,
+            help='Задержка перед первой повторной попыткой, в секундах.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=POLL_INTERVAL,
+            help='Пауза между проверками пустой очереди, в секундах.'
+        )
+
+    def report(self, emails, durations):
+        """Вывод метрик очереди: глубина, время отправки и задержка."""
+        sent = [email for email in emails if email.status == SENT]
+        delays = [
+            (email.sent - email.created).total_seconds() for email in sent
+        ]
+        self.stdout.write(
+            f'sent: {len(sent)}, failed: {len(emails) - len(sent)}, '
+            'queue depth: {depth}, send latency avg: {average:.1f} ms, '
+            'max: {maximum:.1f} ms, delivery delay max: {delay:.1f} s'.format(
+                depth=OutgoingEmail.objects.filter(status=PENDING).count(),
+                average=1000 * sum(durations) / max(len(durations), 1),
+                maximum=1000 * max(durations, default=0),
+                delay=max(delays, default=0)
+            )
+        )
+
+    def handle(self, *args, **options):
+        """Исполнение логики работы команды."""
+        while True:
+            emails, durations = send_batch(
+                options['batch_size'],
+                options['max_attempts'],
+                options['backoff']
+            )
+            if emails:
+                self.report(emails, durations)
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
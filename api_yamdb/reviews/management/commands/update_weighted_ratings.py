@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.signals import rows_changed
+from reviews.weighted_ratings import (
+    BATCH_SIZE,
+    CHUNK_SIZE,
+    update_weighted_ratings
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересчет взвешенных (байесовских) рейтингов произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prior-weight',
+            type=float,
+            default=settings.WEIGHTED_RATING_PRIOR_WEIGHT,
+            help='Сколько средних оценок добавляется к оценкам произведения.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Количество отзывов, читаемых из БД за раз.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество произведений в одном UPDATE.'
+        )
+
+    def handle(self, *args, **options):
+        """Исполнение логики работы команды."""
+        started = time.monotonic()
+        with transaction.atomic():
+            reviews, titles = update_weighted_ratings(
+                options['prior_weight'],
+                options['chunk_size'],
+                options['batch_size']
+            )
+            rows_changed.send(sender=Title)
+        seconds = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'reviews: {reviews}, titles: {titles} in {seconds:.2f} s '
+            f'({reviews / max(seconds, 1e-6):.0f} reviews/s)'
+        ))
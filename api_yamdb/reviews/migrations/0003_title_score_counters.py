@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 11:10
+
+from django.db import migrations, models
+from django.db.models import (
+    Count, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_score_counters(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    titles = Title.objects.using(schema_editor.connection.alias)
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    titles.update(
+        score_sum=Coalesce(Subquery(
+            reviews.annotate(total=Sum('score')).values('total')
+        ), 0),
+        score_count=Coalesce(Subquery(
+            reviews.annotate(total=Count('id')).values('total')
+        ), 0),
+    )
+    titles.update(rating=ExpressionWrapper(
+        Cast(F('score_sum'), FloatField()) / NullIf(F('score_count'), 0),
+        output_field=FloatField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20220723_2235'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_score_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from reviews.search import install_search_index
+
+
+def create_search_index(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {
+        'postgresql': ('DROP INDEX IF EXISTS title_name_trgm_idx',),
+        'sqlite': (
+            'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+            'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+            'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+            'DROP TABLE IF EXISTS reviews_title_fts',
+        ),
+    }
+    for statement in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 11:37
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    alias = schema_editor.connection.alias
+    titles = Title.objects.using(alias).filter(
+        score_count__gte=settings.LEADERBOARD_MIN_REVIEWS,
+        rating__isnull=False
+    )
+
+    def entries():
+        for title_id, category_id, rating, score_count in titles.values_list(
+            'id', 'category_id', 'rating', 'score_count'
+        ).iterator():
+            scopes = [{}]
+            if category_id is not None:
+                scopes.append({'category_id': category_id})
+            for scope in scopes:
+                yield LeaderboardEntry(
+                    title_id=title_id,
+                    rating=rating,
+                    score_count=score_count,
+                    **scope
+                )
+        links = GenreTitle.objects.using(alias).filter(
+            title__in=titles
+        )
+        for title_id, genre_id, rating, score_count in links.values_list(
+            'title_id', 'genre_id', 'title__rating', 'title__score_count'
+        ).iterator():
+            yield LeaderboardEntry(
+                title_id=title_id,
+                genre_id=genre_id,
+                rating=rating,
+                score_count=score_count
+            )
+
+    rows = entries()
+    for batch in iter(lambda: list(islice(rows, BATCH_SIZE)), []):
+        LeaderboardEntry.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_comment_review_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(verbose_name='Рейтинг')),
+                ('score_count', models.PositiveIntegerField(verbose_name='Количество оценок')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.Category', verbose_name='Категория')),
+                ('genre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.Genre', verbose_name='Жанр')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтинге',
+                'ordering': ('-rating', '-score_count', 'title_id'),
+                'default_related_name': 'leaderboard_entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['category', 'genre', '-rating', '-score_count', 'title'], name='leaderboard_scope_rating_idx'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
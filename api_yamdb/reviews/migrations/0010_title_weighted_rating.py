@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_leaderboard_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+    ]
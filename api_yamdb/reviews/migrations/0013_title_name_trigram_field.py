@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 12:58
+
+from django.db import migrations
+import reviews.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_genretitle_genre_title_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='name',
+            field=reviews.search.TrigramTextField(db_index=True, verbose_name='Название'),
+        ),
+    ]
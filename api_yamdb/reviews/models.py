@@ -1,13 +1,22 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from api_yamdb.settings import MAX_LEN_CODE, MAX_LEN_EMAIL, MAX_LEN_USERNAME
+from .search import FullTextField, TrigramTextField
 from .validators import validate_username, validate_year
 
 USER = 'user'
 MODERATOR = 'moderator'
 ADMIN = 'admin'
+MIN_SCORE = 1
+MAX_SCORE = 10
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+SCORE_FIELDS = {score: f'score_{score}' for score in SCORES}
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
 
 
 class UserOpinionModel(models.Model):
@@ -123,7 +132,7 @@ class Genre(CategoryGenreModel):
 
 
 class Title(models.Model):
-    name = models.TextField(
+    name = TrigramTextField(
         db_index=True,
         verbose_name='Название'
     )
@@ -151,15 +160,113 @@ class Title(models.Model):
         verbose_name='Жанр',
         through='GenreTitle'
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    score_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок'
+    )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Рейтинг'
+    )
+    weighted_rating = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Взвешенный рейтинг'
+    )
+    # Гистограмма оценок: отдельный счетчик отзывов для каждой оценки,
+    # имена полей — SCORE_FIELDS.
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 1'
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 2'
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 3'
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 4'
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 5'
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 6'
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 7'
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 8'
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 9'
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок 10'
+    )
 
     class Meta:
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
+    # Счетчики оценок и рейтинги пишутся только запросами UPDATE, см.
+    # reviews.ratings и reviews.weighted_ratings.
+    COUNTER_FIELDS = (
+        'score_sum', 'score_count', 'rating', 'weighted_rating',
+        *SCORE_FIELDS.values()
+    )
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Значения счетчиков, загруженные вместе с произведением, могли
+        # устареть: отзыв, добавленный после загрузки, иначе бы потерялся.
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            skipped = {*self.COUNTER_FIELDS, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class TitleSearchIndex(models.Model):
+    """Таблица FTS5 для поиска произведений в SQLite, см. reviews.search."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index'
+    )
+    name = FullTextField()
+
+    class Meta:
+        managed = False
+        db_table = 'reviews_title_fts'
+
 
 class GenreTitle(models.Model):
     title = models.ForeignKey(
@@ -174,6 +281,13 @@ class GenreTitle(models.Model):
     )
 
     class Meta:
+        # Фильтр по жанрам ищет произведения жанра только по индексу.
+        indexes = [
+            models.Index(
+                fields=('genre', 'title'),
+                name='genretitle_genre_title_idx'
+            ),
+        ]
         verbose_name = 'Произведение и жанр'
         verbose_name_plural = 'Произведения и жанры'
 
@@ -189,8 +303,8 @@ class Review(UserOpinionModel):
     )
     score = models.IntegerField(
         validators=[
-            MaxValueValidator(10, 'Оценка от 1 до 10'),
-            MinValueValidator(1, 'Оценка от 1 до 10')
+            MaxValueValidator(MAX_SCORE, 'Оценка от 1 до 10'),
+            MinValueValidator(MIN_SCORE, 'Оценка от 1 до 10')
         ],
         verbose_name='Оценка',
     )
@@ -203,9 +317,29 @@ class Review(UserOpinionModel):
                 name='уникальный отзыв автора'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Без отложенных полей прежняя оценка известна; иначе ее загрузит
+        # remember_review_score перед сохранением.
+        if 'title_id' in field_names and 'score' in field_names:
+            instance.loaded_score = (instance.title_id, instance.score)
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Счетчики произведения обновляются сигналами в той же транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Comment(UserOpinionModel):
     review = models.ForeignKey(
@@ -216,5 +350,124 @@ class Comment(UserOpinionModel):
 
     class Meta(UserOpinionModel.Meta):
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+
+
+class LeaderboardEntry(models.Model):
+    """Место произведения в рейтинге: общем, категории или жанра.
+
+    Общий рейтинг хранится без категории и жанра, рейтинг категории — без
+    жанра, рейтинг жанра — без категории.
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        verbose_name='Произведение'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name='Категория'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name='Жанр'
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг'
+    )
+    score_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок'
+    )
+
+    class Meta:
+        ordering = ('-rating', '-score_count', 'title_id')
+        default_related_name = 'leaderboard_entries'
+        indexes = [
+            models.Index(
+                fields=(
+                    'category', 'genre', '-rating', '-score_count', 'title'
+                ),
+                name='leaderboard_scope_rating_idx'
+            ),
+        ]
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтинге'
+
+
+class OutgoingEmail(models.Model):
+    STATUSES = (
+        (PENDING, PENDING),
+        (SENT, SENT),
+        (FAILED, FAILED),
+    )
+
+    subject = models.CharField(
+        max_length=256,
+        verbose_name='Тема'
+    )
+    body = models.TextField(
+        verbose_name='Текст'
+    )
+    from_email = models.EmailField(
+        max_length=MAX_LEN_EMAIL,
+        verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(
+        max_length=MAX_LEN_EMAIL,
+        verbose_name='Получатель'
+    )
+    status = models.CharField(
+        max_length=max(len(status) for status, _ in STATUSES),
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    class Meta:
+        ordering = ('next_attempt',)
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt'),
+                name='email_status_next_attempt_idx'
+            ),
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject} ({self.status})'
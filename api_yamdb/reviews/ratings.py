@@ -0,0 +1,150 @@
+import math
+from collections import Counter
+
+from django.db.models import (
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    Sum
+)
+from django.db.models.functions import Cast, NullIf
+
+from .models import SCORE_FIELDS, Review, Title
+
+PERCENTILES = (25, 75, 90)
+BATCH_SIZE = 1000
+
+
+def rating_expression(score_sum, score_count):
+    """Средняя оценка по счетчикам, NULL для произведений без отзывов."""
+    return ExpressionWrapper(
+        Cast(score_sum, FloatField()) / NullIf(score_count, 0),
+        output_field=FloatField()
+    )
+
+
+def update_title_rating(title_id, added=(), removed=()):
+    """Учет добавленных и убранных оценок одним запросом UPDATE."""
+    histogram = Counter(added)
+    histogram.subtract(removed)
+    score_sum = F('score_sum') + (sum(added) - sum(removed))
+    score_count = F('score_count') + (len(added) - len(removed))
+    Title.objects.filter(pk=title_id).update(
+        score_sum=score_sum,
+        score_count=score_count,
+        rating=rating_expression(score_sum, score_count),
+        **{
+            SCORE_FIELDS[score]: F(SCORE_FIELDS[score]) + delta
+            for score, delta in histogram.items()
+            if delta and score in SCORE_FIELDS
+        }
+    )
+
+
+def counter_fields():
+    """Поля счетчиков оценок произведения."""
+    return ('score_sum', 'score_count', *SCORE_FIELDS.values())
+
+
+def actual_scores(titles, chunk_size):
+    """Счетчики оценок по таблице отзывов одним проходом GROUP BY.
+
+    Пары (id произведения, значения counter_fields) по возрастанию id;
+    произведения без отзывов пропускаются.
+    """
+    rows = Review.objects.filter(
+        title__in=titles.values('pk')
+    ).order_by('title_id').values('title_id').annotate(
+        score_sum=Sum('score'),
+        score_count=Count('id'),
+        **{
+            field_name: Count('id', filter=Q(score=score))
+            for score, field_name in SCORE_FIELDS.items()
+        }
+    ).values_list('title_id', *counter_fields()).iterator(chunk_size)
+    for row in rows:
+        yield row[0], row[1:]
+
+
+def find_mismatched_titles(titles=None, chunk_size=BATCH_SIZE):
+    """Произведения, у которых счетчики или рейтинг расходятся с отзывами.
+
+    Словарь {id: верные значения полей}. Сохраненные счетчики сливаются
+    с actual_scores по id, как в reviews.export.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    empty = (0,) * len(counter_fields())
+    scores = actual_scores(titles, chunk_size)
+    title_id, actual = next(scores, (None, empty))
+    mismatched = {}
+    for row in titles.order_by('pk').values_list(
+        'pk', 'rating', *counter_fields()
+    ).iterator(chunk_size):
+        pk, rating, stored = row[0], row[1], row[2:]
+        # Запросы читают разные снимки: отзывы удаленного между ними
+        # произведения пропускаются, чтобы не остановить слияние.
+        while title_id is not None and title_id < pk:
+            title_id, actual = next(scores, (None, empty))
+        values = empty
+        if title_id == pk:
+            values = actual
+            title_id, actual = next(scores, (None, empty))
+        score_sum, score_count = values[:2]
+        actual_rating = score_sum / score_count if score_count else None
+        if stored != values or rating != actual_rating:
+            mismatched[pk] = {
+                **dict(zip(counter_fields(), values)),
+                'rating': actual_rating,
+            }
+    return mismatched
+
+
+def recount_ratings(titles=None, batch_size=BATCH_SIZE):
+    """Исправление расходящихся счетчиков оценок пачками UPDATE.
+
+    Возвращает id исправленных произведений.
+    """
+    mismatched = find_mismatched_titles(titles, batch_size)
+    Title.objects.bulk_update(
+        [Title(pk=pk, **values) for pk, values in mismatched.items()],
+        ('rating', *counter_fields()),
+        batch_size=batch_size
+    )
+    return list(mismatched)
+
+
+def score_percentile(histogram, total, percent):
+    """Наименьшая оценка, до которой включительно набран percent отзывов."""
+    rank = max(math.ceil(total * percent / 100), 1)
+    seen = 0
+    for score, count in histogram.items():
+        seen += count
+        if seen >= rank:
+            break
+    return score
+
+
+def histogram_stats(histogram):
+    """Среднее, медиана и процентили по гистограмме {оценка: количество}."""
+    total = sum(histogram.values())
+    if not total:
+        return {
+            'count': 0,
+            'mean': None,
+            'median': None,
+            'percentiles': dict.fromkeys(PERCENTILES),
+        }
+    return {
+        'count': total,
+        'mean': sum(
+            score * count for score, count in histogram.items()
+        ) / total,
+        'median': score_percentile(histogram, total, 50),
+        'percentiles': {
+            percent: score_percentile(histogram, total, percent)
+            for percent in PERCENTILES
+        },
+    }
@@ -0,0 +1,181 @@
+import re
+
+from django.db import connections, models
+from django.db.models import F, FloatField, Func, Q, TextField, Value
+
+TRIGRAM_LENGTH = 3
+# pg_trgm.similarity_threshold по умолчанию: порог оператора % в PostgreSQL.
+SIMILARITY_THRESHOLD = 0.3
+# Слова для триграмм pg_trgm: буквы и цифры.
+WORD_RE = re.compile(r'[^\W_]+')
+
+# PostgreSQL: GIN-индекс pg_trgm обслуживает и сходство, и ILIKE.
+POSTGRESQL_SEARCH_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS title_name_trgm_idx '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+)
+# SQLite: внешняя таблица FTS5 с триграммами, обновляется триггерами.
+SQLITE_SEARCH_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5("
+    "name, content='reviews_title', content_rowid='id', tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert '
+    'AFTER INSERT ON reviews_title BEGIN '
+    'INSERT INTO reviews_title_fts(rowid, name) VALUES (new.id, new.name); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete '
+    'AFTER DELETE ON reviews_title BEGIN '
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name) "
+    "VALUES ('delete', old.id, old.name); "
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update '
+    'AFTER UPDATE OF name ON reviews_title BEGIN '
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name) "
+    "VALUES ('delete', old.id, old.name); "
+    'INSERT INTO reviews_title_fts(rowid, name) VALUES (new.id, new.name); '
+    'END',
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+)
+SEARCH_SQL = {
+    'postgresql': POSTGRESQL_SEARCH_SQL,
+    'sqlite': SQLITE_SEARCH_SQL,
+}
+
+
+class FullTextField(models.TextField):
+    """Колонка таблицы FTS5, поддерживает поиск __match."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class TrigramTextField(models.TextField):
+    """Колонка с индексом pg_trgm, поддерживает поиск __ilike_contains."""
+
+
+@TrigramTextField.register_lookup
+class ILikeContains(models.Lookup):
+    """ILIKE '%value%' в PostgreSQL.
+
+    icontains в Django 2.2 строится как UPPER(name) LIKE UPPER(value),
+    и GIN-индекс pg_trgm по name для него не используется.
+    """
+
+    lookup_name = 'ilike_contains'
+
+    def get_db_prep_lookup(self, value, connection):
+        return '%s', [f'%{connection.ops.prep_for_like_query(value)}%']
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', lhs_params + rhs_params
+
+
+def word_trigrams(value):
+    """Триграммы строки как в pg_trgm.
+
+    Каждое слово в нижнем регистре дополняется двумя пробелами слева
+    и одним справа.
+    """
+    trigrams = set()
+    for word in WORD_RE.findall(value.casefold()):
+        word = f'  {word} '
+        trigrams.update(
+            word[index:index + TRIGRAM_LENGTH]
+            for index in range(len(word) - TRIGRAM_LENGTH + 1)
+        )
+    return trigrams
+
+
+def trigram_similarity(first, second):
+    """Сходство строк как similarity() в pg_trgm."""
+    if first is None or second is None:
+        return None
+    first, second = word_trigrams(first), word_trigrams(second)
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+def casefold(value):
+    return None if value is None else value.casefold()
+
+
+def install_search_functions(connection):
+    """Функции поиска для соединения SQLite, см. search_sqlite."""
+    for name, num_params, function in (
+        ('trigram_similarity', 2, trigram_similarity),
+        ('casefold', 1, casefold),
+    ):
+        connection.connection.create_function(
+            name, num_params, function, deterministic=True
+        )
+
+
+def install_search_index(connection):
+    """Создание индекса для поиска произведений по названию."""
+    with connection.cursor() as cursor:
+        for statement in SEARCH_SQL.get(connection.vendor, ()):
+            cursor.execute(statement)
+
+
+def trigram_query(value):
+    """Запрос FTS5: строки, у которых с value есть общая триграмма."""
+    value = ' '.join(value.split())
+    trigrams = {
+        value[index:index + TRIGRAM_LENGTH].replace('"', '""')
+        for index in range(len(value) - TRIGRAM_LENGTH + 1)
+    }
+    return ' OR '.join(f'"{trigram}"' for trigram in sorted(trigrams))
+
+
+def search_postgresql(queryset, value):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    return queryset.annotate(
+        relevance=TrigramSimilarity('name', value)
+    ).filter(
+        Q(name__trigram_similar=value) | Q(name__ilike_contains=value)
+    ).order_by('-relevance', 'name')
+
+
+def search_sqlite(queryset, value):
+    # Индекс FTS5 отбирает кандидатов, а условия и порядок повторяют
+    # PostgreSQL: сходство не ниже порога или вхождение без учета регистра.
+    return queryset.filter(
+        search_index__name__match=trigram_query(value)
+    ).annotate(
+        relevance=Func(
+            F('name'), Value(value),
+            function='trigram_similarity',
+            output_field=FloatField()
+        ),
+        folded_name=Func(
+            F('name'), function='casefold', output_field=TextField()
+        )
+    ).filter(
+        Q(relevance__gte=SIMILARITY_THRESHOLD)
+        | Q(folded_name__contains=value.casefold())
+    ).order_by('-relevance', 'name')
+
+
+def search_titles(queryset, value):
+    """Поиск произведений по названию с учетом опечаток.
+
+    Результаты упорядочены по релевантности. Без индекса поиска или для
+    запросов короче триграммы используется обычный icontains.
+    """
+    vendor = connections[queryset.db].vendor
+    if len(value.strip()) < TRIGRAM_LENGTH or vendor not in SEARCH_SQL:
+        return queryset.filter(name__icontains=value)
+    search = search_postgresql if vendor == 'postgresql' else search_sqlite
+    return search(queryset, value)
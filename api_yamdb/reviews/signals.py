@@ -0,0 +1,91 @@
+from django.db import connections
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save
+)
+from django.dispatch import Signal, receiver
+
+from .leaderboards import rebuild_title_entries, update_title_entries
+from .models import Review, Title
+from .ratings import update_title_rating
+from .search import install_search_functions, install_search_index
+
+# Массовая запись в обход save(): отправитель — модель с измененными
+# строками. Отправляется командами пересчета и загрузки данных.
+rows_changed = Signal()
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, raw, **kwargs):
+    """Запоминание прежней оценки, если отзыв не был загружен из БД."""
+    if raw or instance._state.adding or hasattr(instance, 'loaded_score'):
+        return
+    instance.loaded_score = Review.objects.filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first() or (None, None)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    """Учет новой или измененной оценки в счетчиках произведения."""
+    if raw:
+        return
+    old_title_id, old_score = (
+        (None, None) if created
+        else getattr(instance, 'loaded_score', (None, None))
+    )
+    if old_title_id != instance.title_id:
+        if old_title_id is not None:
+            update_title_rating(old_title_id, removed=(old_score,))
+            update_title_entries(old_title_id)
+        update_title_rating(instance.title_id, added=(instance.score,))
+        update_title_entries(instance.title_id)
+    elif old_score != instance.score:
+        update_title_rating(
+            instance.title_id, added=(instance.score,), removed=(old_score,)
+        )
+        update_title_entries(instance.title_id)
+    instance.loaded_score = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключение оценки удаленного отзыва, в том числе при каскаде."""
+    update_title_rating(instance.title_id, removed=(instance.score,))
+    update_title_entries(instance.title_id)
+
+
+@receiver(post_save, sender=Title)
+def update_leaderboards_on_title_save(sender, instance, created, raw,
+                                      **kwargs):
+    """Перенос записей рейтинга при смене категории произведения."""
+    if not raw and not created:
+        rebuild_title_entries(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_leaderboards_on_genres(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """Перенос записей рейтинга при смене жанров произведения."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        rebuild_title_entries(instance.pk)
+        return
+    for title_id in pk_set or ():
+        rebuild_title_entries(title_id)
+
+
+def restore_search_index(sender, using, **kwargs):
+    """Восстановление триггеров поиска после пересоздания таблицы SQLite."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        install_search_index(connection)
+
+
+def add_search_functions(sender, connection, **kwargs):
+    """Функции сходства pg_trgm в каждом новом соединении SQLite."""
+    if connection.vendor == 'sqlite':
+        install_search_functions(connection)
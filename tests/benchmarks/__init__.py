@@ -0,0 +1,35 @@
+"""Бенчмарки производительности API.
+
+Модули запускаются отдельно от pytest, например:
+python -m tests.benchmarks.title_search
+Данные создаются в тестовой БД, рабочая база не затрагивается.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from os.path import abspath, dirname, join
+
+root_dir = dirname(dirname(dirname(abspath(__file__))))
+
+
+def setup_django():
+    for path in (root_dir, join(root_dir, 'api_yamdb')):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Тестовая БД на время бенчмарка."""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb
+        )
@@ -0,0 +1,216 @@
+"""Один процесс gunicorn под высокой конкурентностью: sync и gthread.
+
+Запуск на SQLite или на локальном PostgreSQL (настройки из окружения):
+python -m tests.benchmarks.concurrency --clients 100 --slow 0.3
+
+Для каждого типа воркера запускается gunicorn с одним процессом
+и настройками из gunicorn.conf.py. Клиенты в отдельных потоках
+запрашивают список произведений, отзывы и комментарии самого популярного
+произведения. С --slow клиент отправляет запрос по строкам с паузами,
+как медленное мобильное соединение. Выводятся пропускная способность,
+p50 и p99 времени ответа и число ошибок.
+"""
+import argparse
+import os
+import random
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from itertools import cycle
+from os.path import join
+
+from tests.benchmarks import root_dir, setup_django, test_database
+from tests.benchmarks.endpoints import percentile
+
+CLIENTS = 100
+REQUESTS = 5
+SLOW = 0.3
+THREADS = 8
+PORT = 8765
+TIMEOUT = 60
+# Тип воркера и число потоков процесса.
+WORKERS = (('sync', 1), ('gthread', THREADS))
+
+
+def fetch(port, path, slow=0):
+    """Время ответа на GET path или None, если ответ не 200.
+
+    Медленный клиент отправляет строки запроса по одной со случайными
+    паузами до slow секунд, поэтому паузы клиентов не совпадают.
+    """
+    lines = [
+        f'GET {path} HTTP/1.1\r\n',
+        'Host: localhost\r\n',
+        'Connection: close\r\n',
+        '\r\n',
+    ]
+    started = time.perf_counter()
+    with socket.create_connection(('127.0.0.1', port), TIMEOUT) as sock:
+        for line in lines:
+            if slow:
+                time.sleep(random.uniform(0, slow))
+            sock.sendall(line.encode())
+        response = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    if not response.startswith(b'HTTP/1.1 200'):
+        return None
+    return time.perf_counter() - started
+
+
+def wait_for_port(port, process):
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited')
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start')
+
+
+def database_env(settings_dict):
+    return {
+        'DB_ENGINE': settings_dict['ENGINE'],
+        'DB_NAME': settings_dict['NAME'],
+        'POSTGRES_USER': settings_dict['USER'] or '',
+        'POSTGRES_PASSWORD': settings_dict['PASSWORD'] or '',
+        'DB_HOST': settings_dict['HOST'] or '',
+        'DB_PORT': str(settings_dict['PORT'] or ''),
+    }
+
+
+def run(worker_class, threads, paths, settings_dict, options):
+    process = subprocess.Popen(
+        [
+            shutil.which('gunicorn'), 'api_yamdb.wsgi:application',
+            '--config', 'gunicorn.conf.py',
+            '--bind', f'127.0.0.1:{options.port}',
+            '--workers', '1',
+            '--worker-class', worker_class,
+            '--threads', str(threads),
+            '--backlog', str(options.clients * 2),
+        ],
+        cwd=join(root_dir, 'api_yamdb'),
+        env={**os.environ, **database_env(settings_dict)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    timings = []
+    errors = 0
+    lock = threading.Lock()
+
+    def client(offset):
+        nonlocal errors
+        local_timings = []
+        local_errors = 0
+        urls = cycle(paths[offset % len(paths):] + paths[:offset % len(paths)])
+        for _ in range(options.requests):
+            try:
+                elapsed = fetch(options.port, next(urls), options.slow)
+            except OSError:
+                elapsed = None
+            if elapsed is None:
+                local_errors += 1
+            else:
+                local_timings.append(elapsed)
+        with lock:
+            timings.extend(local_timings)
+            errors += local_errors
+
+    try:
+        wait_for_port(options.port, process)
+        # Первые запросы загружают код и прогревают соединение с БД.
+        for path in paths:
+            fetch(options.port, path)
+        clients = [
+            threading.Thread(target=client, args=(offset,))
+            for offset in range(options.clients)
+        ]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(TIMEOUT)
+    return {
+        'requests': len(timings),
+        'throughput': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'errors': errors,
+    }
+
+
+def read_paths():
+    from tests.benchmarks.endpoints import build_context
+
+    context = build_context()
+    reviews = f'/api/v1/titles/{context["title"].pk}/reviews/'
+    return [
+        '/api/v1/titles/',
+        f'/api/v1/titles/{context["title"].pk}/',
+        reviews,
+        f'{reviews}{context["review"].pk}/comments/',
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--scale', default='tiny')
+    parser.add_argument('--clients', type=int, default=CLIENTS)
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=REQUESTS,
+        help='Запросов от каждого клиента.'
+    )
+    parser.add_argument(
+        '--slow',
+        type=float,
+        default=SLOW,
+        help='Наибольшая пауза в секундах между строками запроса.'
+    )
+    parser.add_argument('--port', type=int, default=PORT)
+    options = parser.parse_args()
+    setup_django()
+    from django.db import connection
+
+    from reviews.models import Title
+    from tests.benchmarks.datagen import SCALES, generate
+
+    if connection.vendor == 'sqlite':
+        # gunicorn читает ту же тестовую БД, поэтому она должна быть файлом.
+        connection.settings_dict['TEST']['NAME'] = join(
+            tempfile.gettempdir(), 'yamdb-concurrency.sqlite3'
+        )
+    with test_database() as connection:
+        generate(SCALES[options.scale])
+        paths = read_paths()
+        settings_dict = dict(connection.settings_dict)
+        print(f'{Title.objects.count()} titles, {options.clients} clients, '
+              f'slow {options.slow} s')
+        print(f'{"worker":<16} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} '
+              f'{"errors":>7}')
+        for worker_class, threads in WORKERS:
+            result = run(worker_class, threads, paths, settings_dict, options)
+            print(f'{f"{worker_class} x{threads}":<16} '
+                  f'{result["throughput"]:>8} {result["p50_ms"]:>8} '
+                  f'{result["p99_ms"]:>8} {result["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Генератор синтетических данных с перекосом популярности.
+
+Популярность произведений и отзывов распределена по закону Ципфа:
+несколько произведений собирают большую часть отзывов, остальные
+образуют длинный хвост. Данные создаются потоково, пачками, с явными id,
+поэтому объем памяти не зависит от размера набора.
+"""
+import random
+from itertools import count
+
+SCALES = {
+    'tiny': {'users': 60, 'titles': 30, 'reviews': 300, 'comments': 600},
+    'small': {
+        'users': 2000, 'titles': 1000, 'reviews': 20000, 'comments': 40000,
+    },
+    'medium': {
+        'users': 100000,
+        'titles': 10000,
+        'reviews': 1000000,
+        'comments': 2000000,
+    },
+    'large': {
+        'users': 1000000,
+        'titles': 100000,
+        'reviews': 10000000,
+        'comments': 20000000,
+    },
+}
+CATEGORIES = 10
+GENRES = 30
+ZIPF_EXPONENT = 1.0
+# Оценки смещены к высоким, как в реальных каталогах.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 15, 12, 8)
+WORDS = (
+    'Война', 'Мир', 'Остров', 'Ночь', 'Город', 'Дорога', 'Тень', 'Море',
+    'Сердце', 'Звезда', 'Время', 'Песня', 'Дом', 'Сад', 'Зима', 'Огонь',
+)
+BATCH_SIZE = 1000
+
+
+def zipf_counts(total, size, rng, exponent=ZIPF_EXPONENT):
+    """Количество объектов для каждого ранга, в сумме около total."""
+    weights_sum = sum(1 / rank ** exponent for rank in range(1, size + 1))
+    for rank in range(1, size + 1):
+        expected = total / weights_sum / rank ** exponent
+        whole = int(expected)
+        yield whole + (rng.random() < expected - whole)
+
+
+def user_rows(users):
+    for pk in range(1, users + 1):
+        yield {
+            'id': pk,
+            'username': f'user{pk}',
+            'email': f'user{pk}@yamdb.fake',
+        }
+
+
+def slug_rows(prefix, size):
+    for pk in range(1, size + 1):
+        yield {
+            'id': pk,
+            'name': f'{prefix.capitalize()} {pk}',
+            'slug': f'{prefix}-{pk}',
+        }
+
+
+def title_rows(title_ids, rng):
+    for pk in title_ids:
+        yield {
+            'id': pk,
+            'name': ' '.join(rng.sample(WORDS, rng.randint(1, 3))),
+            'year': rng.randint(1900, 2022),
+            'category_id': rng.randint(1, CATEGORIES),
+            'description': '',
+        }
+
+
+def genre_title_rows(title_ids, rng):
+    genres = range(1, GENRES + 1)
+    weights = [1 / rank ** ZIPF_EXPONENT for rank in genres]
+    for pk in title_ids:
+        for genre_id in set(rng.choices(genres, weights, k=rng.randint(1, 3))):
+            yield {'title_id': pk, 'genre_id': genre_id}
+
+
+def review_rows(title_ids, sizes, rng):
+    """Отзывы по убыванию популярности произведений, авторы не повторяются."""
+    review_id = count(1)
+    scores = range(1, len(SCORE_WEIGHTS) + 1)
+    for title_id, reviews in zip(
+        title_ids, zipf_counts(sizes['reviews'], sizes['titles'], rng)
+    ):
+        reviews = min(reviews, sizes['users'])
+        for author_id in rng.sample(range(1, sizes['users'] + 1), reviews):
+            yield {
+                'id': next(review_id),
+                'title_id': title_id,
+                'author_id': author_id,
+                'text': 'Отзыв',
+                'score': rng.choices(scores, SCORE_WEIGHTS)[0],
+            }
+
+
+def comment_rows(reviews, sizes, rng):
+    """Комментарии: больше всего у первых отзывов популярных произведений."""
+    comment_id = count(1)
+    for review_id, comments in enumerate(
+        zipf_counts(sizes['comments'], reviews, rng), start=1
+    ):
+        for _ in range(comments):
+            yield {
+                'id': next(comment_id),
+                'review_id': review_id,
+                'author_id': rng.randint(1, sizes['users']),
+                'text': 'Комментарий',
+            }
+
+
+def generate(sizes, seed=1, batch_size=BATCH_SIZE, use_copy=False):
+    """Наполнение БД; возвращает количество созданных строк по моделям."""
+    from django.db import transaction
+
+    from reviews.management.commands.data_transfer import (
+        bulk_load,
+        copy_load,
+        reset_sequences
+    )
+    from reviews.models import (
+        Category,
+        Comment,
+        Genre,
+        GenreTitle,
+        Review,
+        Title,
+        User
+    )
+    from reviews.leaderboards import rebuild_leaderboards
+    from reviews.ratings import recount_ratings
+
+    rng = random.Random(seed)
+    load = copy_load if use_copy else bulk_load
+    # Ранг популярности не совпадает с порядком id произведений.
+    title_ids = list(range(1, sizes['titles'] + 1))
+    rng.shuffle(title_ids)
+    created = {}
+    with transaction.atomic():
+        for model, rows in (
+            (User, user_rows(sizes['users'])),
+            (Category, slug_rows('category', CATEGORIES)),
+            (Genre, slug_rows('genre', GENRES)),
+            (Title, title_rows(title_ids, rng)),
+            (GenreTitle, genre_title_rows(title_ids, rng)),
+            (Review, review_rows(title_ids, sizes, rng)),
+        ):
+            created[model.__name__] = load(model, rows, batch_size)
+        created['Comment'] = load(
+            Comment, comment_rows(created['Review'], sizes, rng), batch_size
+        )
+    reset_sequences([User, Category, Genre, Title, GenreTitle, Review, Comment])
+    recount_ratings()
+    rebuild_leaderboards(batch_size)
+    return created
@@ -0,0 +1,115 @@
+"""Нагрузка на подключение к PostgreSQL: без пула и через db_pool.
+
+Запуск только на PostgreSQL (настройки DB_* из окружения):
+python -m tests.benchmarks.db_pool --threads 50 --requests 200
+
+Каждый поток имитирует запросы к API: открывает соединение Django,
+выполняет SELECT 1 и закрывает его, как в конце запроса при
+CONN_MAX_AGE = 0. Выводятся p50 и p99 времени «запроса» и число
+открытых соединений к БД.
+"""
+import argparse
+import threading
+import time
+
+from tests.benchmarks import setup_django
+from tests.benchmarks.endpoints import percentile
+
+THREADS = 50
+REQUESTS = 200
+ENGINES = ('django.db.backends.postgresql', 'db_pool')
+
+
+def run(engine, threads, requests, pool_size):
+    from django.conf import settings
+    from django.db.utils import load_backend
+
+    from db_pool import pool as db_pool
+
+    settings_dict = dict(settings.DATABASES['default'], ENGINE=engine)
+    settings_dict['POOL'] = dict(settings_dict['POOL'], SIZE=pool_size)
+    wrapper = load_backend(engine).DatabaseWrapper
+    timings = []
+    connects = 0
+    lock = threading.Lock()
+
+    if engine == 'django.db.backends.postgresql':
+        # Без пула каждое подключение открывает новое соединение.
+        original = wrapper.get_new_connection
+
+        def counted(self, conn_params):
+            nonlocal connects
+            with lock:
+                connects += 1
+            return original(self, conn_params)
+
+        wrapper = type('CountedWrapper', (wrapper,), {
+            'get_new_connection': counted
+        })
+
+    def worker():
+        local_timings = []
+        connection = wrapper(settings_dict, alias=f'bench-{engine}')
+        for _ in range(requests):
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.close()
+            local_timings.append(time.perf_counter() - started)
+        with lock:
+            timings.extend(local_timings)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    for _, stats in db_pool.pool_stats():
+        connects += stats['events'].get('connect', 0)
+    for pool in db_pool.pools.values():
+        pool.close_all()
+    db_pool.pools.clear()
+    return {
+        'requests': len(timings),
+        'throughput': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'connects': connects,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--threads', type=int, default=THREADS)
+    parser.add_argument('--requests', type=int, default=REQUESTS)
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        help='Размер пула, по умолчанию — число потоков.'
+    )
+    options = parser.parse_args()
+    setup_django()
+    from django.db import connection
+
+    if connection.vendor != 'postgresql':
+        parser.error('PostgreSQL only, set DB_* variables')
+    print(f'{"engine":<32} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} '
+          f'{"connects":>8}')
+    for engine in ENGINES:
+        result = run(
+            engine,
+            options.threads,
+            options.requests,
+            options.pool_size or options.threads
+        )
+        print(f'{engine:<32} {result["throughput"]:>8} '
+              f'{result["p50_ms"]:>8} {result["p99_ms"]:>8} '
+              f'{result["connects"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
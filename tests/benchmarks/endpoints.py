@@ -0,0 +1,383 @@
+"""Сценарии нагрузки на маршруты api/urls.py с базовой линией.
+
+Запуск на SQLite или на локальном PostgreSQL (настройки из окружения):
+python -m tests.benchmarks.endpoints --scale small
+python -m tests.benchmarks.endpoints --scale small --update-baseline
+
+Для каждого сценария записываются пропускная способность, p50 и p99
+времени ответа и число SQL-запросов. Рост p50 больше чем на --threshold
+или рост числа запросов относительно baseline.json считается регрессией,
+команда завершается с кодом 1.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from itertools import combinations
+from os.path import dirname, join
+
+from tests.benchmarks import setup_django, test_database
+
+BASELINE_PATH = join(dirname(__file__), 'baseline.json')
+# Разброс p50 между прогонами на общей машине доходит до 30%.
+THRESHOLD = 0.5
+MIN_DELTA_MS = 1
+REQUESTS = 20
+BULK_SIZE = 100
+ADMIN_USERNAME = 'bench_admin'
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+class Recorder:
+    """Замер времени и SQL-запросов отдельных обращений к API."""
+
+    def __init__(self, warm_cache=False):
+        self.warm_cache = warm_cache
+        self.samples = defaultdict(list)
+
+    def __call__(self, name, request, status=200):
+        from django.core.cache import cache
+        from django.db import connections
+
+        from api.metrics import QueryTracker
+
+        if not self.warm_cache:
+            cache.clear()
+        tracker = QueryTracker()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracker))
+            started = time.perf_counter()
+            response = request()
+            elapsed = time.perf_counter() - started
+        if response.status_code != status:
+            raise BenchmarkError(
+                f'{name}: status {response.status_code}, expected {status}'
+            )
+        self.samples[name].append((elapsed, tracker.count))
+        return response
+
+    def results(self):
+        results = {}
+        for name, samples in sorted(self.samples.items()):
+            timings = [elapsed for elapsed, _ in samples]
+            results[name] = {
+                'requests': len(samples),
+                'throughput': round(len(samples) / sum(timings), 1),
+                'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+                'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+                'queries': max(queries for _, queries in samples),
+            }
+        return results
+
+
+def bearer(user):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+
+def build_context():
+    """Объекты для сценариев: самое популярное произведение и его отзывы."""
+    from django.conf import settings
+    from django.db.models import Count
+
+    from reviews.models import ADMIN, Category, Genre, Review, Title, User
+
+    admin, _ = User.objects.get_or_create(
+        username=ADMIN_USERNAME,
+        defaults={'email': f'{ADMIN_USERNAME}@yamdb.fake', 'role': ADMIN}
+    )
+    title = Title.objects.order_by('-score_count', 'pk').first()
+    review = Review.objects.filter(title=title).annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count', 'pk').first()
+    if review is None:
+        raise BenchmarkError('No reviews, generate data first')
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    genres = list(Genre.objects.annotate(
+        titles_count=Count('title')
+    ).order_by('-titles_count', 'pk').values_list('slug', flat=True)[:2])
+    return {
+        'admin': admin,
+        'headers': bearer(admin),
+        'title': title,
+        'review': review,
+        'comment': review.comments.order_by('pk').first(),
+        'last_page': max(math.ceil(title.score_count / page_size), 1),
+        # Два самых частых жанра для фильтра по нескольким жанрам.
+        'genres': genres,
+        'filters': {
+            'genre': genres[0],
+            'category': Category.objects.annotate(
+                titles_count=Count('titles')
+            ).order_by('-titles_count', 'pk').first().slug,
+            'name': title.name.split()[0].lower(),
+            'search': title.name.split()[0][:-1].lower(),
+            'year': title.year,
+        },
+    }
+
+
+def read_scenarios(client, context):
+    """GET-сценарии: имя и функция запроса."""
+    from api.filters import TitleFilter
+
+    headers = context['headers']
+    title_id = context['title'].pk
+    review_id = context['review'].pk
+    reviews = f'/api/v1/titles/{title_id}/reviews/'
+    comments = f'{reviews}{review_id}/comments/'
+    urls = {
+        'api-root': '/api/v1/',
+        'categories-list': '/api/v1/categories/',
+        'genres-list': '/api/v1/genres/',
+        'titles-detail': f'/api/v1/titles/{title_id}/',
+        'titles-scores': f'/api/v1/titles/{title_id}/scores/',
+        'reviews-list': reviews,
+        'reviews-list[deep]': f'{reviews}?page={context["last_page"]}',
+        'reviews-list[cursor]': f'{reviews}?pagination=cursor',
+        'reviews-detail': f'{reviews}{review_id}/',
+        'comments-list': comments,
+        'comments-detail': f'{comments}{context["comment"].pk}/',
+        'users-list': '/api/v1/users/',
+        'users-detail': f'/api/v1/users/{context["admin"].username}/',
+        'users-get-patch-user': '/api/v1/users/me/',
+        'metrics': '/api/v1/metrics/',
+        'leaderboards-list': '/api/v1/leaderboards/',
+        'leaderboards-list[category]': (
+            f'/api/v1/leaderboards/?category={context["filters"]["category"]}'
+        ),
+        'leaderboards-list[genre]': (
+            f'/api/v1/leaderboards/?genre={context["filters"]["genre"]}'
+            '&limit=100'
+        ),
+    }
+    for name, url in urls.items():
+        yield name, lambda url=url: client.get(url, **headers)
+    filters = [
+        name for name in TitleFilter.base_filters
+        if name in context['filters']
+    ]
+    title_filters = {
+        f'titles-list[{"+".join(names) or "all"}]': {
+            name: context['filters'][name] for name in names
+        }
+        for size in range(len(filters) + 1)
+        for names in combinations(filters, size)
+    }
+    year = context['filters']['year']
+    genres = ','.join(context['genres'])
+    title_filters.update({
+        'titles-list[genres-any]': {'genre': genres},
+        'titles-list[genres-all]': {'genre': genres, 'genre_match': 'all'},
+        'titles-list[year-range]': {'year_min': year - 10, 'year_max': year},
+        'titles-list[rating-min]': {'rating_min': 8},
+        'titles-list[genres-all+year-range+rating-min]': {
+            'genre': genres,
+            'genre_match': 'all',
+            'year_min': year - 10,
+            'year_max': year,
+            'rating_min': 8,
+        },
+    })
+    for name, params in title_filters.items():
+        yield name, lambda params=params: client.get(
+            '/api/v1/titles/', params, **headers
+        )
+
+
+def run_bulk_scenarios(client, record, context, requests, run_id):
+    """Массовая запись каталога: создание и upsert пачками по BULK_SIZE."""
+    headers = context['headers']
+    filters = context['filters']
+
+    def post(url, items):
+        return client.post(
+            url, items, content_type='application/json', **headers
+        )
+
+    for index in range(requests):
+        prefix = f'bulk{run_id}x{index}'
+        for resource in ('categories', 'genres'):
+            record(f'{resource}-bulk', lambda resource=resource: post(
+                f'/api/v1/{resource}/bulk/',
+                [{'name': f'{prefix} {number}', 'slug': f'{prefix}-{number}'}
+                 for number in range(BULK_SIZE)]
+            ), status=201)
+        titles = [
+            {
+                'name': f'{prefix} {number}',
+                'year': 2000,
+                'genre': [filters['genre']],
+                'category': filters['category'],
+            }
+            for number in range(BULK_SIZE)
+        ]
+        created = record('titles-bulk', lambda: post(
+            '/api/v1/titles/bulk/', titles
+        ), status=201).json()
+        record('titles-bulk[upsert]', lambda: post(
+            '/api/v1/titles/bulk/?upsert=true',
+            [dict(title, year=2001) for title in created]
+        ), status=201)
+
+
+def run_write_scenarios(client, record, context, requests, run_id):
+    """Регистрация с получением токена и создание отзывов."""
+    from reviews.models import User
+
+    run_bulk_scenarios(client, record, context, requests, run_id)
+    title_id = context['title'].pk
+    for index in range(requests):
+        username = f'bench{run_id}x{index}'
+        # Регистрации приходят с разных адресов, как от разных людей.
+        address = f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}'
+        record('signup', lambda: client.post('/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake'
+        }, REMOTE_ADDR=address))
+        code = User.objects.values_list(
+            'confirmation_code', flat=True
+        ).get(username=username)
+        record('token', lambda: client.post('/api/v1/auth/token/', {
+            'username': username, 'confirmation_code': code
+        }, REMOTE_ADDR=address))
+        headers = bearer(User.objects.get(username=username))
+        record('reviews-create', lambda: client.post(
+            f'/api/v1/titles/{title_id}/reviews/',
+            {'text': 'Отзыв', 'score': 7},
+            content_type='application/json',
+            **headers
+        ), status=201)
+
+
+def run(requests=REQUESTS, warm_cache=False):
+    """Прогон всех сценариев по данным в текущей БД."""
+    from django.test import Client
+
+    client = Client()
+    record = Recorder(warm_cache)
+    context = build_context()
+    for name, request in read_scenarios(client, context):
+        # Первый запрос прогревает соединение и кэши интерпретатора.
+        request()
+        for _ in range(requests):
+            record(name, request)
+    run_write_scenarios(
+        client, record, context, requests, int(time.time() * 1000)
+    )
+    return record.results()
+
+
+def compare(results, baseline, threshold):
+    """Регрессии относительно базовой линии."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['p50_ms'] > max(
+            base['p50_ms'] * (1 + threshold), base['p50_ms'] + MIN_DELTA_MS
+        ):
+            regressions.append(
+                f'{name}: p50 {result["p50_ms"]} ms > {base["p50_ms"]} ms'
+            )
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: queries {result["queries"]} > {base["queries"]}'
+            )
+    return regressions
+
+
+def print_results(results):
+    print(f'{"scenario":<44} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} '
+          f'{"queries":>7}')
+    for name, result in results.items():
+        print(f'{name:<44} {result["throughput"]:>8} {result["p50_ms"]:>8} '
+              f'{result["p99_ms"]:>8} {result["queries"]:>7}')
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--scale', default='small')
+    parser.add_argument('--requests', type=int, default=REQUESTS)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument(
+        '--warm-cache',
+        action='store_true',
+        help='Не очищать кэш ответов перед каждым запросом.'
+    )
+    parser.add_argument(
+        '--keepdb',
+        action='store_true',
+        help='Сохранить тестовую БД с данными для следующих запусков.'
+    )
+    parser.add_argument(
+        '--copy',
+        action='store_true',
+        help='Загружать данные через COPY (только PostgreSQL).'
+    )
+    for name in ('users', 'titles', 'reviews', 'comments'):
+        parser.add_argument(f'--{name}', type=int)
+    options = parser.parse_args()
+    setup_django()
+    from django.test.utils import setup_test_environment
+
+    from reviews.models import Title
+    from tests.benchmarks.datagen import SCALES, generate
+
+    setup_test_environment()
+    sizes = dict(SCALES[options.scale])
+    sizes.update(
+        (name, getattr(options, name)) for name in sizes
+        if getattr(options, name) is not None
+    )
+    with test_database(keepdb=options.keepdb) as connection:
+        if not Title.objects.exists():
+            started = time.monotonic()
+            created = generate(sizes, options.seed, use_copy=options.copy)
+            print(f'generated {created} in {time.monotonic() - started:.0f} s')
+        results = run(options.requests, options.warm_cache)
+        vendor = connection.vendor
+    print_results(results)
+    baselines = load_baseline(options.baseline)
+    key = f'{vendor}:{options.scale}'
+    if options.update_baseline:
+        baselines[key] = results
+        with open(options.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+        print(f'baseline {key} saved to {options.baseline}')
+        return
+    regressions = compare(results, baselines.get(key, {}), options.threshold)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
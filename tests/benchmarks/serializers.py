@@ -0,0 +1,88 @@
+"""Стоимость сериализации одного объекта: ModelSerializer и .values().
+
+Запуск: python -m tests.benchmarks.serializers --objects 2000
+
+Объекты загружаются заранее, замеряется только to_representation,
+без запросов к БД.
+"""
+import argparse
+import statistics
+import time
+
+from tests.benchmarks import setup_django, test_database
+
+
+def measure(serializer, objects, repeat):
+    """Медиана времени на объект в микросекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for obj in objects:
+            serializer.to_representation(obj)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) / len(objects) * 1e6
+
+
+def cases(limit):
+    from api.serializers import (
+        CommentSerializer,
+        ReviewSerializer,
+        TitleSerializer
+    )
+    from api.values_serializers import (
+        CommentValuesSerializer,
+        ReviewValuesSerializer,
+        TitleValuesSerializer,
+        attach_genres
+    )
+    from reviews.models import Comment, Review, Title
+
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('pk')[:limit]
+    title_rows = list(TitleValuesSerializer.values(titles))
+    attach_genres(title_rows)
+    reviews = Review.objects.select_related('author').order_by('pk')[:limit]
+    comments = Comment.objects.select_related('author').order_by(
+        'pk'
+    )[:limit]
+    return (
+        ('titles', TitleSerializer(), list(titles),
+         TitleValuesSerializer(), title_rows),
+        ('reviews', ReviewSerializer(), list(reviews),
+         ReviewValuesSerializer(),
+         list(ReviewValuesSerializer.values(reviews))),
+        ('comments', CommentSerializer(), list(comments),
+         CommentValuesSerializer(),
+         list(CommentValuesSerializer.values(comments))),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--objects', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+    setup_django()
+    from tests.benchmarks.datagen import generate
+
+    sizes = {
+        'users': options.objects,
+        'titles': options.objects,
+        'reviews': options.objects * 2,
+        'comments': options.objects * 2,
+    }
+    with test_database():
+        generate(sizes, options.seed)
+        print(f'{"resource":<10} {"model us":>9} {"values us":>10} '
+              f'{"speedup":>8}')
+        for name, model, objects, values, rows in cases(options.objects):
+            model_cost = measure(model, objects, options.repeat)
+            values_cost = measure(values, rows, options.repeat)
+            print(f'{name:<10} {model_cost:>9.2f} {values_cost:>10.2f} '
+                  f'{model_cost / values_cost:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Стоимость проверки частоты запроса регистрации в микросекундах.
+
+Запуск: python -m tests.benchmarks.throttling --checks 20000
+
+Замеряются все ограничения регистрации (адрес, имя, емейл) на одном
+запросе: со счетчиками в кэше из настроек, в памяти процесса и, для
+сравнения, AnonRateThrottle из DRF с журналом запросов. Частоты заданы
+так, чтобы запросы не отклонялись.
+"""
+import argparse
+import statistics
+import time
+
+from tests.benchmarks import setup_django
+
+RATE = '1000000/hour'
+CHECKS = 20000
+REPEAT = 5
+
+
+def measure(throttles, requests, repeat):
+    """Медиана времени проверки одного запроса в микросекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for request in requests:
+            for throttle in throttles:
+                throttle.allow_request(request, None)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) / len(requests) * 1e6
+
+
+def signup_requests(checks):
+    """Запросы с разных адресов и с разными именами, как при переборе."""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    factory = APIRequestFactory()
+    requests = []
+    for number in range(checks):
+        request = Request(factory.post(
+            '/api/v1/auth/signup/',
+            {'username': f'user{number}', 'email': f'user{number}@yamdb.fake'},
+            format='json',
+            REMOTE_ADDR=f'10.0.{number // 256 % 256}.{number % 256}'
+        ), parsers=[JSONParser()])
+        # Тело разбирается заранее: замеряется только проверка частоты.
+        request.data
+        requests.append(request)
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--checks', type=int, default=CHECKS)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    options = parser.parse_args()
+    setup_django()
+    from django.core.cache import cache, caches
+    from rest_framework.throttling import AnonRateThrottle
+
+    from api import throttling
+
+    rates = {
+        scope: RATE for scope in ('signup_ip', 'signup_username', 'signup_email')
+    }
+    throttling.SlidingWindowThrottle.THROTTLE_RATES = rates
+    AnonRateThrottle.THROTTLE_RATES = {'anon': RATE}
+    requests = signup_requests(options.checks)
+    signup_throttles = [
+        throttling.SignUpIPThrottle(),
+        throttling.SignUpUsernameThrottle(),
+        throttling.SignUpEmailThrottle(),
+    ]
+
+    class BrokenCache:
+
+        def __getattr__(self, name):
+            raise ConnectionError('cache is down')
+
+    print(f'{"case":<40} {"us/request":>10}')
+    cache.clear()
+    backend = caches['default'].__class__.__name__
+    print(f'{"sliding window, " + backend:<40} '
+          f'{measure(signup_throttles, requests, options.repeat):>10.1f}')
+    throttling.cache = BrokenCache()
+    print(f'{"sliding window, in-process fallback":<40} '
+          f'{measure(signup_throttles, requests, options.repeat):>10.1f}')
+    throttling.cache = cache
+    cache.clear()
+    print(f'{"DRF AnonRateThrottle (ip only)":<40} '
+          f'{measure([AnonRateThrottle()], requests, options.repeat):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Сравнение поиска произведений с прежним фильтром icontains.
+
+Запуск: python -m tests.benchmarks.title_search --titles 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from tests.benchmarks import setup_django, test_database
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'ст', 'ле', 'на', 'шо', 'ув', 'ер', 'то', 'па', 'ди',
+    'ос', 'кр', 'ел', 'ан', 'ти', 'ве', 'за', 'бу', 'ль', 'мо', 'же', 'ры',
+)
+PAGE_SIZE = 5
+
+
+def make_word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_typo(rng, value):
+    index = rng.randrange(1, len(value) - 1)
+    return value[:index] + rng.choice('аеиоу') + value[index + 1:]
+
+
+def generate_titles(count, rng):
+    from reviews.models import Title
+    vocabulary = [make_word(rng).capitalize() for _ in range(count // 10 + 1)]
+    Title.objects.bulk_create(
+        (
+            Title(
+                name=' '.join(
+                    rng.choice(vocabulary) for _ in range(rng.randint(1, 4))
+                ),
+                year=rng.randint(1900, 2020)
+            )
+            for _ in range(count)
+        )
+    )
+    return vocabulary
+
+
+def measure(queryset, repeat):
+    """Время выдачи первой страницы и количества, как в API."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset[:PAGE_SIZE])
+        count = queryset.count()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+    setup_django()
+    from reviews.models import Title
+    from reviews.search import search_titles
+
+    rng = random.Random(options.seed)
+    with test_database() as connection:
+        vocabulary = generate_titles(options.titles, rng)
+        print(f'{connection.vendor}, titles: {options.titles}')
+        print(f'{"query":<20} {"icontains ms":>13} {"found":>7} '
+              f'{"search ms":>10} {"found":>7}')
+        for word in rng.sample(vocabulary, options.queries):
+            for query in (word.lower(), make_typo(rng, word.lower())):
+                titles = Title.objects.all()
+                icontains = measure(
+                    titles.filter(name__icontains=query), options.repeat
+                )
+                search = measure(search_titles(titles, query), options.repeat)
+                print(f'{query:<20} {icontains[0]:>13.2f} {icontains[1]:>7} '
+                      f'{search[0]:>10.2f} {search[1]:>7}')
+
+
+if __name__ == '__main__':
+    main()
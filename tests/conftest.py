@@ -1,9 +1,58 @@
+import os
 import sys
+import tempfile
+from threading import local
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
+REPLICA_DB_ALIAS = 'replica'
+
 pytest_plugins = [
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    from django.conf import settings
+    from django.db import DEFAULT_DB_ALIAS, connections
+    # Без адреса PostgreSQL тесты с БД запускаются на SQLite во временном
+    # файле: в отличие от БД в памяти, параллельные записи ждут блокировку.
+    if not os.getenv('DB_HOST'):
+        settings.DATABASES = {
+            DEFAULT_DB_ALIAS: {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+                'OPTIONS': {'timeout': 20},
+                'TEST': {
+                    'NAME': join(
+                        tempfile.gettempdir(),
+                        f'yamdb-test-{os.getpid()}.sqlite3'
+                    ),
+                },
+            }
+        }
+        replica_name = join(
+            tempfile.gettempdir(), f'yamdb-test-replica-{os.getpid()}.sqlite3'
+        )
+    else:
+        replica_name = f'test_{settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"]}'
+        replica_name += '_replica'
+    # Отдельная БД в роли реплики для tests/test_replicas.py. Роутер
+    # читает с нее, только если тест добавит ее в REPLICA_DATABASES.
+    settings.DATABASES[REPLICA_DB_ALIAS] = {
+        **settings.DATABASES[DEFAULT_DB_ALIAS],
+        # Отличное от основной имя: иначе Django сочтет реплику той же БД.
+        'NAME': replica_name,
+        'TEST': {'NAME': replica_name},
+    }
+    settings.REPLICA_DATABASES = []
+    # Соединение с БД из настроек создается еще при загрузке моделей.
+    connections.__dict__.pop('databases', None)
+    connections._databases = None
+    connections._connections = local()
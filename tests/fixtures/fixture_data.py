@@ -0,0 +1,54 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create(
+        username='TestUser',
+        email='testuser@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='TestAdmin',
+        email='testadmin@yamdb.fake',
+        role='admin'
+    )
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    return get_client(user)
+
+
+@pytest.fixture
+def admin_client(admin):
+    return get_client(admin)
+
+
+@pytest.fixture
+def title():
+    from reviews.models import Category, Genre, Title
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Title', year=2000, category=category)
+    title.genre.add(genre)
+    return title
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
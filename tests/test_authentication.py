@@ -0,0 +1,78 @@
+from threading import Thread
+
+import pytest
+from django.db import connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+from tests.fixtures.fixture_data import get_client
+
+ME_URL = '/api/v1/users/me/'
+
+
+def user_queries(context):
+    return [
+        query for query in context.captured_queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCachedAuthentication:
+
+    def test_user_cached_between_requests(self, user_client, user):
+        assert user_client.get(ME_URL).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(ME_URL)
+        assert response.json()['username'] == user.username
+        assert not user_queries(context), (
+            'Проверьте, что пользователь берется из кэша, а не из БД'
+        )
+
+    def test_role_change_invalidates(self, admin_client, user_client, user):
+        users_url = '/api/v1/users/'
+        assert user_client.get(users_url).status_code == 403
+        response = admin_client.patch(
+            f'{users_url}{user.username}/', {'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert user_client.get(users_url).status_code == 200, (
+            'Проверьте, что смена роли сбрасывает пользователя в кэше'
+        )
+
+    def test_profile_update_keeps_other_fields(self, user_client, user):
+        user_client.get(ME_URL)
+        response = user_client.patch(ME_URL, {'bio': 'Био'})
+        assert response.json()['bio'] == 'Био'
+        user.refresh_from_db()
+        assert user.bio == 'Био' and user.confirmation_code is None
+        assert user_client.get(ME_URL).json()['bio'] == 'Био'
+
+    def test_inactive_user_rejected(self, user):
+        client = get_client(user)
+        client.get(ME_URL)
+        user.is_active = False
+        user.save()
+        assert client.get(ME_URL).status_code == 401
+
+    def test_deactivation_in_transaction(self, user):
+        client = get_client(user)
+        statuses = []
+
+        def read():
+            # Параллельный запрос кэширует пользователя до фиксации.
+            try:
+                statuses.append(client.get(ME_URL).status_code)
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            user.is_active = False
+            user.save()
+            reader = Thread(target=read)
+            reader.start()
+            reader.join()
+        assert statuses == [200]
+        assert client.get(ME_URL).status_code == 401, (
+            'Проверьте, что версия пользователя меняется после фиксации '
+            'транзакции'
+        )
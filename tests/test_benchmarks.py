@@ -0,0 +1,53 @@
+import pytest
+
+from api.urls import auth_patterns, router_v1
+from reviews.models import Comment, Review, Title
+from tests.benchmarks.datagen import SCALES, generate
+from tests.benchmarks.endpoints import compare, run
+
+
+# Маршруты категорий и жанров по slug принимают только DELETE.
+SKIPPED_ROUTES = {'categories-detail', 'genres-detail'}
+
+
+def route_names():
+    names = {route.name for route in router_v1.urls}
+    names.update(route.name for route in auth_patterns)
+    return {'metrics'} | {
+        name for name in names if not name.endswith('-format')
+    } - SKIPPED_ROUTES
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarks:
+
+    def test_generated_data_skewed(self):
+        sizes = SCALES['tiny']
+        created = generate(sizes, batch_size=50)
+        assert created['User'] == sizes['users']
+        assert created['Title'] == sizes['titles']
+        counts = sorted(
+            Title.objects.values_list('score_count', flat=True), reverse=True
+        )
+        assert sum(counts) == Review.objects.count() == created['Review']
+        assert counts[0] > 5 * counts[len(counts) // 2], (
+            'Проверьте, что популярность произведений имеет длинный хвост'
+        )
+        assert Comment.objects.count() == created['Comment']
+
+    def test_scenarios_cover_routes(self):
+        generate(SCALES['tiny'], batch_size=50)
+        results = run(requests=2)
+        scenarios = {name.split('[')[0] for name in results}
+        missing = route_names() - scenarios
+        assert 'reviews-create' in scenarios
+        assert not missing, f'Нет сценариев для маршрутов: {missing}'
+        assert 'titles-list[genre+category+name+search+year]' in results
+        assert compare(results, results, 0) == []
+        slower = {
+            name: dict(result, p50_ms=result['p50_ms'] / 10)
+            for name, result in results.items()
+        }
+        assert compare(results, slower, 0.5), (
+            'Проверьте, что рост p50 выше порога считается регрессией'
+        )
@@ -0,0 +1,139 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre, GenreTitle, LeaderboardEntry, Review, Title
+
+GENRES_URL = '/api/v1/genres/bulk/'
+TITLES_URL = '/api/v1/titles/bulk/'
+
+
+def post(client, url, items):
+    return client.post(url, items, format='json')
+
+
+def title_items(size, genres=('drama',), category='movie'):
+    return [
+        {
+            'name': f'Bulk {index}',
+            'year': 2000 + index % 20,
+            'genre': list(genres),
+            'category': category,
+        }
+        for index in range(size)
+    ]
+
+
+@pytest.mark.django_db
+class TestBulkCatalog:
+
+    def test_admin_only(self, user_client):
+        response = post(user_client, GENRES_URL, [
+            {'name': 'Комедия', 'slug': 'comedy'}
+        ])
+        assert response.status_code == 403
+
+    def test_genres_create_and_upsert(self, admin_client, title):
+        response = post(admin_client, GENRES_URL, [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Другая драма', 'slug': 'drama'},
+            {'name': 'Повтор', 'slug': 'comedy'},
+        ])
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert 'slug' in errors[1] and 'slug' in errors[2], (
+            'Проверьте, что ошибки возвращаются для каждого объекта: '
+            'существующий slug и повтор в запросе'
+        )
+        assert not Genre.objects.filter(slug='comedy').exists()
+        response = post(admin_client, f'{GENRES_URL}?upsert=true', [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Другая драма', 'slug': 'drama'},
+        ])
+        assert response.status_code == 201
+        assert dict(Genre.objects.values_list('slug', 'name')) == {
+            'comedy': 'Комедия', 'drama': 'Другая драма'
+        }, 'Проверьте, что upsert обновляет жанры по slug и создает новые'
+
+    def test_titles_query_count(self, admin_client, title):
+        Genre.objects.create(name='Комедия', slug='comedy')
+        # Пользователь JWT попадает в кэш до замеров.
+        admin_client.get('/api/v1/users/me/')
+        counts = []
+        for size in (2, 40):
+            with CaptureQueriesContext(connection) as context:
+                response = post(admin_client, TITLES_URL, title_items(
+                    size, genres=('drama', 'comedy')
+                ))
+            assert response.status_code == 201
+            counts.append(len(context))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число SQL-запросов не зависит от размера массива'
+        )
+        created = response.json()
+        assert len(created) == 40
+        assert Title.objects.filter(
+            pk__in=[item['id'] for item in created], name__startswith='Bulk'
+        ).count() == 40, 'Проверьте, что в ответе id созданных произведений'
+        assert GenreTitle.objects.filter(
+            title_id__in=[item['id'] for item in created]
+        ).count() == 80
+        response = admin_client.get('/api/v1/titles/?name=Bulk')
+        assert response.json()['count'] == 42, (
+            'Проверьте, что массовая запись сбрасывает кэш списка произведений'
+        )
+
+    def test_titles_errors(self, admin_client, title):
+        items = title_items(3)
+        items[1]['genre'] = ['drama', 'unknown']
+        items[2]['category'] = 'unknown'
+        items[2]['id'] = title.pk
+        response = post(admin_client, TITLES_URL, items)
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == {'genre'}
+        assert set(errors[2]) == {'category', 'id'}
+        assert Title.objects.count() == 1
+
+    def test_titles_upsert(self, admin_client, title, django_user_model):
+        for index in range(5):
+            Review.objects.create(
+                title=title,
+                author=django_user_model.objects.create(
+                    username=f'author{index}', email=f'author{index}@ya.ru'
+                ),
+                text='Отзыв',
+                score=8
+            )
+        Genre.objects.create(name='Комедия', slug='comedy')
+        items = title_items(1, genres=('comedy',))
+        items.append({
+            'id': title.pk,
+            'name': 'Renamed',
+            'year': 1999,
+            'genre': ['comedy'],
+            'category': 'movie',
+        })
+        response = post(admin_client, f'{TITLES_URL}?upsert=true', items)
+        assert response.status_code == 201
+        title.refresh_from_db()
+        assert (title.name, title.year) == ('Renamed', 1999)
+        assert list(title.genre.values_list('slug', flat=True)) == [
+            'comedy'
+        ], 'Проверьте, что upsert заменяет жанры произведения'
+        assert set(LeaderboardEntry.objects.filter(
+            title=title
+        ).values_list('genre__slug', flat=True)) == {None, 'comedy'}, (
+            'Проверьте, что upsert пересоздает записи рейтингов'
+        )
+        items[1]['id'] = 0
+        response = post(admin_client, f'{TITLES_URL}?upsert=true', items)
+        assert response.status_code == 400
+        assert 'id' in response.json()[1]
+
+    def test_max_items(self, admin_client, settings):
+        settings.BULK_MAX_ITEMS = 2
+        response = post(admin_client, TITLES_URL, title_items(3))
+        assert response.status_code == 400
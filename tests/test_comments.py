@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(
+        title=title, author=user, text='Отзыв', score=5
+    )
+
+
+def comments_url(title_id, review_id):
+    return f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+
+@pytest.mark.django_db
+class TestComments:
+
+    def test_review_of_other_title(self, client, user_client, title, review):
+        other = Title.objects.create(name='Другое', year=2001)
+        comment = Comment.objects.create(
+            review=review, author=review.author, text='Текст'
+        )
+        url = comments_url(other.pk, review.pk)
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что отзыв другого произведения дает 404'
+        )
+        assert client.get(f'{url}{comment.pk}/').status_code == 404
+        assert user_client.post(url, {'text': 'Текст'}).status_code == 404
+        assert Comment.objects.count() == 1
+
+    def test_empty_review(self, client, title, review):
+        response = client.get(comments_url(title.pk, review.pk))
+        assert response.status_code == 200
+        assert response.json()['count'] == 0
+
+    def test_list_single_join_query(self, client, title, review,
+                                    django_user_model):
+        for index in range(3):
+            Comment.objects.create(
+                review=review,
+                author=django_user_model.objects.create(
+                    username=f'author{index}',
+                    email=f'author{index}@yamdb.fake'
+                ),
+                text='Текст'
+            )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(comments_url(title.pk, review.pk))
+        assert [
+            comment['author'] for comment in response.json()['results']
+        ] == ['author2', 'author1', 'author0']
+        page_query = context.captured_queries[-1]['sql']
+        assert len(context) == 2 and 'reviews_review' in page_query, (
+            'Проверьте, что пара произведение/отзыв и авторы комментариев '
+            'загружаются в запросе страницы'
+        )
@@ -0,0 +1,143 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import BaseSerializer
+
+from api import cache
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(
+        title=title, author=user, text='Отзыв', score=5
+    )
+
+
+def urls(title, review):
+    reviews = f'/api/v1/titles/{title.pk}/reviews/'
+    return {
+        'title': f'/api/v1/titles/{title.pk}/',
+        'titles': '/api/v1/titles/',
+        'scores': f'/api/v1/titles/{title.pk}/scores/',
+        'reviews': reviews,
+        'review': f'{reviews}{review.pk}/',
+        'comments': f'{reviews}{review.pk}/comments/',
+    }
+
+
+class Clock:
+    """Время, сдвинутое на shift секунд вперед."""
+
+    def __init__(self, shift):
+        self.shift = shift
+
+    def time(self):
+        return time.time() + self.shift
+
+
+def etags(client, title, review):
+    return {
+        name: client.get(url)['ETag']
+        for name, url in urls(title, review).items()
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    @pytest.mark.parametrize(
+        'name', ('title', 'titles', 'scores', 'reviews', 'review', 'comments')
+    )
+    def test_not_modified(self, client, title, review, name, monkeypatch):
+        url = urls(title, review)[name]
+        # Секунда последнего изменения закончилась.
+        monkeypatch.setattr(cache, 'time', Clock(1))
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.has_header('ETag') and response.has_header(
+            'Last-Modified'
+        ), 'Проверьте, что ответ содержит ETag и Last-Modified'
+
+        def fail(*args, **kwargs):
+            raise AssertionError('serializer created')
+
+        monkeypatch.setattr(BaseSerializer, '__init__', fail)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 304
+        assert len(context) == 0, (
+            'Проверьте, что ответ 304 не обращается к БД и не сериализует '
+            'данные'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == 304
+
+    def test_validators_follow_changes(self, client, title, review, admin):
+        other = Title.objects.create(name='Other', year=2001)
+        before = etags(client, title, review)
+        Review.objects.create(title=other, author=admin, text='Да', score=9)
+        assert etags(client, title, review)['reviews'] == before['reviews'], (
+            'Проверьте, что отзыв к другому произведению не меняет ETag'
+        )
+        Review.objects.create(title=title, author=admin, text='Да', score=9)
+        after = etags(client, title, review)
+        assert after['title'] != before['title']
+        assert after['scores'] != before['scores']
+        assert after['reviews'] != before['reviews']
+        assert after['comments'] == before['comments']
+        Comment.objects.create(review=review, author=admin, text='Да')
+        before, after = after, etags(client, title, review)
+        assert after['comments'] != before['comments']
+        assert after['reviews'] == before['reviews']
+
+    def test_non_canonical_ids(self, client, title, review, admin):
+        reviews = f'/api/v1/titles/0{title.pk}/reviews/'
+        comments = f'{reviews}0{review.pk}/comments/'
+        before = {url: client.get(url)['ETag'] for url in (reviews, comments)}
+        Review.objects.create(title=title, author=admin, text='Да', score=9)
+        Comment.objects.create(review=review, author=admin, text='Да')
+        for url, etag in before.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                'Проверьте, что ETag по адресу с ведущими нулями в id '
+                'меняется вместе с данными'
+            )
+
+    def test_author_rename(self, client, title, review, user):
+        before = etags(client, title, review)
+        user.save()
+        assert etags(client, title, review)['reviews'] == before['reviews'], (
+            'Проверьте, что сохранение пользователя без смены имени не '
+            'сбрасывает ETag'
+        )
+        user.username = 'renamed'
+        user.save()
+        after = etags(client, title, review)
+        assert after['reviews'] != before['reviews']
+        assert after['comments'] != before['comments']
+        assert client.get(
+            urls(title, review)['review']
+        ).json()['author'] == 'renamed'
+
+    def test_last_modified_within_second(self, client, title, monkeypatch):
+        url = f'/api/v1/titles/{title.pk}/'
+        response = client.get(url)
+        assert not response.has_header('Last-Modified'), (
+            'Проверьте, что Last-Modified не выдается, пока не закончилась '
+            'секунда последнего изменения'
+        )
+        monkeypatch.setattr(cache, 'time', Clock(1))
+        last_modified = client.get(url)['Last-Modified']
+        monkeypatch.setattr(cache, 'time', Clock(0))
+        title.name = 'Новое название'
+        title.save()
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение в ту же секунду не дает ответ 304 '
+            'по If-Modified-Since'
+        )
@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+
+REVIEWS_COUNT = 12
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_reviews_cursor_pages(self, client, title, django_user_model):
+        for index in range(REVIEWS_COUNT):
+            Review.objects.create(
+                title=title,
+                author=django_user_model.objects.create(
+                    username=f'author{index}', email=f'a{index}@yamdb.fake'
+                ),
+                text='Отзыв',
+                score=5
+            )
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        ids = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация не возвращает count'
+            )
+            assert not any(
+                'COUNT(' in query['sql'] for query in context.captured_queries
+            ), 'Проверьте, что курсорная пагинация не выполняет COUNT(*)'
+            ids.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert ids == list(
+            title.reviews.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        ), 'Проверьте, что курсорная пагинация обходит все отзывы по порядку'
+
+    def test_page_number_is_default(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        assert 'count' in response.json(), (
+            'Проверьте, что без параметра pagination=cursor '
+            'используется постраничная пагинация'
+        )
@@ -0,0 +1,238 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from reviews.management.commands import data_transfer
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    LeaderboardEntry,
+    Review,
+    Title,
+    User
+)
+
+URL = '/api/v1/titles/'
+# Полный набор таблиц в формате демонстрационных данных.
+CSV_FILES = {
+    'users': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,bingobongo,bingobongo@yamdb.fake,user,,,\n'
+        '101,capt_obvious,capt_obvious@yamdb.fake,admin,,,\n'
+        '102,faust,faust@yamdb.fake,moderator,,,\n'
+    ),
+    'category': (
+        'id,name,slug\n'
+        '1,Фильм,movie\n'
+        '2,Книга,book\n'
+    ),
+    'genre': (
+        'id,name,slug\n'
+        '1,Драма,drama\n'
+        '2,Комедия,comedy\n'
+    ),
+    'titles': (
+        'id,name,year,category\n'
+        '1,Побег из Шоушенка,1994,1\n'
+        '2,"Гроза, пьеса",1859,2\n'
+        '3,Без отзывов,2000,1\n'
+    ),
+    'review': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Ну такое,100,4,2019-09-24T21:08:21.567Z\n'
+        '2,1,Отлично,101,10,2019-09-24T21:08:21.567Z\n'
+        '3,2,Классика,102,7,2019-09-24T21:08:21.567Z\n'
+    ),
+    'comments': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2019-09-24T21:08:21.567Z\n'
+        '2,3,Не согласен,100,2019-09-24T21:08:21.567Z\n'
+    ),
+    'genre_title': (
+        'id,title_id,genre_id\n'
+        '1,1,1\n'
+        '2,2,1\n'
+        '3,2,2\n'
+    ),
+}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    for name, content in CSV_FILES.items():
+        (tmp_path / f'{name}.csv').write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+def loaded_state():
+    """Загруженные строки всех таблиц в сравнимом виде."""
+    return {
+        'users': list(User.objects.order_by('pk').values_list(
+            'pk', 'username', 'role'
+        )),
+        'categories': list(Category.objects.order_by('pk').values_list(
+            'pk', 'slug'
+        )),
+        'genres': list(Genre.objects.order_by('pk').values_list(
+            'pk', 'slug'
+        )),
+        'titles': list(Title.objects.order_by('pk').values_list(
+            'pk', 'name', 'category_id', 'score_sum', 'score_count',
+            'rating', 'score_4', 'score_7', 'score_10'
+        )),
+        'reviews': list(Review.objects.order_by('pk').values_list(
+            'pk', 'title_id', 'author_id', 'score'
+        )),
+        'comments': list(Comment.objects.order_by('pk').values_list(
+            'pk', 'review_id', 'author_id'
+        )),
+        'genre_title': list(GenreTitle.objects.order_by('pk').values_list(
+            'title_id', 'genre_id'
+        )),
+        'leaderboards': LeaderboardEntry.objects.count(),
+    }
+
+
+def clear_tables():
+    for model in (Comment, Review, GenreTitle, Title, Genre, Category, User):
+        model.objects.all().delete()
+
+
+class TestDependencyLevels:
+
+    def test_demo_tables(self):
+        levels = data_transfer.dependency_levels(
+            data_transfer.foreign_key_graph(data_transfer.BASE_DICT)
+        )
+        assert [sorted(level) for level in levels] == [
+            ['category', 'genre', 'users'],
+            ['titles'],
+            ['genre_title', 'review'],
+            ['comments'],
+        ], 'Проверьте порядок загрузки таблиц по внешним ключам'
+
+    def test_missing_parents(self):
+        levels = data_transfer.dependency_levels(
+            data_transfer.foreign_key_graph(('comments', 'review', 'users'))
+        )
+        assert levels == [['users'], ['review'], ['comments']], (
+            'Проверьте, что незагружаемые таблицы не задерживают зависимые'
+        )
+
+    def test_cycle(self):
+        with pytest.raises(CommandError, match='Cyclic'):
+            data_transfer.dependency_levels(
+                {'a': {'b'}, 'b': {'a'}, 'c': set()}
+            )
+
+    def test_unknown_table(self):
+        with pytest.raises(CommandError, match='Unknown table'):
+            data_transfer.foreign_key_graph(('titles', 'ratings'))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDataTransfer:
+
+    def test_full_load(self, csv_path, settings):
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        call_command('data_transfer', '--path', str(csv_path))
+        state = loaded_state()
+        assert state['users'] == [
+            (100, 'bingobongo', 'user'),
+            (101, 'capt_obvious', 'admin'),
+            (102, 'faust', 'moderator'),
+        ]
+        assert state['categories'] == [(1, 'movie'), (2, 'book')]
+        assert state['genres'] == [(1, 'drama'), (2, 'comedy')]
+        assert state['titles'] == [
+            (1, 'Побег из Шоушенка', 1, 14, 2, 7.0, 1, 0, 1),
+            (2, 'Гроза, пьеса', 2, 7, 1, 7.0, 0, 1, 0),
+            (3, 'Без отзывов', 1, 0, 0, None, 0, 0, 0),
+        ], 'Проверьте, что после загрузки пересчитываются рейтинги'
+        assert state['reviews'] == [
+            (1, 1, 100, 4), (2, 1, 101, 10), (3, 2, 102, 7)
+        ], 'Проверьте, что колонки author и title_id становятся ключами'
+        assert state['comments'] == [(1, 1, 101), (2, 3, 100)]
+        assert state['genre_title'] == [(1, 1), (2, 1), (2, 2)]
+        assert state['leaderboards'] > 0, (
+            'Проверьте, что после загрузки пересобираются рейтинги'
+        )
+        new_title = Title.objects.create(name='Новое', year=2020)
+        assert new_title.pk > 3, (
+            'Проверьте, что последовательности id сдвигаются после загрузки'
+        )
+        new_title.delete()
+
+    @pytest.mark.parametrize('options', ((), ('--copy',)))
+    def test_rerun_is_idempotent(self, csv_path, settings, options):
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        arguments = ('data_transfer', '--path', str(csv_path), *options)
+        if options and connection.vendor != 'postgresql':
+            with pytest.raises(CommandError):
+                call_command(*arguments)
+            return
+        call_command(*arguments)
+        state = loaded_state()
+        call_command(*arguments)
+        assert loaded_state() == state, (
+            'Проверьте, что повторная загрузка тех же файлов не меняет данные'
+        )
+
+    def test_parallel_load(self, csv_path, settings):
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        call_command('data_transfer', '--path', str(csv_path))
+        serial = loaded_state()
+        clear_tables()
+        out = StringIO()
+        call_command(
+            'data_transfer', '--path', str(csv_path), '--workers', '2',
+            stdout=out
+        )
+        if connection.vendor == 'sqlite':
+            assert 'loading sequentially' in out.getvalue(), (
+                'Проверьте, что для SQLite загрузка идет в одном процессе'
+            )
+        assert loaded_state() == serial, (
+            'Проверьте, что параллельная загрузка дает те же данные'
+        )
+        clear_tables()
+        # Загрузка в процессах пула. SQLite не допускает параллельной
+        # записи, поэтому там каждый уровень состоит из одной таблицы.
+        command = data_transfer.Command()
+        files = command.get_files(str(csv_path))
+        levels = data_transfer.dependency_levels(
+            data_transfer.foreign_key_graph(files)
+        )
+        if connection.vendor == 'sqlite':
+            levels = [[base_item] for level in levels for base_item in level]
+        results = command.transfer(
+            levels, files, {'batch_size': 2, 'copy': False, 'workers': 2}
+        )
+        assert {
+            base_item: count for base_item, (count, _) in results.items()
+        } == {
+            'users': 3, 'category': 2, 'genre': 2, 'titles': 3,
+            'review': 3, 'comments': 2, 'genre_title': 3,
+        }
+        assert Review.objects.count() == 3
+        assert GenreTitle.objects.count() == 3
+
+    def test_load_refreshes_cache(self, client, tmp_path):
+        assert client.get(URL).json()['count'] == 0
+        (tmp_path / 'category.csv').write_text(
+            'id,name,slug\n1,Фильм,movie\n', encoding='utf-8'
+        )
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n1,Title,2000,1\n', encoding='utf-8'
+        )
+        call_command('data_transfer', '--path', str(tmp_path))
+        response = client.get(URL)
+        assert response.json()['count'] == 1, (
+            'Проверьте, что загрузка данных меняет версию кэша произведений'
+        )
+        assert response.json()['results'][0]['category']['slug'] == 'movie'
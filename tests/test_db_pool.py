@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+
+import pytest
+from psycopg2 import OperationalError
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INERROR,
+    TRANSACTION_STATUS_INTRANS
+)
+
+from db_pool import pool as db_pool
+from db_pool.pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        if self.connection.broken:
+            raise OperationalError('server closed the connection')
+        self.connection.pings += 1
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.broken = False
+        self.pings = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        if self.broken:
+            raise OperationalError('server closed the connection')
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**options):
+    options.setdefault('health_check_interval', 60)
+    return ConnectionPool(FakeConnection, **options)
+
+
+def move_clock(monkeypatch, seconds):
+    now = time.monotonic() + seconds
+    monkeypatch.setattr(db_pool.time, 'monotonic', lambda: now)
+
+
+class TestConnectionPool:
+
+    def test_connection_reused(self):
+        pool = make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        assert pool.acquire() is connection, (
+            'Проверьте, что возвращенное соединение выдается повторно'
+        )
+        stats = pool.stats()
+        assert stats['events'] == {'connect': 1, 'checkout': 2}, (
+            'Проверьте, что повторная выдача не открывает соединение'
+        )
+        assert (stats['in_use'], stats['idle']) == (1, 0)
+
+    def test_size_bound_and_timeout(self):
+        pool = make_pool(size=2, timeout=0.05)
+        first, second = pool.acquire(), pool.acquire()
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+        assert pool.stats()['events']['timeout'] == 1, (
+            'Проверьте, что ожидание сверх timeout учитывается в метриках'
+        )
+        pool.release(first)
+        assert pool.acquire() is first
+        pool.release(second)
+
+    def test_waiter_gets_released_connection(self):
+        pool = make_pool(size=1, timeout=5)
+        connection = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(
+            target=lambda: acquired.append(pool.acquire())
+        )
+        waiter.start()
+        while not pool.stats()['waiting']:
+            time.sleep(0.001)
+        pool.release(connection)
+        waiter.join(5)
+        assert acquired == [connection], (
+            'Проверьте, что ожидающий запрос получает освобожденное '
+            'соединение'
+        )
+
+    def test_open_failure_frees_slot(self):
+        pool = ConnectionPool(
+            lambda: (_ for _ in ()).throw(OperationalError('refused')),
+            size=1,
+            timeout=0.05
+        )
+        for _ in range(2):
+            with pytest.raises(OperationalError):
+                pool.acquire()
+        assert pool.stats()['in_use'] == 0, (
+            'Проверьте, что неудачное подключение не занимает место в пуле'
+        )
+
+    def test_transaction_rolled_back_on_release(self):
+        pool = make_pool()
+        connection = pool.acquire()
+        connection.status = TRANSACTION_STATUS_INTRANS
+        pool.release(connection)
+        assert pool.acquire() is connection
+        assert connection.status == TRANSACTION_STATUS_IDLE, (
+            'Проверьте, что незавершенная транзакция откатывается '
+            'при возврате соединения'
+        )
+
+    def test_broken_connection_discarded(self):
+        pool = make_pool()
+        connection = pool.acquire()
+        connection.status = TRANSACTION_STATUS_INERROR
+        connection.broken = True
+        pool.release(connection)
+        assert connection.closed, (
+            'Проверьте, что сломанное соединение закрывается'
+        )
+        assert pool.acquire() is not connection
+        stats = pool.stats()
+        assert (stats['in_use'], stats['events']['discard']) == (1, 1)
+
+    def test_closed_idle_connection_replaced(self):
+        pool = make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.closed = 2
+        assert pool.acquire() is not connection, (
+            'Проверьте, что закрытое сервером соединение не выдается'
+        )
+
+    def test_idle_connection_recycled(self, monkeypatch):
+        pool = make_pool(max_idle=10)
+        connection = pool.acquire()
+        pool.release(connection)
+        move_clock(monkeypatch, 11)
+        assert pool.acquire() is not connection
+        assert connection.closed, (
+            'Проверьте, что соединение, простаивавшее дольше max_idle, '
+            'закрывается'
+        )
+
+    def test_old_connection_recycled(self, monkeypatch):
+        pool = make_pool(max_lifetime=10)
+        connection = pool.acquire()
+        move_clock(monkeypatch, 11)
+        pool.release(connection)
+        assert connection.closed, (
+            'Проверьте, что соединение старше max_lifetime закрывается '
+            'при возврате'
+        )
+        assert pool.stats()['idle'] == 0
+
+    def test_health_check(self, monkeypatch):
+        pool = make_pool(health_check_interval=1)
+        connection = pool.acquire()
+        pool.release(connection)
+        assert pool.acquire() is connection
+        assert connection.pings == 0, (
+            'Проверьте, что недавно использованное соединение '
+            'не проверяется запросом'
+        )
+        pool.release(connection)
+        move_clock(monkeypatch, 2)
+        assert pool.acquire() is connection
+        assert connection.pings == 1, (
+            'Проверьте, что простаивавшее соединение проверяется SELECT 1'
+        )
+        pool.release(connection)
+        connection.broken = True
+        move_clock(monkeypatch, 4)
+        assert pool.acquire() is not connection, (
+            'Проверьте, что соединение, не прошедшее проверку, заменяется'
+        )
+
+    def test_close_all(self):
+        pool = make_pool()
+        connections = [pool.acquire() for _ in range(3)]
+        for connection in connections:
+            pool.release(connection)
+        pool.close_all()
+        assert all(connection.closed for connection in connections)
+        assert pool.stats()['idle'] == 0
+
+
+@pytest.mark.django_db
+def test_pool_metrics(admin_client, monkeypatch):
+    pool = make_pool(size=3)
+    pool.release(pool.acquire())
+    pool.acquire()
+    monkeypatch.setattr(
+        db_pool, 'pools', {('default', (('database', 'yamdb'),)): pool}
+    )
+    metrics = admin_client.get('/api/v1/metrics/').content.decode()
+    labels = f'pid="{os.getpid()}",alias="default",database="yamdb"'
+    for sample in (
+        f'api_db_pool_connections{{{labels},state="in_use"}} 1',
+        f'api_db_pool_connections{{{labels},state="idle"}} 0',
+        f'api_db_pool_size{{{labels}}} 3',
+        f'api_db_pool_waiting{{{labels}}} 0',
+        f'api_db_pool_events_total{{{labels},event="checkout"}} 2',
+        f'api_db_pool_events_total{{{labels},event="connect"}} 1',
+        f'api_db_pool_checkout_seconds_count{{{labels}}} 2',
+    ):
+        assert sample in metrics, (
+            f'Проверьте, что метрики содержат строку {sample}'
+        )
@@ -0,0 +1,87 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from reviews.management.commands.send_emails import claim_batch
+from reviews.models import FAILED, PENDING, SENT, OutgoingEmail
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def signup(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newuser', 'email': 'newuser@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        return OutgoingEmail.objects.get(recipient='newuser@yamdb.fake')
+
+    def test_signup_queues_email(self, client, django_user_model):
+        email = self.signup(client)
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо синхронно'
+        )
+        assert email.status == PENDING
+        assert email.body == django_user_model.objects.get(
+            username='newuser'
+        ).confirmation_code
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда send_emails отправляет письма из очереди'
+        )
+        email.refresh_from_db()
+        assert email.status == SENT and email.attempts == 1
+
+    def test_failed_email_is_retried(self, client, monkeypatch):
+        email = self.signup(client)
+
+        def send_messages(self, messages):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', send_messages)
+        call_command('send_emails', '--backoff', '0', '--max-attempts', '3')
+        email.refresh_from_db()
+        assert email.status == FAILED and email.attempts == 3, (
+            'Проверьте, что письмо отправляется повторно до --max-attempts'
+        )
+        assert email.last_error == 'SMTP недоступен'
+
+    def test_smtp_unreachable(self, client, monkeypatch):
+        email = self.signup(client)
+
+        def open(self):
+            raise ConnectionRefusedError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'open', open, raising=False)
+        call_command('send_emails', '--backoff', '60')
+        email.refresh_from_db()
+        assert email.status == PENDING and email.attempts == 1, (
+            'Проверьте, что ошибка соединения с SMTP засчитывается письмам '
+            'пачки как попытка, а команда не падает'
+        )
+        assert email.last_error == 'SMTP недоступен'
+        assert email.next_attempt > email.created, (
+            'Проверьте, что повтор откладывается'
+        )
+        call_command('send_emails', '--backoff', '0', '--max-attempts', '2')
+        email.refresh_from_db()
+        assert email.status == PENDING and email.attempts == 1, (
+            'Проверьте, что письмо не отправляется до следующей попытки'
+        )
+
+    def test_claimed_emails_hidden_while_sending(self, client, monkeypatch):
+        self.signup(client)
+        claimed = []
+        send_messages = EmailBackend.send_messages
+
+        def claim_and_send(self, messages):
+            claimed.extend(claim_batch(10))
+            return send_messages(self, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', claim_and_send)
+        call_command('send_emails')
+        assert len(mail.outbox) == 1 and claimed == [], (
+            'Проверьте, что отправляемые письма не захватываются повторно'
+        )
@@ -0,0 +1,150 @@
+import csv
+import json
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from reviews import export
+from reviews.models import Category, Comment, Genre, Review, Title
+
+URL = '/api/v1/export/'
+
+
+def read_ndjson(response):
+    assert response.status_code == 200
+    assert response.streaming, 'Проверьте, что выгрузка отдается потоком'
+    return [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).decode().splitlines()
+    ]
+
+
+@pytest.fixture
+def catalog(title, user, admin):
+    book = Category.objects.create(name='Книга', slug='book')
+    untagged = Title.objects.create(name='Untagged', year=2001, category=book)
+    tagged = Title.objects.create(name='Tagged', year=2002, category=book)
+    tagged.genre.set([
+        Genre.objects.create(name='Комедия', slug='comedy'),
+        Genre.objects.get(slug='drama'),
+    ])
+    old = Review.objects.create(title=title, author=user, text='Old', score=3)
+    Review.objects.filter(pk=old.pk).update(
+        pub_date=timezone.now() - timedelta(days=10)
+    )
+    new = Review.objects.create(title=tagged, author=user, text='New', score=9)
+    Comment.objects.create(review=new, author=admin, text='Комментарий')
+    return {'title': title, 'untagged': untagged, 'tagged': tagged}
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_admin_only(self, user_client):
+        assert user_client.get(f'{URL}titles/').status_code == 403
+
+    def test_titles_ndjson(self, admin_client, catalog):
+        rows = read_ndjson(admin_client.get(f'{URL}titles/'))
+        assert [(row['name'], row['genre']) for row in rows] == [
+            ('Title', ['drama']),
+            ('Untagged', []),
+            ('Tagged', ['comedy', 'drama']),
+        ], 'Проверьте, что жанры выгружаются у своих произведений'
+        assert rows[2]['category_slug'] == 'book'
+        assert rows[2]['rating'] == 9
+        rows = read_ndjson(admin_client.get(f'{URL}titles/?category=movie'))
+        assert [row['name'] for row in rows] == ['Title']
+
+    def test_reviews_csv_since(self, admin_client, catalog):
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = admin_client.get(
+            f'{URL}reviews/?output_format=csv&since={since}'
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(
+            b''.join(response.streaming_content).decode().splitlines()
+        ))
+        assert [row['text'] for row in rows] == ['New'], (
+            'Проверьте, что since отбирает отзывы начиная с даты'
+        )
+        rows = read_ndjson(admin_client.get(f'{URL}comments/?category=book'))
+        assert [row['title_id'] for row in rows] == [catalog['tagged'].pk]
+        assert read_ndjson(admin_client.get(
+            f'{URL}comments/?category=movie'
+        )) == []
+
+    def test_title_deleted_between_queries(self, catalog, monkeypatch):
+        title_genres = export.title_genres
+
+        def genres_of_deleted_title(titles, chunk_size):
+            # Произведение удаляется после чтения его жанров, до чтения
+            # списка произведений.
+            genres = title_genres(titles, chunk_size)
+            first = next(genres)
+            Title.objects.filter(pk=first[0]).delete()
+            yield first
+            yield from genres
+
+        monkeypatch.setattr(export, 'title_genres', genres_of_deleted_title)
+        rows = export.title_rows(None, None, export.CHUNK_SIZE)
+        assert [(row['name'], row['genre']) for row in rows] == [
+            ('Untagged', []),
+            ('Tagged', ['comedy', 'drama']),
+        ], (
+            'Проверьте, что жанры удаленного произведения не останавливают '
+            'слияние жанров с произведениями'
+        )
+
+    @pytest.mark.parametrize('url', (
+        'users/',
+        'titles/?output_format=xml',
+        'titles/?since=2022-01-01',
+        'reviews/?since=yesterday',
+    ))
+    def test_bad_params(self, admin_client, url):
+        assert admin_client.get(f'{URL}{url}').status_code == 400
+
+    def test_command(self, catalog, tmp_path):
+        path = tmp_path / 'titles.csv'
+        call_command(
+            'export_data', 'titles', '--output-format', 'csv',
+            '--file', str(path)
+        )
+        with open(path, encoding='utf-8', newline='') as export_file:
+            rows = list(csv.DictReader(export_file))
+        assert [row['genre'] for row in rows] == ['drama', '', 'comedy,drama']
+        with pytest.raises(CommandError):
+            call_command('export_data', 'titles', '--since', '2022-01-01')
+
+    def test_memory_does_not_grow(self, django_user_model, tmp_path):
+        django_user_model.objects.bulk_create(
+            django_user_model(username=f'user{index}', email=f'{index}@ya.ru')
+            for index in range(50)
+        )
+        Title.objects.bulk_create(
+            Title(name=f'Title {index}', year=2000) for index in range(100)
+        )
+        users = list(django_user_model.objects.all())
+        titles = list(Title.objects.order_by('pk'))
+        peaks = []
+        for start, stop in ((0, 10), (10, 100)):
+            Review.objects.bulk_create(
+                Review(title=title, author=user, text='Отзыв ' * 20, score=5)
+                for title in titles[start:stop] for user in users
+            )
+            tracemalloc.start()
+            call_command(
+                'export_data', 'reviews', '--chunk-size', '100',
+                '--file', str(tmp_path / 'reviews.ndjson')
+            )
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        assert peaks[1] < peaks[0] * 2, (
+            'Проверьте, что память выгрузки 5000 отзывов не больше, чем '
+            'у 500'
+        )
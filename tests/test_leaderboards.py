@@ -0,0 +1,145 @@
+from importlib import import_module
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, LeaderboardEntry, Review, Title
+
+URL = '/api/v1/leaderboards/'
+MIN_REVIEWS = 2
+
+
+@pytest.fixture(autouse=True)
+def min_reviews(settings):
+    settings.LEADERBOARD_MIN_REVIEWS = MIN_REVIEWS
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create(
+            username=f'author{index}', email=f'author{index}@yamdb.fake'
+        )
+        for index in range(3)
+    ]
+
+
+def rate(title, authors, *scores):
+    return [
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        )
+        for author, score in zip(authors, scores)
+    ]
+
+
+def names(response):
+    assert response.status_code == 200
+    return [entry['title']['name'] for entry in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLeaderboards:
+
+    def test_incremental_updates(self, client, title, authors):
+        other = Title.objects.create(
+            name='Other', year=2001, category=title.category
+        )
+        rate(title, authors, 6)
+        assert names(client.get(URL)) == [], (
+            'Проверьте, что в рейтинг не попадают произведения с малым '
+            'количеством оценок'
+        )
+        reviews = rate(title, authors[1:], 8)
+        rate(other, authors, 9, 9)
+        assert names(client.get(URL)) == ['Other', 'Title']
+        reviews[0].score = 10
+        reviews[0].save()
+        category_url = f'{URL}?category={title.category.slug}'
+        assert names(client.get(category_url)) == ['Other', 'Title']
+        assert names(client.get(f'{URL}?genre=drama')) == ['Title']
+        assert client.get(URL).json()[1]['rating'] == 8.0
+        reviews[0].delete()
+        assert names(client.get(URL)) == ['Other'], (
+            'Проверьте, что произведение уходит из рейтинга при удалении '
+            'оценок'
+        )
+
+    def test_scope_changes(self, client, title, authors):
+        rate(title, authors, 7, 7)
+        title.refresh_from_db()
+        title.category = Category.objects.create(name='Книга', slug='book')
+        title.save()
+        assert names(client.get(f'{URL}?category=movie')) == []
+        assert names(client.get(f'{URL}?category=book')) == ['Title']
+        title.genre.set([Genre.objects.create(name='Комедия', slug='comedy')])
+        assert names(client.get(f'{URL}?genre=drama')) == []
+        assert names(client.get(f'{URL}?genre=comedy')) == ['Title']
+
+    def test_rebuild_matches_incremental(self, title, authors):
+        rate(title, authors, 7, 3, 5)
+        entries = set(LeaderboardEntry.objects.values_list(
+            'title', 'category', 'genre', 'rating', 'score_count'
+        ))
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboards')
+        assert set(LeaderboardEntry.objects.values_list(
+            'title', 'category', 'genre', 'rating', 'score_count'
+        )) == entries == {
+            (title.pk, None, None, 5.0, 3),
+            (title.pk, title.category_id, None, 5.0, 3),
+            (title.pk, None, title.genre.get().pk, 5.0, 3),
+        }
+
+    def test_migration_fills_entries(self, title, authors):
+        rate(title, authors, 7, 3, 5)
+        entries = set(LeaderboardEntry.objects.values_list(
+            'title', 'category', 'genre', 'rating', 'score_count'
+        ))
+        LeaderboardEntry.objects.all().delete()
+        migration = ('reviews', '0009_leaderboard_entry')
+        apps = MigrationExecutor(connection).loader.project_state(
+            migration
+        ).apps
+        with connection.schema_editor() as schema_editor:
+            import_module(
+                'reviews.migrations.0009_leaderboard_entry'
+            ).fill_leaderboards(apps, schema_editor)
+        assert set(LeaderboardEntry.objects.values_list(
+            'title', 'category', 'genre', 'rating', 'score_count'
+        )) == entries, (
+            'Проверьте, что миграция заполняет рейтинги по существующим '
+            'оценкам'
+        )
+
+    def test_rebuild_refreshes_cache(self, client, title, authors):
+        rate(title, authors, 7, 3, 5)
+        assert client.get(URL).json()[0]['rating'] == 5
+        # Рейтинг, исправленный в обход save(), попадет в записи при пересчете.
+        Title.objects.filter(pk=title.pk).update(rating=6)
+        call_command('rebuild_leaderboards')
+        assert client.get(URL).json()[0]['rating'] == 6, (
+            'Проверьте, что пересчет рейтингов меняет версию кэша'
+        )
+
+    def test_top_k_queries(self, client, title, authors):
+        for index in range(5):
+            rate(
+                Title.objects.create(name=f'T{index}', year=2000),
+                authors, index + 1, index + 1
+            )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{URL}?limit=3')
+        assert names(response) == ['T4', 'T3', 'T2']
+        assert len(context) == 2, (
+            'Проверьте, что первые места читаются одним запросом с '
+            'подгрузкой жанров'
+        )
+
+    def test_invalid_params(self, client):
+        assert client.get(f'{URL}?limit=0').status_code == 400
+        assert client.get(f'{URL}?limit=x').status_code == 400
+        assert client.get(f'{URL}?genre=a&category=b').status_code == 400
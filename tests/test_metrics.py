@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from api.metrics import registry
+
+METRICS_URL = '/api/v1/metrics/'
+REMOTE_ADDR = '10.0.0.1'
+PID = f'pid="{os.getpid()}"'
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    registry.clear()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_routes_labelled_by_pattern_name(self, client, title):
+        client.get(f'/api/v1/titles/{title.pk}/')
+        client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        client.get('/api/v1/titles/0/reviews/')
+        metrics = client.get(METRICS_URL).content.decode()
+        for sample in (
+            f'api_requests_total{{{PID},route="titles-detail",method="GET",'
+            'status="200"} 1',
+            f'api_requests_total{{{PID},route="reviews-list",method="GET",'
+            'status="200"} 1',
+            f'api_requests_total{{{PID},route="reviews-list",method="GET",'
+            'status="404"} 1',
+            f'api_request_duration_seconds_count{{{PID},route="reviews-list",'
+            'method="GET"} 2',
+            f'api_response_size_bytes_bucket{{{PID},route="titles-detail",'
+            'method="GET",le="+Inf"} 1',
+            'api_cache_events_total{event="miss"} 1',
+            'api_outgoing_email_queue 0',
+        ):
+            assert sample in metrics, (
+                f'Проверьте, что метрики содержат строку {sample}'
+            )
+        assert f'/titles/{title.pk}/' not in metrics, (
+            'Проверьте, что метки строятся по имени маршрута, а не по адресу'
+        )
+
+    def test_query_count_observed(self, client, title):
+        client.get('/api/v1/categories/')
+        metrics = client.get(METRICS_URL).content.decode()
+        assert (
+            f'api_db_queries_sum{{{PID},route="categories-list",method="GET"}} 2'
+            in metrics
+        ), 'Проверьте, что учитывается количество SQL-запросов'
+
+    def test_access(self, client, user_client, admin_client):
+        assert client.get(
+            METRICS_URL, REMOTE_ADDR=REMOTE_ADDR
+        ).status_code == 401, (
+            'Проверьте, что метрики недоступны анонимно с внешнего адреса'
+        )
+        assert user_client.get(
+            METRICS_URL, REMOTE_ADDR=REMOTE_ADDR
+        ).status_code == 403, (
+            'Проверьте, что метрики недоступны пользователю'
+        )
+        response = admin_client.get(METRICS_URL, REMOTE_ADDR=REMOTE_ADDR)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
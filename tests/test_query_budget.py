@@ -0,0 +1,121 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.urls import router_v1
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+
+OBJECTS_COUNT = 5
+
+# Максимальное число SQL-запросов для GET-запроса администратора к маршруту
+# router_v1, отвечающему на GET (включая запрос пользователя при
+# JWT-аутентификации).
+# Бюджет не должен зависеть от количества объектов на странице.
+QUERY_BUDGETS = {
+    'api-root': 1,
+    'categories-list': 3,
+    'genres-list': 3,
+    'titles-list': 4,
+    'titles-detail': 3,
+    'titles-scores': 2,
+    'reviews-list': 4,
+    'reviews-detail': 3,
+    'comments-list': 3,
+    'comments-detail': 2,
+    'users-list': 3,
+    'users-detail': 2,
+    'users-get-patch-user': 1,
+    'leaderboards-list': 3,
+}
+
+
+@pytest.fixture
+def catalog(admin, django_user_model):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name=f'Жанр {index}', slug=f'genre-{index}')
+        for index in range(OBJECTS_COUNT)
+    ]
+    authors = [
+        django_user_model.objects.create(
+            username=f'author{index}', email=f'author{index}@yamdb.fake'
+        )
+        for index in range(OBJECTS_COUNT)
+    ]
+    for index in range(OBJECTS_COUNT):
+        title = Title.objects.create(
+            name=f'Произведение {index}', year=2000, category=category
+        )
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title=title, genre=genre) for genre in genres
+        )
+        for author in authors:
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+            Comment.objects.bulk_create(
+                Comment(review=review, author=comment_author, text='Текст')
+                for comment_author in authors
+            )
+    return {
+        'slug': category.slug,
+        'title_id': title.pk,
+        'review_id': review.pk,
+        'username': admin.username,
+        'pk': {
+            'titles': title.pk,
+            'reviews': review.pk,
+            'comments': review.comments.first().pk,
+        },
+    }
+
+
+def route_kwargs(route, catalog):
+    kwargs = {}
+    for name in route.pattern.regex.groupindex:
+        kwargs[name] = catalog[name]
+        if name == 'pk':
+            kwargs[name] = catalog[name][route.name.split('-')[0]]
+    return kwargs
+
+
+def budget_routes():
+    # У корня API нет actions: APIRootView отвечает только на GET.
+    return [
+        route for route in router_v1.urls
+        if 'format' not in route.pattern.regex.groupindex
+        and 'get' in getattr(route.callback, 'actions', {'get': None})
+    ]
+
+
+class TestQueryBudget:
+
+    def test_every_route_has_budget(self):
+        names = {route.name for route in budget_routes()}
+        missing = names - set(QUERY_BUDGETS)
+        assert not missing, (
+            f'Добавьте бюджет SQL-запросов для маршрутов: {sorted(missing)}'
+        )
+        extra = set(QUERY_BUDGETS) - names
+        assert not extra, (
+            f'Уберите бюджет маршрутов без GET: {sorted(extra)}'
+        )
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize(
+        'route', budget_routes(), ids=lambda route: route.name
+    )
+    def test_route_query_budget(self, route, admin_client, catalog):
+        url = reverse(route.name, kwargs=route_kwargs(route, catalog))
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(url)
+        assert response.status_code == 200, (
+            f'GET {url} вернул {response.status_code}: бюджет не измерен'
+        )
+        budget = QUERY_BUDGETS[route.name]
+        assert len(context) <= budget, (
+            f'GET {url} выполняет {len(context)} SQL-запросов при бюджете '
+            f'{budget}:\n'
+            + '\n'.join(query['sql'] for query in context.captured_queries)
+        )
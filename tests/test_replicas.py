@@ -0,0 +1,129 @@
+import pytest
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from api.cache import bump_version
+from api.replicas import ReplicaRouter, read_from_primary, read_from_replica
+from reviews.models import Title
+from tests.conftest import REPLICA_DB_ALIAS
+
+TITLE_ID = 1
+
+
+@pytest.fixture
+def replica(settings):
+    """Отдельные основная БД и реплика с разными названиями произведения."""
+    settings.REPLICA_DATABASES = [REPLICA_DB_ALIAS]
+    for alias, name in (
+        (DEFAULT_DB_ALIAS, 'Основная'), (REPLICA_DB_ALIAS, 'Реплика')
+    ):
+        Title.objects.using(alias).bulk_create(
+            [Title(id=TITLE_ID, name=name, year=2000)]
+        )
+
+
+def title_names(client):
+    return [title['name'] for title in client.get('/api/v1/titles/').json()[
+        'results'
+    ]]
+
+
+def review_texts(client):
+    return [
+        review['text'] for review in client.get(
+            f'/api/v1/titles/{TITLE_ID}/reviews/'
+        ).json()['results']
+    ]
+
+
+@pytest.mark.django_db(
+    transaction=True, databases=[DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS]
+)
+class TestReplicas:
+
+    def test_reads_from_replica(self, client, replica):
+        assert title_names(client) == ['Реплика'], (
+            'Проверьте, что GET-запросы читают данные с реплики'
+        )
+
+    def test_reads_from_primary_without_replicas(
+        self, client, replica, settings
+    ):
+        settings.REPLICA_DATABASES = []
+        assert title_names(client) == ['Основная'], (
+            'Проверьте, что без реплик чтение идет из основной БД'
+        )
+
+    def test_read_your_writes(self, client, user_client, replica):
+        response = user_client.post(
+            f'/api/v1/titles/{TITLE_ID}/reviews/',
+            {'text': 'Свой отзыв', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert review_texts(user_client) == ['Свой отзыв'], (
+            'Проверьте, что после записи пользователь читает из основной БД'
+        )
+        assert review_texts(client) == [], (
+            'Проверьте, что другие пользователи продолжают читать с реплики'
+        )
+        cache.clear()
+        assert review_texts(user_client) == [], (
+            'Проверьте, что после окна REPLICA_LAG_SECONDS пользователь '
+            'снова читает с реплики'
+        )
+
+    def test_failed_write_does_not_pin(self, user_client, replica):
+        response = user_client.post(
+            f'/api/v1/titles/{TITLE_ID}/reviews/', {'score': 70}
+        )
+        assert response.status_code == 400
+        assert title_names(user_client) == ['Реплика'], (
+            'Проверьте, что неуспешный запрос не переключает чтение '
+            'на основную БД'
+        )
+
+    def test_lagging_response_not_cached(self, client, replica, settings):
+        bump_version('titles')
+        for _ in range(2):
+            response = client.get('/api/v1/titles/')
+            assert response['X-Cache'] == 'MISS', (
+                'Проверьте, что ответ реплики сразу после изменения '
+                'не кэшируется'
+            )
+            assert 'ETag' not in response, (
+                'Проверьте, что ответ реплики сразу после изменения '
+                'не получает ETag'
+            )
+        settings.REPLICA_LAG_SECONDS = 0
+        client.get('/api/v1/titles/')
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT'
+        assert 'ETag' in response
+
+
+class TestReplicaRouter:
+
+    def test_routing(self, settings):
+        settings.REPLICA_DATABASES = [REPLICA_DB_ALIAS]
+        router = ReplicaRouter()
+        assert router.db_for_read(Title) is None
+        read_from_replica()
+        try:
+            assert router.db_for_read(Title) == REPLICA_DB_ALIAS
+            assert router.db_for_write(Title) == DEFAULT_DB_ALIAS, (
+                'Проверьте, что запись всегда идет в основную БД'
+            )
+        finally:
+            read_from_primary()
+
+    @pytest.mark.django_db
+    def test_atomic_reads_from_primary(self, settings):
+        settings.REPLICA_DATABASES = [REPLICA_DB_ALIAS]
+        read_from_replica()
+        try:
+            with transaction.atomic():
+                assert ReplicaRouter().db_for_read(Title) is None, (
+                    'Проверьте, что чтение в транзакции идет из основной БД'
+                )
+        finally:
+            read_from_primary()
@@ -0,0 +1,152 @@
+from threading import Thread
+
+import pytest
+from django.db import connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api import cache
+from api.cache import cache_stats, comments_scope
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_titles_cached_until_review(self, client, title, user):
+        url = '/api/v1/titles/?year=2000'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response['X-Cache'] == 'HIT' and not context, (
+            'Проверьте, что повторный GET обслуживается из кэша без запросов'
+        )
+        assert client.get('/api/v1/titles/?year=1999')['X-Cache'] == 'MISS', (
+            'Проверьте, что параметры запроса входят в ключ кэша'
+        )
+        Review.objects.create(title=title, author=user, text='Текст', score=9)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведений'
+        )
+        assert response.json()['results'][0]['rating'] == 9
+        assert cache_stats() == {'hit': 1, 'miss': 3}
+
+    def test_category_change_invalidates_titles(self, client, title):
+        client.get(f'/api/v1/titles/{title.pk}/')
+        client.get('/api/v1/categories/')
+        Category.objects.filter(pk=title.category_id).get().delete()
+        assert client.get(f'/api/v1/titles/{title.pk}/').json()[
+            'category'
+        ] is None, 'Проверьте, что удаление категории сбрасывает кэш'
+        assert client.get('/api/v1/categories/').json()['count'] == 0
+
+    def test_no_stale_entry_after_commit(self, client, title):
+        url = f'/api/v1/titles/{title.pk}/'
+        responses = []
+
+        def read():
+            # Параллельный запрос в своем соединении видит старые строки.
+            try:
+                responses.append(client.get(url))
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            title.name = 'Новое название'
+            title.save()
+            reader = Thread(target=read)
+            reader.start()
+            reader.join()
+        assert responses[0].json()['name'] == 'Title'
+        response = client.get(url)
+        assert response.json()['name'] == 'Новое название', (
+            'Проверьте, что версия кэша меняется после фиксации транзакции '
+            'и прочитанный до нее ответ не отдается'
+        )
+        assert response['ETag'] != responses[0]['ETag']
+
+    def test_one_bump_per_transaction(self, title, user, admin,
+                                      monkeypatch):
+        bumps = []
+        monkeypatch.setattr(
+            cache, 'bump_version', lambda *scopes: bumps.append(scopes)
+        )
+        with transaction.atomic():
+            review = Review.objects.create(
+                title=title, author=user, text='Отзыв', score=5
+            )
+            for index in range(5):
+                Comment.objects.create(
+                    review=review, author=admin, text=f'Текст {index}'
+                )
+            with transaction.atomic():
+                title.save()
+            assert bumps == []
+        assert len(bumps) == 1, (
+            'Проверьте, что версии меняются одним вызовом на транзакцию'
+        )
+        assert len(bumps[0]) == len(set(bumps[0]))
+        assert comments_scope(review.pk) in bumps[0]
+
+    def test_bump_after_savepoint_rollback(self, title, user, monkeypatch):
+        bumps = []
+        monkeypatch.setattr(
+            cache, 'bump_version', lambda *scopes: bumps.append(scopes)
+        )
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    title.save()
+                    raise ValueError
+            except ValueError:
+                pass
+            Category.objects.create(name='Книга', slug='book')
+        assert bumps == [('categories', 'titles')], (
+            'Проверьте, что откат точки сохранения не теряет версии, '
+            'измененные после него'
+        )
+
+    def test_title_delete_skips_comments(self, client, title, user, admin):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        Comment.objects.bulk_create(
+            Comment(review=review, author=admin, text='Текст')
+            for _ in range(5)
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        assert client.get(url).json()['count'] == 5
+        with CaptureQueriesContext(connection) as context:
+            Title.objects.get(pk=title.pk).delete()
+        assert not any(
+            query['sql'].startswith('SELECT')
+            and 'FROM "reviews_comment"' in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что комментарии удаляются без загрузки'
+        assert client.get(url).status_code == 404
+
+    def test_comment_and_author_delete(self, client, admin_client, title,
+                                       user, admin):
+        review = Review.objects.create(
+            title=title, author=admin, text='Отзыв', score=5
+        )
+        comments = [
+            Comment.objects.create(review=review, author=author, text='Да')
+            for author in (admin, user)
+        ]
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        etag = client.get(url)['ETag']
+        response = admin_client.delete(f'{url}{comments[0].pk}/')
+        assert response.status_code == 204
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что удаление комментария меняет ETag списка'
+        )
+        assert response.json()['count'] == 1
+        etag = response['ETag']
+        user.delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что удаление автора меняет ETag списков'
+        )
+        assert response.json()['count'] == 0
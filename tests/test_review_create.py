@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import NotFound
+
+from api.serializers import UNIQUE_REVIEW_MSG, ReviewSerializer
+from reviews.models import Review, Title
+from tests.fixtures.fixture_data import get_client
+
+POSTS = 4
+
+
+def reviews_url(title):
+    return f'/api/v1/titles/{title.pk}/reviews/'
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def test_create_queries(self, user_client, title):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                reviews_url(title), {'text': 'Текст', 'score': 7}
+            )
+        assert response.status_code == 201
+        # Счетчики рейтинга читаются отдельно, здесь — загрузка объекта.
+        title_queries = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and '"reviews_title"."name"' in query['sql']
+        ]
+        assert len(title_queries) == 1, (
+            'Проверьте, что произведение запрашивается один раз за запрос'
+        )
+        assert not any(
+            'FROM "reviews_review"' in query['sql']
+            for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ), 'Проверьте, что повторный отзыв не проверяется отдельным запросом'
+
+    def test_duplicate_rejected(self, user_client, title):
+        data = {'text': 'Текст', 'score': 7}
+        assert user_client.post(reviews_url(title), data).status_code == 201
+        response = user_client.post(reviews_url(title), data)
+        assert response.status_code == 400
+        assert response.json() == {'non_field_errors': [UNIQUE_REVIEW_MSG]}
+        assert Title.objects.get(pk=title.pk).score_count == 1
+
+    def test_missing_title(self, user_client):
+        response = user_client.post(
+            '/api/v1/titles/0/reviews/', {'text': 'Текст', 'score': 7}
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_duplicates(user, title):
+    barrier = Barrier(POSTS)
+
+    def post(score):
+        client = get_client(user)
+        barrier.wait()
+        try:
+            return client.post(
+                reviews_url(title), {'text': 'Текст', 'score': score}
+            )
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(POSTS) as executor:
+        responses = list(executor.map(post, range(1, POSTS + 1)))
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [201] + [400] * (POSTS - 1), (
+        'Проверьте, что из параллельных повторных отзывов создается один'
+    )
+    review = Review.objects.get(title=title, author=user)
+    assert Title.objects.values_list(
+        'score_sum', 'score_count'
+    ).get(pk=title.pk) == (review.score, 1), (
+        'Проверьте, что счетчики оценок учитывают только созданный отзыв'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_title_deleted_before_insert(user, title):
+    serializer = ReviewSerializer(data={'text': 'Текст', 'score': 7})
+    assert serializer.is_valid()
+    # Произведение удалено после того, как представление его загрузило.
+    Title.objects.filter(pk=title.pk).delete()
+    with pytest.raises(NotFound):
+        serializer.save(author=user, title=title)
+    assert not Review.objects.exists()
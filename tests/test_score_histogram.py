@@ -0,0 +1,109 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import SCORE_FIELDS, Review, Title
+from reviews.ratings import histogram_stats
+
+
+def get_histogram(title):
+    values = Title.objects.values(*SCORE_FIELDS.values()).get(pk=title.pk)
+    return {
+        score: values[field_name]
+        for score, field_name in SCORE_FIELDS.items()
+        if values[field_name]
+    }
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create(
+            username=f'author{index}', email=f'author{index}@yamdb.fake'
+        )
+        for index in range(4)
+    ]
+
+
+@pytest.mark.django_db
+class TestScoreHistogram:
+
+    def test_histogram_follows_reviews(self, title, authors):
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=score
+            )
+            for author, score in zip(authors, (3, 7, 7, 10))
+        ]
+        assert get_histogram(title) == {3: 1, 7: 2, 10: 1}, (
+            'Проверьте, что создание отзыва увеличивает счетчик его оценки'
+        )
+        review = Review.objects.get(pk=reviews[1].pk)
+        review.score = 3
+        review.save()
+        assert get_histogram(title) == {3: 2, 7: 1, 10: 1}, (
+            'Проверьте, что изменение оценки переносит отзыв между счетчиками'
+        )
+        other = Title.objects.create(
+            name='Other', year=2001, category=title.category
+        )
+        review.title = other
+        review.save()
+        assert get_histogram(title) == {3: 1, 7: 1, 10: 1}
+        assert get_histogram(other) == {3: 1}, (
+            'Проверьте, что перенос отзыва обновляет оба произведения'
+        )
+        reviews[3].delete()
+        assert get_histogram(title) == {3: 1, 7: 1}, (
+            'Проверьте, что удаление отзыва уменьшает счетчик его оценки'
+        )
+
+    def test_recount_rebuilds_histogram(self, title, authors):
+        for author, score in zip(authors, (2, 2, 9)):
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=score
+            )
+        Title.objects.update(score_2=0, score_5=4)
+        with pytest.raises(CommandError):
+            call_command('recount_ratings', '--check')
+        call_command('recount_ratings')
+        assert get_histogram(title) == {2: 2, 9: 1}, (
+            'Проверьте, что команда recount_ratings пересчитывает гистограмму'
+        )
+        call_command('recount_ratings', '--check')
+
+    def test_stats(self):
+        histogram = dict.fromkeys(SCORE_FIELDS, 0)
+        histogram.update({1: 1, 6: 2, 8: 3, 10: 4})
+        assert histogram_stats(histogram) == {
+            'count': 10,
+            'mean': 7.7,
+            'median': 8,
+            'percentiles': {25: 6, 75: 10, 90: 10},
+        }
+        empty = histogram_stats(dict.fromkeys(SCORE_FIELDS, 0))
+        assert empty['count'] == 0 and empty['median'] is None
+
+    def test_scores_endpoint(self, client, title, authors):
+        for author, score in zip(authors, (4, 8, 8)):
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=score
+            )
+        url = f'/api/v1/titles/{title.pk}/scores/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(context) == 1, (
+            'Проверьте, что распределение оценок читается одним запросом '
+            'к счетчикам произведения'
+        )
+        data = response.json()
+        assert data['scores'] == {
+            str(score): {4: 1, 8: 2}.get(score, 0) for score in SCORE_FIELDS
+        }
+        assert data['count'] == 3
+        assert data['median'] == 8
+        assert data['percentiles'] == {'25': 4, '75': 8, '90': 8}
+        assert client.get('/api/v1/titles/0/scores/').status_code == 404
@@ -0,0 +1,153 @@
+import pytest
+
+from api import throttling
+from api.throttling import SlidingWindowThrottle
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+RATES = {
+    'signup_ip': '3/min',
+    'signup_username': '2/min',
+    'signup_email': '2/min',
+    'token_ip': '3/min',
+    'token_username': '2/min',
+    'write': '2/min',
+}
+
+
+class BrokenCache:
+    """Кэш, который сообщает об ошибках исключениями."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError('memcached недоступен')
+        return fail
+
+
+class SilentCache:
+    """Недоступный memcached: ошибки видны только по результатам."""
+
+    def get_many(self, keys):
+        return {}
+
+    def incr(self, key):
+        raise ValueError(f'Key {key} not found')
+
+    def add(self, key, value, timeout):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def rates(monkeypatch):
+    monkeypatch.setattr(SlidingWindowThrottle, 'THROTTLE_RATES', RATES)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое время clock[0], начинается с границы минутного окна."""
+    now = [600.0]
+    monkeypatch.setattr(
+        SlidingWindowThrottle, 'timer', staticmethod(lambda: now[0])
+    )
+    return now
+
+
+def signup(client, number, address='10.0.0.1', username=None, email=None):
+    return client.post(SIGNUP_URL, {
+        'username': username or f'user{number}',
+        'email': email or f'user{number}@yamdb.fake',
+    }, REMOTE_ADDR=address)
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_signup_by_ip(self, client, django_assert_num_queries):
+        for number in range(3):
+            assert signup(client, number).status_code == 200
+        with django_assert_num_queries(0):
+            response = signup(client, 3)
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация с одного адреса ограничена и '
+            'отклоняется без запросов к БД'
+        )
+        assert 'Retry-After' in response
+        assert signup(client, 3, address='10.0.0.2').status_code == 200, (
+            'Проверьте, что ограничение действует для каждого адреса отдельно'
+        )
+
+    @pytest.mark.parametrize('field', ('username', 'email'))
+    def test_signup_by_username_and_email(self, client, field):
+        for number in range(2):
+            assert signup(
+                client, 0, address=f'10.0.0.{number}'
+            ).status_code == 200
+        value = {'username': 'USER0', 'email': 'User0@yamdb.fake'}[field]
+        response = signup(client, 1, address='10.0.0.9', **{field: value})
+        assert response.status_code == 429, (
+            f'Проверьте, что регистрация ограничена по полю {field} '
+            'без учета регистра'
+        )
+
+    def test_token_by_username(self, client, user):
+        for number in range(2):
+            assert client.post(TOKEN_URL, {
+                'username': user.username, 'confirmation_code': '00000'
+            }, REMOTE_ADDR=f'10.0.0.{number}').status_code == 400
+        assert client.post(TOKEN_URL, {
+            'username': user.username, 'confirmation_code': '00000'
+        }, REMOTE_ADDR='10.0.0.9').status_code == 429, (
+            'Проверьте, что подбор кода для пользователя ограничен'
+        )
+
+    def test_sliding_window(self, client, clock):
+        for number in range(3):
+            assert signup(client, number).status_code == 200
+        assert signup(client, 3).status_code == 429
+        # Три четверти прошлого окна еще в периоде: 3 * 0.75 < 3.
+        clock[0] += 75
+        assert signup(client, 3).status_code == 200
+        assert signup(client, 4).status_code == 429, (
+            'Проверьте, что учитывается доля запросов предыдущего окна'
+        )
+        clock[0] += 30
+        assert signup(client, 4).status_code == 200
+
+    def test_rejected_requests_not_counted(self, client, clock):
+        for number in range(10):
+            signup(client, number)
+        # Половина прошлого окна в периоде: 3 * 0.5 < 3, а 10 * 0.5 — нет.
+        clock[0] += 90
+        assert signup(client, 10).status_code == 200, (
+            'Проверьте, что отклоненные запросы не продлевают ограничение'
+        )
+
+    @pytest.mark.parametrize('broken_cache', (BrokenCache, SilentCache))
+    def test_local_fallback(self, client, monkeypatch, broken_cache):
+        monkeypatch.setattr(throttling, 'cache', broken_cache())
+        monkeypatch.setattr(throttling, 'counters', throttling.Counters())
+        for number in range(3):
+            assert signup(client, number).status_code == 200
+        assert signup(client, 3).status_code == 429, (
+            'Проверьте, что без кэша частота ограничивается в памяти процесса'
+        )
+
+    def test_writes_by_user(self, user_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        for _ in range(2):
+            assert user_client.post(url, {'score': 70}).status_code == 400
+        assert user_client.post(
+            url, {'text': 'Отзыв', 'score': 7}
+        ).status_code == 429, (
+            'Проверьте, что запись отзывов пользователем ограничена'
+        )
+        assert user_client.get(url).status_code == 200, (
+            'Проверьте, что чтение не ограничивается'
+        )
+
+    def test_disabled_rate(self, client, monkeypatch):
+        monkeypatch.setattr(
+            SlidingWindowThrottle, 'THROTTLE_RATES', {'signup_ip': None}
+        )
+        for number in range(5):
+            assert signup(client, number).status_code == 200
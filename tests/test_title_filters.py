@@ -0,0 +1,139 @@
+from itertools import combinations
+
+import pytest
+from django.db import connection, transaction
+from django.http import QueryDict
+
+from api.filters import TitleFilter
+from reviews.models import Genre, Title
+
+URL = '/api/v1/titles/'
+# Фильтры, планы которых проверяются во всех сочетаниях.
+FILTERS = {
+    'genre-any': 'genre=drama,comedy',
+    'genre-all': 'genre=drama,comedy&genre_match=all',
+    'year-range': 'year_min=1990&year_max=2000',
+    'rating-min': 'rating_min=7',
+}
+PLAN_CASES = [
+    '+'.join(names)
+    for size in range(1, len(FILTERS) + 1)
+    for names in combinations(FILTERS, size)
+    if not {'genre-any', 'genre-all'} <= set(names)
+]
+
+
+@pytest.fixture
+def titles():
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    rows = (
+        ('Драма', 1985, 9.0, (drama,)),
+        ('Комедия', 1995, 6.0, (comedy,)),
+        ('Трагикомедия', 1999, 8.0, (drama, comedy)),
+        ('Без жанра', 2005, None, ()),
+    )
+    titles = {}
+    for name, year, rating, genres in rows:
+        title = Title.objects.create(name=name, year=year, rating=rating)
+        title.genre.set(genres)
+        titles[name] = title
+    return titles
+
+
+def found_names(client, query):
+    response = client.get(URL, QueryDict(query))
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+def explain(query):
+    queryset = TitleFilter(
+        QueryDict(query), queryset=Title.objects.all()
+    ).qs.order_by()
+    sql, params = queryset.query.sql_with_params()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # На маленькой таблице планировщик выбирает полный просмотр,
+            # поэтому проверяется, что индексный план вообще возможен.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+    return sql, plan
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    def test_genre_any(self, client, titles):
+        assert found_names(client, 'genre=drama,comedy') == [
+            'Драма', 'Комедия', 'Трагикомедия'
+        ], (
+            'Проверьте, что ?genre=a,b возвращает произведения любого из '
+            'жанров без повторов'
+        )
+        assert found_names(client, 'genre=drama') == ['Драма', 'Трагикомедия']
+
+    def test_genre_all(self, client, titles):
+        assert found_names(
+            client, 'genre=drama,comedy&genre_match=all'
+        ) == ['Трагикомедия'], (
+            'Проверьте, что с genre_match=all возвращаются произведения '
+            'всех перечисленных жанров'
+        )
+        assert found_names(
+            client, 'genre=drama,unknown&genre_match=all'
+        ) == []
+
+    def test_genre_count(self, client, titles):
+        response = client.get(URL, {'genre': 'drama,comedy'})
+        assert response.json()['count'] == 3, (
+            'Проверьте, что число произведений не учитывает повторы по жанрам'
+        )
+
+    def test_year_range(self, client, titles):
+        assert found_names(client, 'year_min=1990&year_max=2000') == [
+            'Комедия', 'Трагикомедия'
+        ], 'Проверьте фильтры year_min и year_max'
+        assert found_names(client, 'year_min=2000') == ['Без жанра']
+
+    def test_rating_min(self, client, titles):
+        assert found_names(client, 'rating_min=8') == [
+            'Драма', 'Трагикомедия'
+        ], (
+            'Проверьте, что rating_min отбирает произведения с рейтингом '
+            'не ниже заданного'
+        )
+
+    def test_combined(self, client, titles):
+        assert found_names(
+            client, 'genre=drama,comedy&year_max=1999&rating_min=7'
+        ) == ['Драма', 'Трагикомедия']
+
+    def test_invalid_genre_match(self, client, titles):
+        response = client.get(URL, {'genre': 'drama', 'genre_match': 'some'})
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестное значение genre_match отклоняется'
+        )
+
+    @pytest.mark.parametrize('case', PLAN_CASES)
+    def test_query_plan(self, titles, case):
+        sql, plan = explain(
+            '&'.join(FILTERS[name] for name in case.split('+'))
+        )
+        assert 'GROUP BY' not in sql and 'HAVING' not in sql, (
+            'Проверьте, что фильтры не группируют произведения'
+        )
+        if connection.vendor == 'postgresql':
+            assert 'Seq Scan' not in plan, plan
+        else:
+            assert 'SCAN reviews_title' not in plan, plan
+            assert 'SCAN reviews_genretitle' not in plan, plan
+            if 'genre' in case:
+                assert 'genretitle_genre_title_idx' in plan, (
+                    'Проверьте, что жанры произведений читаются по индексу '
+                    f'(genre_id, title_id):\n{plan}'
+                )
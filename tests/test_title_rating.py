@@ -0,0 +1,131 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import LeaderboardEntry, Review, Title
+from reviews.ratings import find_mismatched_titles, recount_ratings
+
+
+def get_rating(title):
+    return Title.objects.values_list(
+        'score_sum', 'score_count', 'rating'
+    ).get(pk=title.pk)
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_reviews(self, title, user, admin):
+        review = Review.objects.create(
+            title=title, author=user, text='Текст', score=4
+        )
+        Review.objects.create(title=title, author=admin, text='Текст', score=8)
+        assert get_rating(title) == (12, 2, 6.0), (
+            'Проверьте, что создание отзыва обновляет счетчики произведения'
+        )
+        review = Review.objects.get(pk=review.pk)
+        review.score = 10
+        review.save()
+        assert get_rating(title) == (18, 2, 9.0), (
+            'Проверьте, что изменение оценки обновляет счетчики произведения'
+        )
+        review.delete()
+        assert get_rating(title) == (8, 1, 8.0), (
+            'Проверьте, что удаление отзыва обновляет счетчики произведения'
+        )
+        admin.delete()
+        assert get_rating(title) == (0, 0, None), (
+            'Проверьте, что каскадное удаление отзывов обновляет счетчики'
+        )
+
+    def test_save_with_deferred_fields(self, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Текст', score=4
+        )
+        Review.objects.only('id', 'text').get(pk=review.pk).save()
+        Review.objects.defer('score').get(pk=review.pk).save()
+        assert get_rating(title) == (4, 1, 4.0), (
+            'Проверьте, что сохранение отзыва с отложенными полями '
+            'не учитывает оценку повторно'
+        )
+        assert Title.objects.get(pk=title.pk).score_4 == 1
+
+    def test_title_save_keeps_counters(self, admin_client, title, user):
+        loaded = Title.objects.get(pk=title.pk)
+        Review.objects.create(title=title, author=user, text='Текст', score=6)
+        loaded.name = 'Новое название'
+        loaded.save()
+        assert get_rating(title) == (6, 1, 6.0), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'счетчики оценок'
+        )
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.pk}/', {'year': 1999}, format='json'
+        )
+        assert response.status_code == 200
+        assert get_rating(title) == (6, 1, 6.0)
+        assert Title.objects.get(pk=title.pk).name == 'Новое название'
+
+    def test_api_reads_stored_rating(self, client, title, user):
+        Review.objects.create(title=title, author=user, text='Текст', score=7)
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что рейтинг произведения берется из счетчиков'
+        )
+
+    def test_recount_ratings(self, title, user):
+        Review.objects.create(title=title, author=user, text='Текст', score=5)
+        Title.objects.update(score_sum=0, score_count=0, rating=None)
+        with pytest.raises(CommandError):
+            call_command('recount_ratings', '--check')
+        call_command('recount_ratings')
+        assert get_rating(title) == (5, 1, 5.0), (
+            'Проверьте, что команда recount_ratings пересчитывает счетчики'
+        )
+        call_command('recount_ratings', '--check')
+
+    def test_recount_queries(self, title, user, admin):
+        titles = [title] + [
+            Title.objects.create(name=f'Title {index}', year=2000)
+            for index in range(5)
+        ]
+        for item in titles:
+            for author, score in ((user, 3), (admin, 8)):
+                Review.objects.create(
+                    title=item, author=author, text='Текст', score=score
+                )
+        Title.objects.filter(pk__in=[titles[1].pk, titles[4].pk]).update(
+            score_sum=0, score_count=0, rating=None
+        )
+        with CaptureQueriesContext(connection) as context:
+            fixed = recount_ratings()
+        assert sorted(fixed) == [titles[1].pk, titles[4].pk]
+        assert len(context) <= 3, (
+            'Проверьте, что пересчет читает отзывы одним запросом GROUP BY '
+            'и исправляет произведения пачкой'
+        )
+        assert not find_mismatched_titles()
+        assert get_rating(titles[4]) == (11, 2, 5.5)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recount_refreshes_derived_state(self, client, title, user,
+                                             settings):
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        Review.objects.create(title=title, author=user, text='Текст', score=5)
+        url = f'/api/v1/titles/{title.pk}/'
+        etag = client.get(url)['ETag']
+        Title.objects.update(score_sum=0, score_count=0, rating=None)
+        LeaderboardEntry.objects.all().delete()
+        call_command('recount_ratings')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что пересчет меняет версию кэша произведений'
+        )
+        assert response.json()['rating'] == 5
+        assert LeaderboardEntry.objects.filter(
+            title=title, category=None, genre=None
+        ).values_list('rating', flat=True).get() == 5, (
+            'Проверьте, что пересчет восстанавливает места в рейтингах'
+        )
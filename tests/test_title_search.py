@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection, models, transaction
+
+from reviews.models import Title
+from reviews.search import search_titles, trigram_similarity
+
+TITLES = ('Побег из Шоушенка', 'Крестный отец', 'Шоу Трумана')
+
+
+@pytest.fixture
+def titles():
+    return [Title.objects.create(name=name, year=2000) for name in TITLES]
+
+
+def found_names(client, query):
+    response = client.get('/api/v1/titles/', query)
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitleSearch:
+
+    @pytest.mark.parametrize('param', ('search', 'name'))
+    def test_search_ranked_with_typos(self, client, titles, param):
+        assert found_names(client, {param: 'шоушенк'})[0] == TITLES[0], (
+            'Проверьте, что поиск находит произведение по части названия'
+        )
+        assert found_names(client, {param: 'Шоушенко'}) == [TITLES[0]], (
+            'Проверьте, что поиск устойчив к опечаткам'
+        )
+
+    def test_similarity_threshold(self, client, titles):
+        assert found_names(client, {'search': 'шоушенк'}) == [TITLES[0]], (
+            'Проверьте, что одной общей триграммы (шоу) недостаточно: '
+            'порог сходства тот же, что у pg_trgm'
+        )
+        assert found_names(client, {'search': 'ШОУ ТРУМ'}) == [TITLES[2]]
+
+    def test_similarity_matches_pg_trgm(self):
+        assert trigram_similarity('Побег из Шоушенка', 'Шоушенка') == 0.5
+        assert trigram_similarity('word', 'two words') == 4 / 11
+        assert trigram_similarity('abc', '') == 0
+
+    def test_search_follows_title_writes(self, client, titles):
+        title = titles[1]
+        title.name = 'Зеленая миля'
+        title.save()
+        assert found_names(client, {'search': 'зеленая'}) == [title.name], (
+            'Проверьте, что индекс поиска обновляется при изменении названия'
+        )
+        title.delete()
+        assert found_names(client, {'search': 'зеленая'}) == []
+
+    def test_short_query(self, client, titles):
+        assert found_names(client, {'search': 'от'}) == [TITLES[1]]
+
+    def test_lookup_only_on_search_field(self):
+        assert 'ilike_contains' not in models.TextField.get_lookups(), (
+            'Проверьте, что ilike_contains не меняет поиск по всем текстовым '
+            'полям проекта'
+        )
+        assert Title._meta.get_field('name').get_lookup('ilike_contains')
+
+    def test_search_uses_index(self, titles):
+        sql, params = search_titles(
+            Title.objects.all(), 'шоушенк'
+        ).query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Индекс должен обслуживать оба условия: и сходство, и ILIKE.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}', params)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                assert 'title_name_trgm_idx' in plan, plan
+                assert 'Seq Scan' not in plan, plan
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = '\n'.join(row[-1] for row in cursor.fetchall())
+                assert 'VIRTUAL TABLE INDEX' in plan, plan
+                assert 'SEARCH reviews_title USING INTEGER PRIMARY KEY' in plan
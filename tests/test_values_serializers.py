@@ -0,0 +1,53 @@
+import pytest
+from django.core.cache import cache
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def catalog(title, user, admin):
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    title.genre.add(comedy)
+    Title.objects.create(name='Без категории', year=1990, description='Текст')
+    other = Title.objects.create(
+        name='Другое', year=2001, category=Category.objects.get(slug='movie')
+    )
+    other.genre.set([comedy])
+    Title.objects.filter(pk=other.pk).update(weighted_rating=6.25)
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=7
+    )
+    Review.objects.create(title=title, author=admin, text='Еще', score=8)
+    Comment.objects.create(review=review, author=admin, text='Комментарий')
+    reviews = f'/api/v1/titles/{title.pk}/reviews/'
+    comments = f'{reviews}{review.pk}/comments/'
+    return (
+        '/api/v1/titles/',
+        '/api/v1/titles/?genre=comedy',
+        f'/api/v1/titles/{title.pk}/',
+        f'/api/v1/titles/{other.pk}/',
+        reviews,
+        f'{reviews}?pagination=cursor',
+        f'{reviews}{review.pk}/',
+        comments,
+        f'{comments}?pagination=cursor',
+        f'{comments}{review.comments.get().pk}/',
+    )
+
+
+@pytest.mark.django_db
+class TestValuesSerializers:
+
+    def test_same_bytes(self, client, catalog, settings):
+        for url in catalog:
+            responses = []
+            for fast in (False, True):
+                settings.FAST_READ_SERIALIZERS = fast
+                cache.clear()
+                response = client.get(url)
+                assert response.status_code == 200
+                responses.append(response.content)
+            assert responses[0] == responses[1], (
+                f'Проверьте, что быстрое чтение {url} совпадает с ответом '
+                'ModelSerializer'
+            )
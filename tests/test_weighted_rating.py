@@ -0,0 +1,71 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+from reviews.weighted_ratings import update_weighted_ratings
+
+PRIOR_WEIGHT = 2
+
+
+@pytest.mark.django_db
+class TestWeightedRating:
+
+    def test_bayesian_average(self, client, title, django_user_model):
+        authors = [
+            django_user_model.objects.create(
+                username=f'author{index}', email=f'author{index}@yamdb.fake'
+            )
+            for index in range(4)
+        ]
+        popular = Title.objects.create(name='Popular', year=2000)
+        bad = Title.objects.create(name='Bad', year=2000)
+        empty = Title.objects.create(name='Empty', year=2000)
+        Review.objects.create(
+            title=title, author=authors[0], text='Отзыв', score=10
+        )
+        for author in authors:
+            Review.objects.create(
+                title=popular, author=author, text='Отзыв', score=9
+            )
+            Review.objects.create(
+                title=bad, author=author, text='Отзыв', score=2
+            )
+        # Маленькая пачка проверяет сложение сумм по частям.
+        reviews, titles = update_weighted_ratings(
+            PRIOR_WEIGHT, chunk_size=2, batch_size=2
+        )
+        assert (reviews, titles) == (9, 4)
+        mean = (10 + 4 * 9 + 4 * 2) / 9
+        weighted = dict(Title.objects.values_list('name', 'weighted_rating'))
+        assert weighted['Title'] == pytest.approx(
+            (10 + PRIOR_WEIGHT * mean) / (1 + PRIOR_WEIGHT)
+        )
+        assert weighted['Popular'] == pytest.approx(
+            (36 + PRIOR_WEIGHT * mean) / (4 + PRIOR_WEIGHT)
+        )
+        assert weighted['Popular'] > weighted['Title'], (
+            'Проверьте, что одна высокая оценка не обгоняет много хороших'
+        )
+        assert weighted['Empty'] is None
+        response = client.get(f'/api/v1/titles/{popular.pk}/')
+        assert response.json()['weighted_rating'] == pytest.approx(
+            weighted['Popular']
+        )
+
+    def test_command(self, title, user):
+        Review.objects.create(title=title, author=user, text='Т', score=6)
+        call_command('update_weighted_ratings', '--prior-weight', '3')
+        title.refresh_from_db()
+        assert title.weighted_rating == pytest.approx(6)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_command_refreshes_cached_titles(self, client, title, user):
+        url = f'/api/v1/titles/{title.pk}/'
+        Review.objects.create(title=title, author=user, text='Т', score=6)
+        etag = client.get(url)['ETag']
+        call_command('update_weighted_ratings', '--prior-weight', '3')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что пересчет меняет версию кэша произведений'
+        )
+        assert response.json()['weighted_rating'] == pytest.approx(6)